@@ -10,15 +10,14 @@ Module: Data Analytics & Business Intelligence
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
-# Configuration des graphiques
-plt.style.use('seaborn-v0_8-darkgrid')
-sns.set_palette("husl")
+import charts
+from numeric_stats import NumericStats
+from quality_rules import REJECT_FILE, QualityRules
+from sentiment_engine import SentimentEngine
 
 print("="*80)
 print(" PROJET BI - ANALYSE GENAI DANS LES ENTREPRISES ".center(80, "="))
@@ -72,7 +71,8 @@ print(f"\n✓ Colonnes avec valeurs manquantes: {len(missing_df)}")
 if len(missing_df) > 0:
     print("\n" + missing_df.to_string(index=False))
 
-    # Visualisation
+    # Visualisation (matplotlib importé au premier graphique)
+    plt = charts.pyplot()
     plt.figure(figsize=(12, 6))
     plt.bar(range(len(missing_df)), missing_df['Pourcentage'])
     plt.xticks(range(len(missing_df)), missing_df['Colonne'], rotation=45, ha='right')
@@ -150,18 +150,20 @@ print(f"    - Min: {df['Productivity Change (%)'].min():.2f}%")
 print(f"    - Max: {df['Productivity Change (%)'].max():.2f}%")
 print(f"    - Moyenne: {df['Productivity Change (%)'].mean():.2f}%")
 
-# Filtrer les valeurs aberrantes (valeurs négatives impossibles)
+# 4.6 Règles de qualité (referentiel/regles_qualite.json): valeurs impossibles,
+# référentiel, cohérence entre colonnes et valeurs atypiques (IQR, z-score).
+# Les lignes violant une règle bloquante sont mises en quarantaine.
 initial_count = len(df)
-df_cleaned = df[
-    (df['Number of Employees Impacted'] >= 0) &
-    (df['New Roles Created'] >= 0) &
-    (df['Training Hours Provided'] >= 0) &
-    (df['Adoption Year'] >= 2020) &
-    (df['Adoption Year'] <= 2025)
-].copy()
+quality_rules = QualityRules.load().fit(df)
+df_cleaned, violations = quality_rules.apply(df, reject_file=REJECT_FILE)
+df_cleaned = df_cleaned.copy()
+
+print("\n📊 Règles de qualité (violations par règle):")
+for line in quality_rules.report():
+    print(line)
 
 filtered_count = initial_count - len(df_cleaned)
-print(f"\n✓ {filtered_count} lignes avec valeurs aberrantes supprimées")
+print(f"\n✓ {filtered_count} lignes avec valeurs aberrantes mises en quarantaine: {REJECT_FILE}")
 print(f"✓ Dataset nettoyé: {len(df_cleaned):,} lignes")
 
 print("\n" + "="*80)
@@ -232,16 +234,15 @@ print(f"✓ Taux moyen de création de nouveaux rôles: {df_cleaned['New_Roles_R
 
 # 5.6 Analyse du sentiment (extraction de mots-clés)
 print("\n🔧 Analyse du sentiment 'Employee Sentiment':")
-def extract_sentiment_category(sentiment):
-    sentiment_lower = sentiment.lower()
-    if 'anxiety' in sentiment_lower or 'concern' in sentiment_lower or 'scary' in sentiment_lower:
-        return 'Négatif'
-    elif 'love' in sentiment_lower or 'exciting' in sentiment_lower or 'improved' in sentiment_lower:
-        return 'Positif'
-    else:
-        return 'Neutre'
-
-df_cleaned['Sentiment_Category'] = df_cleaned['Employee Sentiment'].apply(extract_sentiment_category)
+# Mots-clés configurables (referentiel/sentiment_mots_cles.json); chaque phrase
+# distincte n'est classée qu'une fois, puis le résultat est rediffusé par code
+sentiment_engine = SentimentEngine.load()
+
+df_cleaned['Sentiment_Category'] = sentiment_engine.classify(df_cleaned['Employee Sentiment'])
+sentiment_engine.save_cache()
+print(f"✓ {sentiment_engine.stats['distinctes']:,} phrases distinctes pour "
+      f"{sentiment_engine.stats['lignes']:,} lignes "
+      f"({sentiment_engine.stats['cache']:,} déjà en cache)")
 print("✓ Catégories de sentiment créées: Positif, Neutre, Négatif")
 print(df_cleaned['Sentiment_Category'].value_counts())
 
@@ -249,97 +250,44 @@ print("\n" + "="*80)
 print("ÉTAPE 6: VISUALISATIONS EXPLORATOIRES")
 print("="*80)
 
-# 6.1 Distribution par pays
-print("\n📊 Création de la visualisation par pays...")
-fig, ax = plt.subplots(figsize=(12, 6))
-country_counts = df_cleaned['Country'].value_counts().head(15)
-country_counts.plot(kind='bar', ax=ax, color='steelblue')
-ax.set_title('Top 15 Pays avec Adoption GenAI', fontsize=14, fontweight='bold')
-ax.set_xlabel('Pays')
-ax.set_ylabel('Nombre d\'entreprises')
-plt.xticks(rotation=45, ha='right')
-plt.tight_layout()
-plt.savefig('02_distribution_pays.png', dpi=300, bbox_inches='tight')
-print("✓ Graphique sauvegardé: 02_distribution_pays.png")
-plt.close()
-
-# 6.2 Distribution par industrie
-print("\n📊 Création de la visualisation par industrie...")
-fig, ax = plt.subplots(figsize=(12, 6))
-industry_counts = df_cleaned['Industry'].value_counts()
-industry_counts.plot(kind='barh', ax=ax, color='coral')
-ax.set_title('Distribution par Secteur d\'Activité', fontsize=14, fontweight='bold')
-ax.set_xlabel('Nombre d\'entreprises')
-ax.set_ylabel('Secteur')
-plt.tight_layout()
-plt.savefig('03_distribution_industrie.png', dpi=300, bbox_inches='tight')
-print("✓ Graphique sauvegardé: 03_distribution_industrie.png")
-plt.close()
-
-# 6.3 Distribution par outil GenAI
-print("\n📊 Création de la visualisation par outil GenAI...")
-fig, ax = plt.subplots(figsize=(10, 10))
-genai_counts = df_cleaned['GenAI Tool'].value_counts()
-colors = plt.cm.Set3(range(len(genai_counts)))
-ax.pie(genai_counts, labels=genai_counts.index, autopct='%1.1f%%', colors=colors, startangle=90)
-ax.set_title('Répartition des Outils GenAI', fontsize=14, fontweight='bold')
-plt.tight_layout()
-plt.savefig('04_distribution_genai_tools.png', dpi=300, bbox_inches='tight')
-print("✓ Graphique sauvegardé: 04_distribution_genai_tools.png")
-plt.close()
-
-# 6.4 Évolution de l'adoption par année
-print("\n📊 Création de la visualisation de l'évolution temporelle...")
-fig, ax = plt.subplots(figsize=(12, 6))
-year_counts = df_cleaned['Adoption Year'].value_counts().sort_index()
-ax.plot(year_counts.index, year_counts.values, marker='o', linewidth=2, markersize=10, color='green')
-ax.set_title('Évolution de l\'Adoption GenAI par Année', fontsize=14, fontweight='bold')
-ax.set_xlabel('Année')
-ax.set_ylabel('Nombre d\'entreprises')
-ax.grid(True, alpha=0.3)
-plt.tight_layout()
-plt.savefig('05_evolution_adoption.png', dpi=300, bbox_inches='tight')
-print("✓ Graphique sauvegardé: 05_evolution_adoption.png")
-plt.close()
-
-# 6.5 Distribution du changement de productivité
-print("\n📊 Création de la visualisation du changement de productivité...")
-fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6))
-
-# Histogramme
-ax1.hist(df_cleaned['Productivity Change (%)'], bins=30, color='purple', alpha=0.7, edgecolor='black')
-ax1.set_title('Distribution du Changement de Productivité', fontsize=14, fontweight='bold')
-ax1.set_xlabel('Changement de Productivité (%)')
-ax1.set_ylabel('Fréquence')
-ax1.axvline(df_cleaned['Productivity Change (%)'].mean(), color='red', linestyle='--', linewidth=2, label=f'Moyenne: {df_cleaned["Productivity Change (%)"].mean():.2f}%')
-ax1.legend()
-
-# Box plot
-ax2.boxplot(df_cleaned['Productivity Change (%)'], vert=True)
-ax2.set_title('Box Plot - Productivité', fontsize=14, fontweight='bold')
-ax2.set_ylabel('Changement de Productivité (%)')
-ax2.grid(True, alpha=0.3)
-
-plt.tight_layout()
-plt.savefig('06_analyse_productivite.png', dpi=300, bbox_inches='tight')
-print("✓ Graphique sauvegardé: 06_analyse_productivite.png")
-plt.close()
-
-# 6.6 Heatmap de corrélation
-print("\n📊 Création de la matrice de corrélation...")
+# Les graphiques sont indépendants: chacun est une étape du DAG, rendue dans un
+# pool de processus (charts.py) à partir de données déjà agrégées
+from dag_runner import DagRunner
+
+# 6.6 Matrice de corrélation: statistiques suffisantes par lots (parallèle),
+# réutilisées par le rapport final
 numeric_cols = ['Number of Employees Impacted', 'New Roles Created',
                 'Training Hours Provided', 'Productivity Change (%)',
                 'Training_per_Employee', 'New_Roles_Rate']
-correlation_matrix = df_cleaned[numeric_cols].corr()
-
-fig, ax = plt.subplots(figsize=(10, 8))
-sns.heatmap(correlation_matrix, annot=True, fmt='.2f', cmap='coolwarm',
-            center=0, square=True, linewidths=1, cbar_kws={"shrink": 0.8}, ax=ax)
-ax.set_title('Matrice de Corrélation des Variables Numériques', fontsize=14, fontweight='bold')
-plt.tight_layout()
-plt.savefig('07_correlation_matrix.png', dpi=300, bbox_inches='tight')
-print("✓ Graphique sauvegardé: 07_correlation_matrix.png")
-plt.close()
+numeric_stats = NumericStats.from_frame(df_cleaned, numeric_cols)
+correlation_matrix = numeric_stats.corr()
+
+chart_stages = [
+    # (étape, fonction, données, fichier)
+    ('6.1 pays', charts.country_distribution, df_cleaned['Country'].value_counts().head(15),
+     '02_distribution_pays.png'),
+    ('6.2 industrie', charts.industry_distribution, df_cleaned['Industry'].value_counts(),
+     '03_distribution_industrie.png'),
+    ('6.3 outils GenAI', charts.tool_distribution, df_cleaned['GenAI Tool'].value_counts(),
+     '04_distribution_genai_tools.png'),
+    ('6.4 évolution', charts.adoption_trend, df_cleaned['Adoption Year'].value_counts().sort_index(),
+     '05_evolution_adoption.png'),
+    ('6.5 productivité', charts.productivity_distribution, df_cleaned['Productivity Change (%)'],
+     '06_analyse_productivite.png'),
+    ('6.6 corrélation', charts.correlation_heatmap, correlation_matrix,
+     '07_correlation_matrix.png'),
+]
+chart_runner = DagRunner()
+for stage, function, data, path in chart_stages:
+    chart_runner.add(stage, function, outputs=[path], executor='process', args=(data, path))
+
+print("\n📊 Création des visualisations (en parallèle)...")
+chart_runner.run()
+for stage, function, data, path in chart_stages:
+    print(f"✓ Graphique sauvegardé: {path}")
+print("\n⏱️  Durées des graphiques:")
+for line in chart_runner.report():
+    print(line)
 
 print("\n" + "="*80)
 print("ÉTAPE 7: RÉSUMÉ FINAL ET EXPORT")
@@ -376,9 +324,12 @@ Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
 2. NETTOYAGE EFFECTUÉ
    - Doublons supprimés: {duplicates}
-   - Valeurs aberrantes filtrées: {filtered_count}
+   - Valeurs aberrantes filtrées: {filtered_count} (quarantaine: {REJECT_FILE})
    - Valeurs manquantes traitées: {missing_df['Valeurs_Manquantes'].sum() if len(missing_df) > 0 else 0}
 
+   - Violations par règle de qualité:
+{chr(10).join(quality_rules.report())}
+
 3. DONNÉES FINALES
    - Nombre de lignes: {len(df_cleaned):,}
    - Nombre de colonnes: {len(df_cleaned.columns)}
@@ -400,13 +351,14 @@ Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
    - Années d'adoption: {df_cleaned['Adoption Year'].min()} - {df_cleaned['Adoption Year'].max()}
 
 6. STATISTIQUES PRINCIPALES
-   - Employés impactés (moyenne): {df_cleaned['Number of Employees Impacted'].mean():,.0f}
-   - Nouveaux rôles créés (moyenne): {df_cleaned['New Roles Created'].mean():.2f}
-   - Heures de formation (moyenne): {df_cleaned['Training Hours Provided'].mean():,.0f}h
-   - Changement productivité (moyenne): {df_cleaned['Productivity Change (%)'].mean():.2f}%
+   - Employés impactés (moyenne): {numeric_stats.mean()['Number of Employees Impacted']:,.0f}
+   - Nouveaux rôles créés (moyenne): {numeric_stats.mean()['New Roles Created']:.2f}
+   - Heures de formation (moyenne): {numeric_stats.mean()['Training Hours Provided']:,.0f}h
+   - Changement productivité (moyenne): {numeric_stats.mean()['Productivity Change (%)']:.2f}%
 
 7. FICHIERS GÉNÉRÉS
    - donnees_genai_nettoyees.csv
+   - {REJECT_FILE}
    - 01_valeurs_manquantes_genai.png (si applicable)
    - 02_distribution_pays.png
    - 03_distribution_industrie.png
@@ -425,12 +377,24 @@ with open('rapport_nettoyage_genai.txt', 'w', encoding='utf-8') as f:
 print(rapport)
 print("✅ Rapport de nettoyage sauvegardé: rapport_nettoyage_genai.txt")
 
+# Instantané des sorties (snapshot_store): Parquet zstd par année, parties inchangées partagées
+try:
+    from snapshot_store import SnapshotStore
+
+    snapshot = SnapshotStore().save()
+    print(f"✅ Instantané archivé: {snapshot['id']} ({snapshot['objets_nouveaux']} objets écrits, "
+          f"{snapshot['objets_partages']} déjà archivés)")
+except ImportError:
+    print("⚠️  pyarrow non installé: instantané du nettoyage non archivé")
+
 print("\n" + "="*80)
 print(" 🎉 NETTOYAGE TERMINÉ AVEC SUCCÈS! ".center(80, "="))
 print("="*80)
 print("\nFichiers générés:")
 print("  1. donnees_genai_nettoyees.csv - Données prêtes pour le Data Warehouse")
 print("  2. rapport_nettoyage_genai.txt - Rapport détaillé")
-print("  3. Graphiques d'analyse exploratoire (7 fichiers PNG)")
+print(f"  3. {REJECT_FILE} - Lignes en quarantaine (règles violées)")
+print("  4. Graphiques d'analyse exploratoire (7 fichiers PNG)")
+print("  5. snapshots_genai/ - Instantané archivé des sorties (Parquet zstd, manifeste)")
 print("\n➡️  Prochaine étape: Créer le Data Warehouse avec modèle en étoile")
 print("="*80)
@@ -7,37 +7,86 @@ Modèle en Étoile (Star Schema)
 Réalisé avec ❤️ par: ASMA & MONIA
 Module: Data Analytics & Business Intelligence
 5ème année - Ingénierie Informatique
+
+Usage:
+    python 02_ETL_DataWarehouse_GenAI.py                  # chargement séquentiel
+    python 02_ETL_DataWarehouse_GenAI.py --mode pipeline  # lecture/transformation/écriture en parallèle
+    python 02_ETL_DataWarehouse_GenAI.py --mode shards    # shards SQLite chargés en parallèle puis fusionnés
+    python 02_ETL_DataWarehouse_GenAI.py --no-charts --no-cube   # chargement seul, démarrage rapide
+    python 02_ETL_DataWarehouse_GenAI.py --resume         # reprise après le dernier lot validé
 """
 
+import argparse
 import pandas as pd
 import sqlite3
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
-# Configuration
-plt.style.use('seaborn-v0_8-darkgrid')
-sns.set_palette("husl")
+from etl_core import (EXPORT_QUERY, STATISTICS_QUERIES, LoadCheckpoint, create_schema, enrich_dimensions,
+                      load_facts, next_adoption_id, next_company_id)
+from reference_data import KeyRegistry, register_members, seed_dimensions
+
+parser = argparse.ArgumentParser(description="ETL et Data Warehouse GenAI")
+parser.add_argument('--mode', choices=['sequentiel', 'pipeline', 'shards'], default='sequentiel',
+                    help="sequentiel: chargement complet en mémoire; "
+                         "pipeline: lecteur, pool de transformation et écrivain SQLite concurrents; "
+                         "shards: faits partitionnés chargés par des processus parallèles puis fusionnés")
+parser.add_argument('--chunksize', type=int, default=50_000,
+                    help="Taille des lots lus en mode pipeline")
+parser.add_argument('--workers', type=int, default=None,
+                    help="Nombre de threads de transformation en mode pipeline")
+parser.add_argument('--resume', action='store_true',
+                    help="Reprendre le dernier chargement interrompu du même fichier source "
+                         "après son dernier lot validé (ETL_BATCH_LOG), modes sequentiel et pipeline")
+parser.add_argument('--fact-store', action='store_true',
+                    help="Ajouter les faits chargés au stockage colonnaire mappé en mémoire "
+                         "(fact_store_genai/), source de l'export et des graphiques")
+parser.add_argument('--sentiment-dim', action='store_true',
+                    help="Stocker chaque phrase de sentiment une seule fois (DIM_SENTIMENT_TEXT): "
+                         "FAIT_ADOPTION ne porte plus que la clé entière")
+parser.add_argument('--export-pages', action='store_true',
+                    help="Écrire aussi un extrait réduit par page du rapport Power BI (exports_powerbi/)")
+parser.add_argument('--no-cube', action='store_true',
+                    help="Ne pas construire le cube OLAP des KPIs (étape 8)")
+parser.add_argument('--no-aggregates', action='store_true',
+                    help="Ne pas (re)calculer les agrégats matérialisés (couche sémantique, "
+                         "série annuelle des KPIs) à l'étape 8")
+parser.add_argument('--no-charts', action='store_true',
+                    help="Ne pas produire les graphiques (étape 9): matplotlib n'est jamais importé")
+parser.add_argument('--shard-by', choices=['region', 'hash'], default='region',
+                    help="Partitionnement des faits en mode shards")
+parser.add_argument('--shards', type=int, default=None,
+                    help="Nombre de shards pour --shard-by hash (défaut: nombre de cœurs)")
+parser.add_argument('--shards-dir', default='shards_genai',
+                    help="Répertoire des fichiers shards SQLite")
+args = parser.parse_args()
+if args.resume and args.mode == 'shards':
+    parser.error("--resume n'est disponible qu'en modes sequentiel et pipeline")
 
 print("="*80)
 print(" PROJET BI - ETL ET DATA WAREHOUSE GENAI ".center(80, "="))
 print("="*80)
 
+input_file = 'donnees_genai_nettoyees.csv'
+
 # ==================================================================================
 # ÉTAPE 1: EXTRACTION DES DONNÉES
 # ==================================================================================
 print("\n[ÉTAPE 1] EXTRACTION DES DONNÉES")
 print("-" * 80)
 
-# Charger les données nettoyées
-df = pd.read_csv('donnees_genai_nettoyees.csv')
-print(f"✓ Données chargées: {df.shape[0]:,} lignes, {df.shape[1]} colonnes")
+if args.mode == 'pipeline':
+    # Les données sont lues par lots pendant le chargement (étape 6)
+    print(f"✓ Mode pipeline: {input_file} sera lu par lots de {args.chunksize:,} lignes")
+else:
+    # Charger les données nettoyées
+    df = pd.read_csv(input_file)
+    print(f"✓ Données chargées: {df.shape[0]:,} lignes, {df.shape[1]} colonnes")
 
-# Sauvegarde des données brutes
-df_original = df.copy()
+    # Sauvegarde des données brutes
+    df_original = df.copy()
 
 # ==================================================================================
 # ÉTAPE 2: CONCEPTION DU MODÈLE EN ÉTOILE
@@ -108,177 +157,38 @@ print("-" * 80)
 # Connexion à la base de données SQLite
 db_path = 'datawarehouse_genai.db'
 conn = sqlite3.connect(db_path)
+# Journal WAL: les lecteurs (Power BI, query_service.py) ne sont pas bloqués pendant le chargement
+conn.execute("PRAGMA journal_mode = WAL")
 cursor = conn.cursor()
 print(f"✓ Connexion à la base de données établie: {db_path}")
 
-# 3.1 Table de dimension: DIM_COMPANY
-print("\n3.1 Création de DIM_COMPANY:")
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS DIM_COMPANY (
-    Company_ID INTEGER PRIMARY KEY AUTOINCREMENT,
-    Company_Name TEXT NOT NULL,
-    Company_Size TEXT,
-    Employees_Impacted_Category TEXT
-)
-''')
-conn.commit()
-print("  ✓ Table DIM_COMPANY créée")
-
-# 3.2 Table de dimension: DIM_GEOGRAPHY
-print("\n3.2 Création de DIM_GEOGRAPHY:")
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS DIM_GEOGRAPHY (
-    Geography_ID INTEGER PRIMARY KEY AUTOINCREMENT,
-    Country TEXT NOT NULL,
-    Region TEXT
-)
-''')
-conn.commit()
-print("  ✓ Table DIM_GEOGRAPHY créée")
-
-# 3.3 Table de dimension: DIM_INDUSTRY
-print("\n3.3 Création de DIM_INDUSTRY:")
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS DIM_INDUSTRY (
-    Industry_ID INTEGER PRIMARY KEY AUTOINCREMENT,
-    Industry_Name TEXT NOT NULL UNIQUE,
-    Sector_Type TEXT
-)
-''')
+# Tables de dimensions (DIM_*) et table de faits (FAIT_ADOPTION)
+for table in create_schema(cursor):
+    print(f"  ✓ Table {table} créée")
 conn.commit()
-print("  ✓ Table DIM_INDUSTRY créée")
-
-# 3.4 Table de dimension: DIM_GENAI_TOOL
-print("\n3.4 Création de DIM_GENAI_TOOL:")
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS DIM_GENAI_TOOL (
-    GenAI_Tool_ID INTEGER PRIMARY KEY AUTOINCREMENT,
-    Tool_Name TEXT NOT NULL UNIQUE,
-    Tool_Category TEXT,
-    Tool_Provider TEXT
-)
-''')
-conn.commit()
-print("  ✓ Table DIM_GENAI_TOOL créée")
-
-# 3.5 Table de faits: FAIT_ADOPTION
-print("\n3.5 Création de FAIT_ADOPTION:")
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS FAIT_ADOPTION (
-    Adoption_ID INTEGER PRIMARY KEY AUTOINCREMENT,
-    Company_ID INTEGER,
-    Geography_ID INTEGER,
-    Industry_ID INTEGER,
-    GenAI_Tool_ID INTEGER,
-    Adoption_Year INTEGER,
-    Adoption_Phase TEXT,
-    Employees_Impacted INTEGER,
-    New_Roles_Created INTEGER,
-    Training_Hours INTEGER,
-    Productivity_Change REAL,
-    Productivity_Impact TEXT,
-    Training_per_Employee REAL,
-    New_Roles_Rate REAL,
-    Sentiment_Category TEXT,
-    Employee_Sentiment TEXT,
-    FOREIGN KEY (Company_ID) REFERENCES DIM_COMPANY(Company_ID),
-    FOREIGN KEY (Geography_ID) REFERENCES DIM_GEOGRAPHY(Geography_ID),
-    FOREIGN KEY (Industry_ID) REFERENCES DIM_INDUSTRY(Industry_ID),
-    FOREIGN KEY (GenAI_Tool_ID) REFERENCES DIM_GENAI_TOOL(GenAI_Tool_ID)
-)
-''')
-conn.commit()
-print("  ✓ Table FAIT_ADOPTION créée")
 
 # ==================================================================================
-# ÉTAPE 4: PRÉPARATION DES DIMENSIONS (TRANSFORMATION)
+# ÉTAPE 4: PRÉPARATION DES DIMENSIONS (RÉFÉRENTIEL)
 # ==================================================================================
 print("\n[ÉTAPE 4] PRÉPARATION DES DIMENSIONS")
 print("-" * 80)
 
-# 4.1 Mapping des régions géographiques
-def get_region(country):
-    """Mapper les pays vers des régions géographiques"""
-    regions = {
-        'USA': 'Amérique du Nord',
-        'Canada': 'Amérique du Nord',
-        'Brazil': 'Amérique du Sud',
-        'UK': 'Europe',
-        'Germany': 'Europe',
-        'France': 'Europe',
-        'Switzerland': 'Europe',
-        'South Africa': 'Afrique',
-        'UAE': 'Moyen-Orient',
-        'India': 'Asie',
-        'Singapore': 'Asie',
-        'Japan': 'Asie',
-        'South Korea': 'Asie',
-        'Australia': 'Océanie'
-    }
-    return regions.get(country, 'Autre')
-
-df['Region'] = df['Country'].apply(get_region)
-
-# 4.2 Catégorisation des secteurs
-def get_sector_type(industry):
-    """Mapper les industries vers des types de secteurs"""
-    sectors = {
-        'Technology': 'Tech & Digital',
-        'Healthcare': 'Services Essentiels',
-        'Finance': 'Finance & Assurance',
-        'Retail': 'Commerce & Distribution',
-        'Manufacturing': 'Production & Industrie',
-        'Education': 'Services Publics',
-        'Transportation': 'Transport & Logistique',
-        'Telecom': 'Tech & Digital',
-        'Hospitality': 'Services & Loisirs',
-        'Entertainment': 'Services & Loisirs',
-        'Legal Services': 'Services Professionnels',
-        'Advertising': 'Services Professionnels',
-        'Utilities': 'Services Essentiels',
-        'Defense': 'Défense & Sécurité'
-    }
-    return sectors.get(industry, 'Autre')
-
-df['Sector_Type'] = df['Industry'].apply(get_sector_type)
-
-# 4.3 Catégorisation des outils GenAI
-def get_tool_category(tool):
-    """Catégoriser les outils GenAI"""
-    if tool in ['ChatGPT', 'GPT-4']:
-        return 'LLM - OpenAI'
-    elif tool == 'Claude':
-        return 'LLM - Anthropic'
-    elif tool == 'Gemini':
-        return 'LLM - Google'
-    elif tool == 'LLaMA':
-        return 'LLM - Meta'
-    elif tool == 'Mixtral':
-        return 'LLM - Mistral'
-    elif tool == 'Groq':
-        return 'Infrastructure AI'
-    else:
-        return 'Autre'
-
-def get_tool_provider(tool):
-    """Identifier le fournisseur de l'outil"""
-    providers = {
-        'ChatGPT': 'OpenAI',
-        'Claude': 'Anthropic',
-        'Gemini': 'Google',
-        'LLaMA': 'Meta',
-        'Mixtral': 'Mistral AI',
-        'Groq': 'Groq Inc'
-    }
-    return providers.get(tool, 'Inconnu')
-
-df['Tool_Category'] = df['GenAI Tool'].apply(get_tool_category)
-df['Tool_Provider'] = df['GenAI Tool'].apply(get_tool_provider)
-
-print("✓ Enrichissement des données terminé")
-print(f"  - Régions géographiques: {df['Region'].nunique()}")
-print(f"  - Types de secteurs: {df['Sector_Type'].nunique()}")
-print(f"  - Catégories d'outils: {df['Tool_Category'].nunique()}")
+# Pays, industries et outils GenAI proviennent du référentiel versionné
+# (referentiel/*.csv) avec des clés de substitution stables
+registry = KeyRegistry.load()
+print(f"✓ Référentiel chargé (version {registry.version}):")
+print(f"  - Pays: {len(registry.geography_mapping)}")
+print(f"  - Industries: {len(registry.industry_mapping)}")
+print(f"  - Outils GenAI: {len(registry.tool_mapping)}")
+
+if args.mode != 'pipeline':
+    # Régions géographiques, types de secteurs, catégories et fournisseurs d'outils
+    df = enrich_dimensions(df, registry)
+
+    print("✓ Enrichissement des données terminé")
+    print(f"  - Régions géographiques: {df['Region'].nunique()}")
+    print(f"  - Types de secteurs: {df['Sector_Type'].nunique()}")
+    print(f"  - Catégories d'outils: {df['Tool_Category'].nunique()}")
 
 # ==================================================================================
 # ÉTAPE 5: CHARGEMENT DES DIMENSIONS (LOADING)
@@ -286,53 +196,18 @@ print(f"  - Catégories d'outils: {df['Tool_Category'].nunique()}")
 print("\n[ÉTAPE 5] CHARGEMENT DES DIMENSIONS")
 print("-" * 80)
 
-# 5.1 Chargement DIM_GEOGRAPHY
-print("\n5.1 Chargement de DIM_GEOGRAPHY:")
-geography_dim = df[['Country', 'Region']].drop_duplicates().reset_index(drop=True)
-geography_mapping = {}
-
-for idx, row in geography_dim.iterrows():
-    cursor.execute('''
-    INSERT INTO DIM_GEOGRAPHY (Country, Region)
-    VALUES (?, ?)
-    ''', (row['Country'], row['Region']))
-    geography_id = cursor.lastrowid
-    geography_mapping[row['Country']] = geography_id
-
-conn.commit()
-print(f"  ✓ {len(geography_dim)} pays chargés")
-
-# 5.2 Chargement DIM_INDUSTRY
-print("\n5.2 Chargement de DIM_INDUSTRY:")
-industry_dim = df[['Industry', 'Sector_Type']].drop_duplicates().reset_index(drop=True)
-industry_mapping = {}
-
-for idx, row in industry_dim.iterrows():
-    cursor.execute('''
-    INSERT INTO DIM_INDUSTRY (Industry_Name, Sector_Type)
-    VALUES (?, ?)
-    ''', (row['Industry'], row['Sector_Type']))
-    industry_id = cursor.lastrowid
-    industry_mapping[row['Industry']] = industry_id
-
-conn.commit()
-print(f"  ✓ {len(industry_dim)} industries chargées")
+# Nouvelle version du référentiel: attributs (et membres rattachés) modifiés
+dimensions_reseeded = seed_dimensions(conn, registry)
+if dimensions_reseeded:
+    for table, rows in registry.tables.items():
+        print(f"  ✓ {table}: {len(rows)} membres chargés depuis le référentiel")
+else:
+    print(f"  ✓ Dimensions déjà à jour (référentiel version {registry.version})")
 
-# 5.3 Chargement DIM_GENAI_TOOL
-print("\n5.3 Chargement de DIM_GENAI_TOOL:")
-tool_dim = df[['GenAI Tool', 'Tool_Category', 'Tool_Provider']].drop_duplicates().reset_index(drop=True)
-tool_mapping = {}
-
-for idx, row in tool_dim.iterrows():
-    cursor.execute('''
-    INSERT INTO DIM_GENAI_TOOL (Tool_Name, Tool_Category, Tool_Provider)
-    VALUES (?, ?, ?)
-    ''', (row['GenAI Tool'], row['Tool_Category'], row['Tool_Provider']))
-    tool_id = cursor.lastrowid
-    tool_mapping[row['GenAI Tool']] = tool_id
-
-conn.commit()
-print(f"  ✓ {len(tool_dim)} outils GenAI chargés")
+# Valeurs absentes du référentiel: membres propres (en mode pipeline, par l'écrivain à chaque lot)
+if args.mode != 'pipeline':
+    for col, values in register_members(conn, registry, df).items():
+        print(f"  ⚠️  {col} absents du référentiel (membres ajoutés): {', '.join(map(str, values))}")
 
 # ==================================================================================
 # ÉTAPE 6: CHARGEMENT DE LA TABLE DE FAITS
@@ -340,58 +215,76 @@ print(f"  ✓ {len(tool_dim)} outils GenAI chargés")
 print("\n[ÉTAPE 6] CHARGEMENT DE LA TABLE DE FAITS")
 print("-" * 80)
 
-loaded_count = 0
-error_count = 0
-
-for idx, row in df.iterrows():
-    try:
-        # Insérer dans DIM_COMPANY
-        cursor.execute('''
-        INSERT INTO DIM_COMPANY (Company_Name, Company_Size, Employees_Impacted_Category)
-        VALUES (?, ?, ?)
-        ''', (row['Company Name'], row['Company_Size'], row['Company_Size']))
-        company_id = cursor.lastrowid
-
-        # Récupérer les IDs des dimensions
-        geography_id = geography_mapping.get(row['Country'])
-        industry_id = industry_mapping.get(row['Industry'])
-        tool_id = tool_mapping.get(row['GenAI Tool'])
-
-        # Insérer dans FAIT_ADOPTION
-        cursor.execute('''
-        INSERT INTO FAIT_ADOPTION (
-            Company_ID, Geography_ID, Industry_ID, GenAI_Tool_ID,
-            Adoption_Year, Adoption_Phase,
-            Employees_Impacted, New_Roles_Created, Training_Hours,
-            Productivity_Change, Productivity_Impact,
-            Training_per_Employee, New_Roles_Rate,
-            Sentiment_Category, Employee_Sentiment
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            company_id, geography_id, industry_id, tool_id,
-            int(row['Adoption Year']), row['Adoption_Phase'],
-            int(row['Number of Employees Impacted']), int(row['New Roles Created']),
-            int(row['Training Hours Provided']),
-            float(row['Productivity Change (%)']), row['Productivity_Impact'],
-            float(row['Training_per_Employee']), float(row['New_Roles_Rate']),
-            row['Sentiment_Category'], row['Employee Sentiment']
-        ))
-
-        loaded_count += 1
-        if loaded_count % 10000 == 0:
-            conn.commit()
-            print(f"  ✓ {loaded_count:,} enregistrements chargés...")
-
-    except Exception as e:
-        error_count += 1
-        if error_count <= 5:  # Afficher seulement les 5 premières erreurs
-            print(f"  ✗ Erreur ligne {idx}: {e}")
-        continue
-
-conn.commit()
-print(f"\n✓ Chargement terminé: {loaded_count:,} enregistrements insérés")
-if error_count > 0:
-    print(f"⚠️  {error_count} erreurs rencontrées")
+# Journal des lots (ETL_BATCH_LOG): reprise du dernier chargement avec --resume
+# (en mode shards, le chargement est inscrit en un seul lot après la fusion)
+if not args.resume:
+    for load_id, source, batches, rows in LoadCheckpoint.interrupted(conn):
+        print(f"⚠️  Chargement {load_id} ({source}) interrompu après {batches} lots "
+              f"({rows:,} lignes): relancer avec --resume pour le reprendre")
+checkpoint = LoadCheckpoint.open(conn, input_file, args.mode, resume=args.resume)
+if args.resume:
+    print(f"✓ Reprise du chargement {checkpoint.load_id}: {checkpoint.batch_no} lots validés, "
+          f"{checkpoint.offset:,} lignes source déjà chargées")
+    if args.mode == 'sequentiel':
+        df = df.iloc[checkpoint.offset:]
+
+# Identifiants attribués par ce chargement (stockage colonnaire)
+first_company_id = next_company_id(cursor)
+first_adoption_id = next_adoption_id(cursor)
+loaded_frames = [] if args.fact_store else None
+
+if args.mode == 'pipeline':
+    from etl_pipeline import run_pipeline
+
+    # Lecture, enrichissement et écriture concurrents
+    pipeline_stats = run_pipeline(input_file, db_path, chunksize=args.chunksize,
+                                  workers=args.workers, registry=registry,
+                                  sentiment_dim=args.sentiment_dim, checkpoint=checkpoint,
+                                  frames=loaded_frames)
+    print(f"\n✓ Chargement terminé: {pipeline_stats['lignes']:,} enregistrements insérés "
+          f"en {pipeline_stats['lots']} lots ({pipeline_stats['total_s']:.1f}s, "
+          f"dont écriture SQLite {pipeline_stats['ecriture_s']:.1f}s)")
+    if pipeline_stats['rejets'] > 0:
+        print(f"⚠️  {pipeline_stats['rejets']} erreurs rencontrées")
+elif args.mode == 'shards':
+    from etl_shards import run_sharded_load
+
+    shard_stats, shard_paths = run_sharded_load(conn, df, n_shards=args.shards,
+                                                by=args.shard_by, workdir=args.shards_dir,
+                                                registry=registry, sentiment_dim=args.sentiment_dim,
+                                                checkpoint=checkpoint)
+    print(f"\n✓ {shard_stats['shards']} shards chargés en parallèle "
+          f"({shard_stats['chargement_s']:.1f}s) dans {args.shards_dir}/")
+    print(f"✓ Fusion terminée: {shard_stats['fusionnees']:,} enregistrements insérés "
+          f"({shard_stats['total_s']:.1f}s au total)")
+    if shard_stats['rejets'] > 0:
+        print(f"⚠️  {shard_stats['rejets']} erreurs rencontrées (valeurs numériques invalides)")
+else:
+    loaded_count, error_count = load_facts(conn, df, *registry.mappings,
+                                           sentiment_dim=args.sentiment_dim, checkpoint=checkpoint)
+    print(f"\n✓ Chargement terminé: {loaded_count:,} enregistrements insérés")
+    if error_count > 0:
+        print(f"⚠️  {error_count} erreurs rencontrées")
+
+total_loaded = checkpoint.finish(conn)
+print(f"✓ Chargement {checkpoint.load_id} terminé: {checkpoint.batch_no} lots, "
+      f"{total_loaded:,} enregistrements (ETL_BATCH_LOG)")
+
+# Stockage colonnaire mappé en mémoire (lu sans copie par l'export et les graphiques):
+# faits du chargement convertis depuis la trame chargée, ajoutés au stockage existant
+fact_store = None
+if args.fact_store:
+    from fact_store import FACT_STORE_DIR, FactStore, write_fact_store
+
+    if args.mode == 'pipeline':
+        # Lots chargés par l'écrivain, indexés par Company_ID
+        loaded_df = pd.concat(loaded_frames) if loaded_frames else pd.DataFrame()
+    else:
+        # Company_ID positionnels (lignes rejetées comprises)
+        loaded_df = df.set_axis(np.arange(first_company_id, first_company_id + len(df)))
+    write_fact_store(conn, loaded_df, first_adoption_id, registry, FACT_STORE_DIR)
+    fact_store = FactStore(FACT_STORE_DIR)
+    print(f"\n✓ Stockage colonnaire écrit: {FACT_STORE_DIR}/ ({len(fact_store):,} faits)")
 
 # ==================================================================================
 # ÉTAPE 7: VALIDATION ET STATISTIQUES DU DATA WAREHOUSE
@@ -401,6 +294,8 @@ print("-" * 80)
 
 # Compter les enregistrements dans chaque table
 tables = ['DIM_COMPANY', 'DIM_GEOGRAPHY', 'DIM_INDUSTRY', 'DIM_GENAI_TOOL', 'FAIT_ADOPTION']
+if args.sentiment_dim:
+    tables.insert(4, 'DIM_SENTIMENT_TEXT')
 print("\nNombre d'enregistrements par table:")
 for table in tables:
     cursor.execute(f"SELECT COUNT(*) FROM {table}")
@@ -414,66 +309,31 @@ print("="*80)
 
 # Par géographie
 print("\n📊 TOP 10 PAYS PAR NOMBRE D'ADOPTIONS:")
-cursor.execute("""
-SELECT g.Country, COUNT(*) as Nombre_Adoptions
-FROM FAIT_ADOPTION f
-JOIN DIM_GEOGRAPHY g ON f.Geography_ID = g.Geography_ID
-GROUP BY g.Country
-ORDER BY Nombre_Adoptions DESC
-LIMIT 10
-""")
+cursor.execute(STATISTICS_QUERIES['top_pays'] + "LIMIT 10")
 for row in cursor.fetchall():
     print(f"  • {row[0]}: {row[1]:,} entreprises")
 
 # Par industrie
 print("\n📊 RÉPARTITION PAR SECTEUR:")
-cursor.execute("""
-SELECT i.Sector_Type, COUNT(*) as Nombre
-FROM FAIT_ADOPTION f
-JOIN DIM_INDUSTRY i ON f.Industry_ID = i.Industry_ID
-GROUP BY i.Sector_Type
-ORDER BY Nombre DESC
-""")
+cursor.execute(STATISTICS_QUERIES['secteurs'])
 for row in cursor.fetchall():
     print(f"  • {row[0]}: {row[1]:,} entreprises")
 
 # Par outil GenAI
 print("\n📊 POPULARITÉ DES OUTILS GENAI:")
-cursor.execute("""
-SELECT t.Tool_Name, t.Tool_Provider, COUNT(*) as Nombre_Utilisations
-FROM FAIT_ADOPTION f
-JOIN DIM_GENAI_TOOL t ON f.GenAI_Tool_ID = t.GenAI_Tool_ID
-GROUP BY t.Tool_Name, t.Tool_Provider
-ORDER BY Nombre_Utilisations DESC
-""")
+cursor.execute(STATISTICS_QUERIES['outils'])
 for row in cursor.fetchall():
     print(f"  • {row[0]} ({row[1]}): {row[2]:,} entreprises")
 
 # Par année
 print("\n📊 ÉVOLUTION DE L'ADOPTION PAR ANNÉE:")
-cursor.execute("""
-SELECT Adoption_Year, COUNT(*) as Nombre,
-       ROUND(AVG(Productivity_Change), 2) as Productivite_Moyenne
-FROM FAIT_ADOPTION
-GROUP BY Adoption_Year
-ORDER BY Adoption_Year
-""")
+cursor.execute(STATISTICS_QUERIES['annees'])
 for row in cursor.fetchall():
     print(f"  • {row[0]}: {row[1]:,} entreprises (Productivité moyenne: +{row[2]}%)")
 
 # Statistiques globales
 print("\n📊 STATISTIQUES GLOBALES:")
-cursor.execute("""
-SELECT
-    COUNT(*) as Total_Entreprises,
-    SUM(Employees_Impacted) as Total_Employes,
-    AVG(Employees_Impacted) as Moy_Employes,
-    SUM(New_Roles_Created) as Total_Nouveaux_Roles,
-    AVG(New_Roles_Created) as Moy_Nouveaux_Roles,
-    AVG(Productivity_Change) as Moy_Productivite,
-    AVG(Training_per_Employee) as Moy_Formation_Par_Employe
-FROM FAIT_ADOPTION
-""")
+cursor.execute(STATISTICS_QUERIES['globales'])
 stats = cursor.fetchone()
 print(f"  • Total entreprises: {stats[0]:,}")
 print(f"  • Total employés impactés: {stats[1]:,}")
@@ -485,143 +345,216 @@ print(f"  • Formation moyenne par employé: {stats[6]:.2f}h")
 
 # Sentiment des employés
 print("\n📊 SENTIMENT DES EMPLOYÉS:")
-cursor.execute("""
-SELECT Sentiment_Category, COUNT(*) as Nombre,
-       ROUND(COUNT(*) * 100.0 / (SELECT COUNT(*) FROM FAIT_ADOPTION), 1) as Pourcentage
-FROM FAIT_ADOPTION
-GROUP BY Sentiment_Category
-ORDER BY Nombre DESC
-""")
+cursor.execute(STATISTICS_QUERIES['sentiment'])
 for row in cursor.fetchall():
     print(f"  • {row[0]}: {row[1]:,} entreprises ({row[2]}%)")
 
 # ==================================================================================
-# ÉTAPE 8: EXPORT POUR POWER BI
+# ÉTAPES 8 ET 9: EXPORT, VUES, AGRÉGATS ET GRAPHIQUES (DAG)
 # ==================================================================================
-print("\n[ÉTAPE 8] EXPORT POUR POWER BI")
-print("-" * 80)
-
-# Créer une vue complète pour Power BI
-query = """
-SELECT
-    f.Adoption_ID,
-    c.Company_Name,
-    c.Company_Size,
-    g.Country,
-    g.Region,
-    i.Industry_Name,
-    i.Sector_Type,
-    t.Tool_Name as GenAI_Tool,
-    t.Tool_Category,
-    t.Tool_Provider,
-    f.Adoption_Year,
-    f.Adoption_Phase,
-    f.Employees_Impacted,
-    f.New_Roles_Created,
-    f.Training_Hours,
-    f.Productivity_Change,
-    f.Productivity_Impact,
-    f.Training_per_Employee,
-    f.New_Roles_Rate,
-    f.Sentiment_Category,
-    f.Employee_Sentiment
-FROM FAIT_ADOPTION f
-LEFT JOIN DIM_COMPANY c ON f.Company_ID = c.Company_ID
-LEFT JOIN DIM_GEOGRAPHY g ON f.Geography_ID = g.Geography_ID
-LEFT JOIN DIM_INDUSTRY i ON f.Industry_ID = i.Industry_ID
-LEFT JOIN DIM_GENAI_TOOL t ON f.GenAI_Tool_ID = t.GenAI_Tool_ID
-"""
+# Étapes indépendantes exécutées en parallèle selon leurs dépendances de données
+# (dag_runner): chacune ouvre sa propre connexion; les écritures SQLite passent
+# par une seule ressource 'sqlite_writer', les lectures (journal WAL) ne sont pas bloquées.
+# Chaque étape retourne ses lignes de compte rendu, affichées dans l'ordre habituel.
+from dag_runner import DagRunner
 
-df_powerbi = pd.read_sql_query(query, conn)
+conn.commit()
 output_file = 'donnees_powerbi_genai.csv'
-df_powerbi.to_csv(output_file, index=False, encoding='utf-8')
-print(f"✓ Dataset pour Power BI exporté: {output_file} ({len(df_powerbi):,} lignes)")
-
-# Créer aussi des tables agrégées pour faciliter l'analyse
-print("\n✓ Création de tables agrégées:")
-
-# Agrégation par pays
-cursor.execute("""
-CREATE VIEW IF NOT EXISTS VUE_PAYS AS
-SELECT
-    g.Country,
-    g.Region,
-    COUNT(*) as Nombre_Entreprises,
-    SUM(f.Employees_Impacted) as Total_Employes,
-    AVG(f.Productivity_Change) as Productivite_Moyenne,
-    SUM(f.New_Roles_Created) as Total_Nouveaux_Roles
-FROM FAIT_ADOPTION f
-JOIN DIM_GEOGRAPHY g ON f.Geography_ID = g.Geography_ID
-GROUP BY g.Country, g.Region
-""")
-print("  • VUE_PAYS créée")
-
-# Agrégation par industrie
-cursor.execute("""
-CREATE VIEW IF NOT EXISTS VUE_INDUSTRIE AS
-SELECT
-    i.Industry_Name,
-    i.Sector_Type,
-    COUNT(*) as Nombre_Entreprises,
-    AVG(f.Productivity_Change) as Productivite_Moyenne,
-    AVG(f.Training_per_Employee) as Formation_Moyenne
-FROM FAIT_ADOPTION f
-JOIN DIM_INDUSTRY i ON f.Industry_ID = i.Industry_ID
-GROUP BY i.Industry_Name, i.Sector_Type
-""")
-print("  • VUE_INDUSTRIE créée")
-
-# Agrégation par outil
-cursor.execute("""
-CREATE VIEW IF NOT EXISTS VUE_GENAI_TOOL AS
-SELECT
-    t.Tool_Name,
-    t.Tool_Provider,
-    COUNT(*) as Nombre_Utilisations,
-    AVG(f.Productivity_Change) as Productivite_Moyenne,
-    AVG(f.Employees_Impacted) as Employes_Moyens
-FROM FAIT_ADOPTION f
-JOIN DIM_GENAI_TOOL t ON f.GenAI_Tool_ID = t.GenAI_Tool_ID
-GROUP BY t.Tool_Name, t.Tool_Provider
-""")
-print("  • VUE_GENAI_TOOL créée")
+kpi_file = 'kpis_annuels_genai.csv'
+cube_file = 'cube_kpis_genai.parquet'
 
-conn.commit()
 
-# ==================================================================================
-# ÉTAPE 9: CRÉATION DE GRAPHIQUES D'ANALYSE
-# ==================================================================================
+def stage_export():
+    """Vue complète des faits pour Power BI (etl_core.EXPORT_QUERY) et extraits par page"""
+    stage_conn = sqlite3.connect(db_path)
+    try:
+        if fact_store is not None:
+            # Même contenu que la requête, lu depuis le stockage colonnaire
+            df_powerbi = fact_store.to_frame()
+        else:
+            df_powerbi = pd.read_sql_query(EXPORT_QUERY, stage_conn)
+        df_powerbi.to_csv(output_file, index=False, encoding='utf-8')
+        lines = [f"✓ Dataset pour Power BI exporté: {output_file} ({len(df_powerbi):,} lignes)"]
+
+        # Extraits réduits par page du rapport (colonnes utiles seulement, cf. referentiel/pages_powerbi.json)
+        if args.export_pages:
+            from powerbi_export import export_pages
+
+            for page, (path, rows, cols) in export_pages(stage_conn).items():
+                lines.append(f"  ✓ Page {page}: {path} ({rows:,} lignes × {cols} colonnes)")
+        return lines
+    finally:
+        stage_conn.close()
+
+
+def stage_views():
+    """Créer aussi des vues agrégées pour faciliter l'analyse"""
+    stage_conn = sqlite3.connect(db_path)
+    try:
+        # Agrégation par pays
+        stage_conn.execute("""
+        CREATE VIEW IF NOT EXISTS VUE_PAYS AS
+        SELECT
+            g.Country,
+            g.Region,
+            COUNT(*) as Nombre_Entreprises,
+            SUM(f.Employees_Impacted) as Total_Employes,
+            AVG(f.Productivity_Change) as Productivite_Moyenne,
+            SUM(f.New_Roles_Created) as Total_Nouveaux_Roles
+        FROM FAIT_ADOPTION f
+        JOIN DIM_GEOGRAPHY g ON f.Geography_ID = g.Geography_ID
+        GROUP BY g.Country, g.Region
+        """)
+
+        # Agrégation par industrie
+        stage_conn.execute("""
+        CREATE VIEW IF NOT EXISTS VUE_INDUSTRIE AS
+        SELECT
+            i.Industry_Name,
+            i.Sector_Type,
+            COUNT(*) as Nombre_Entreprises,
+            AVG(f.Productivity_Change) as Productivite_Moyenne,
+            AVG(f.Training_per_Employee) as Formation_Moyenne
+        FROM FAIT_ADOPTION f
+        JOIN DIM_INDUSTRY i ON f.Industry_ID = i.Industry_ID
+        GROUP BY i.Industry_Name, i.Sector_Type
+        """)
+
+        # Agrégation par outil
+        stage_conn.execute("""
+        CREATE VIEW IF NOT EXISTS VUE_GENAI_TOOL AS
+        SELECT
+            t.Tool_Name,
+            t.Tool_Provider,
+            COUNT(*) as Nombre_Utilisations,
+            AVG(f.Productivity_Change) as Productivite_Moyenne,
+            AVG(f.Employees_Impacted) as Employes_Moyens
+        FROM FAIT_ADOPTION f
+        JOIN DIM_GENAI_TOOL t ON f.GenAI_Tool_ID = t.GenAI_Tool_ID
+        GROUP BY t.Tool_Name, t.Tool_Provider
+        """)
+        stage_conn.commit()
+    finally:
+        stage_conn.close()
+    return ["\n✓ Création de tables agrégées:", "  • VUE_PAYS créée", "  • VUE_INDUSTRIE créée",
+            "  • VUE_GENAI_TOOL créée"]
+
+
+def stage_aggregates():
+    """Agrégats matérialisés de la couche sémantique (recalculés à chaque chargement:
+    un agrégat dont le MAX(Adoption_ID) diffère des faits n'est plus utilisé)"""
+    from semantic_layer import SemanticLayer
+
+    stage_conn = sqlite3.connect(db_path)
+    try:
+        refreshed = SemanticLayer(stage_conn).refresh()
+    finally:
+        stage_conn.close()
+    return ["\n✓ Agrégats matérialisés:"] + [f"  • {table}: {lines:,} lignes" for table, lines in refreshed.items()]
+
+
+def stage_kpi_timeseries():
+    """Série annuelle des KPIs (YoY, cumuls): seules les années modifiées sont recalculées
+    (toutes si les dimensions ont été réalimentées)"""
+    from kpi_timeseries import KPI_TABLE, refresh_kpi_timeseries
+
+    stage_conn = sqlite3.connect(db_path)
+    try:
+        start_year, kpi_rows = refresh_kpi_timeseries(stage_conn, full=dimensions_reseeded)
+        pd.read_sql_query(f"SELECT * FROM {KPI_TABLE}", stage_conn).to_csv(kpi_file, index=False, encoding='utf-8')
+    finally:
+        stage_conn.close()
+    if start_year is None:
+        lines = [f"  • {KPI_TABLE}: à jour (aucun fait nouveau)"]
+    else:
+        lines = [f"  • {KPI_TABLE}: {kpi_rows:,} lignes recalculées (années ≥ {start_year})"]
+    return lines + [f"  • Série annuelle exportée pour Power BI: {kpi_file}"]
+
+
+def stage_cube():
+    """Cube OLAP des KPIs (tranches du dashboard sans requête SQLite)"""
+    from olap_cube import OlapCube
+
+    stage_conn = sqlite3.connect(db_path)
+    try:
+        cube = OlapCube.from_warehouse(stage_conn)
+    finally:
+        stage_conn.close()
+    lines = ["\n✓ Construction du cube OLAP des KPIs:", f"  • {cube}"]
+    try:
+        cube.to_parquet(cube_file)
+        lines.append(f"  • Cube sauvegardé: {cube_file}")
+    except ImportError:
+        lines.append("  ⚠️  pyarrow non installé: cube non sauvegardé au format Parquet")
+    return lines
+
+
+def stage_charts():
+    """Graphiques du Data Warehouse (une seule étape: pyplot n'est pas thread-safe)"""
+    # Import différé de matplotlib et seaborn
+    import charts
+
+    stage_conn = sqlite3.connect(db_path)
+    try:
+        # Graphique 1: Top pays
+        if fact_store is not None:
+            df_pays = (fact_store.group_by('Country')
+                       .rename(columns={'Nombre': 'Nombre_Entreprises'})
+                       .sort_values('Nombre_Entreprises', ascending=False).head(15))
+        else:
+            df_pays = pd.read_sql_query("SELECT * FROM VUE_PAYS ORDER BY Nombre_Entreprises DESC LIMIT 15",
+                                        stage_conn)
+
+        # Graphique 2: Par secteur
+        if fact_store is not None:
+            df_secteur = (fact_store.group_by('Sector_Type')
+                          .rename(columns={'Nombre': 'Total'})
+                          .sort_values('Total', ascending=False))
+        else:
+            df_secteur = pd.read_sql_query("""
+            SELECT Sector_Type, SUM(Nombre_Entreprises) as Total
+            FROM VUE_INDUSTRIE
+            GROUP BY Sector_Type
+            ORDER BY Total DESC
+            """, stage_conn)
+    finally:
+        stage_conn.close()
+    return [f"✓ Graphique sauvegardé: {charts.top_countries(df_pays)}",
+            f"✓ Graphique sauvegardé: {charts.sector_share(df_secteur)}"]
+
+
+runner = DagRunner(limits={'sqlite_writer': 1})
+runner.add('8.1 export Power BI', stage_export, outputs=[output_file])
+runner.add('8.2 vues agrégées', stage_views, resources=['sqlite_writer'],
+           outputs=['VUE_PAYS', 'VUE_INDUSTRIE', 'VUE_GENAI_TOOL'])
+if not args.no_aggregates:
+    runner.add('8.3 agrégats', stage_aggregates, resources=['sqlite_writer'], outputs=['AGG_KPI'])
+    runner.add('8.4 série annuelle', stage_kpi_timeseries, resources=['sqlite_writer'],
+               outputs=['KPI_SERIE_ANNUELLE', kpi_file])
+if not args.no_cube:
+    runner.add('8.5 cube OLAP', stage_cube, outputs=[cube_file])
+if not args.no_charts:
+    runner.add('9 graphiques', stage_charts, inputs=['VUE_PAYS', 'VUE_INDUSTRIE'],
+               outputs=['08_dw_top_pays.png', '09_dw_secteurs.png'])
+stage_results = runner.run()
+
+print("\n[ÉTAPE 8] EXPORT POUR POWER BI")
+print("-" * 80)
+for stage in ['8.1 export Power BI', '8.2 vues agrégées', '8.3 agrégats', '8.4 série annuelle', '8.5 cube OLAP']:
+    for line in stage_results.get(stage, []):
+        print(line)
+
 print("\n[ÉTAPE 9] CRÉATION DE GRAPHIQUES D'ANALYSE")
 print("-" * 80)
+if args.no_charts:
+    print("✓ Graphiques désactivés (--no-charts)")
+else:
+    for line in stage_results['9 graphiques']:
+        print(line)
 
-# Graphique 1: Top pays
-df_pays = pd.read_sql_query("SELECT * FROM VUE_PAYS ORDER BY Nombre_Entreprises DESC LIMIT 15", conn)
-fig, ax = plt.subplots(figsize=(12, 6))
-ax.barh(df_pays['Country'], df_pays['Nombre_Entreprises'], color='steelblue')
-ax.set_xlabel('Nombre d\'entreprises')
-ax.set_title('Top 15 Pays - Adoption GenAI', fontsize=14, fontweight='bold')
-ax.invert_yaxis()
-plt.tight_layout()
-plt.savefig('08_dw_top_pays.png', dpi=300, bbox_inches='tight')
-print("✓ Graphique sauvegardé: 08_dw_top_pays.png")
-plt.close()
-
-# Graphique 2: Par secteur
-df_secteur = pd.read_sql_query("""
-SELECT Sector_Type, SUM(Nombre_Entreprises) as Total
-FROM VUE_INDUSTRIE
-GROUP BY Sector_Type
-ORDER BY Total DESC
-""", conn)
-fig, ax = plt.subplots(figsize=(10, 10))
-colors = plt.cm.Set3(range(len(df_secteur)))
-ax.pie(df_secteur['Total'], labels=df_secteur['Sector_Type'], autopct='%1.1f%%',
-       colors=colors, startangle=90)
-ax.set_title('Répartition par Type de Secteur', fontsize=14, fontweight='bold')
-plt.tight_layout()
-plt.savefig('09_dw_secteurs.png', dpi=300, bbox_inches='tight')
-print("✓ Graphique sauvegardé: 09_dw_secteurs.png")
-plt.close()
+print("\n⏱️  Durées des étapes 8 et 9:")
+for line in runner.report():
+    print(line)
 
 # Fermer la connexion
 conn.close()
@@ -633,6 +566,8 @@ print(f"""
 Fichiers générés:
   • {db_path} (Data Warehouse SQLite)
   • {output_file} (Dataset pour Power BI)
+  • {cube_file} (Cube OLAP des KPIs, si pyarrow est installé)
+  • {kpi_file} (Série annuelle des KPIs, sauf --no-aggregates)
   • 08_dw_top_pays.png (Analyse pays)
   • 09_dw_secteurs.png (Analyse secteurs)
 
@@ -640,6 +575,7 @@ Structure du Data Warehouse:
   ✓ 1 Table de faits: FAIT_ADOPTION
   ✓ 4 Tables de dimensions: COMPANY, GEOGRAPHY, INDUSTRY, GENAI_TOOL
   ✓ 3 Vues agrégées: VUE_PAYS, VUE_INDUSTRIE, VUE_GENAI_TOOL
+  ✓ Agrégats matérialisés (sauf --no-aggregates): AGG_KPI, KPI_SERIE_ANNUELLE
 
 Prochaines étapes:
   1. Importer {output_file} dans Power BI Desktop
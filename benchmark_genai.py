@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks du projet BI GenAI
+
+Chaque mesure est affichée puis ajoutée à l'historique (benchmark_genai_historique.csv)
+afin de suivre les régressions d'une version à l'autre.
+
+    imports     temps d'import des modules (python -X importtime, cumulé par module)
+    demarrage   démarrage des scripts: imports de premier niveau de chaque script
+                (hors imports différés dans les étapes), dans un processus neuf
+    statistiques  moyennes, variances et corrélations de colonnes numériques:
+                pandas contre numeric_stats (lots parallèles), résultats comparés
+
+Usage:
+    python benchmark_genai.py                  # tous les benchmarks
+    python benchmark_genai.py imports          # un benchmark
+    python benchmark_genai.py --repetitions 5
+"""
+
+import argparse
+import ast
+import csv
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+HISTORY_FILE = 'benchmark_genai_historique.csv'
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules suivis: dépendances lourdes et modules du projet
+IMPORT_MODULES = [
+    'numpy', 'pandas', 'matplotlib.pyplot', 'seaborn',
+    'reference_data', 'etl_core', 'etl_pipeline', 'etl_shards',
+    'quality_rules', 'sentiment_engine', 'fact_store', 'olap_cube', 'charts',
+    'semantic_layer', 'numeric_stats',
+]
+
+STARTUP_SCRIPTS = ['01_Nettoyage_GenAI.py', '02_ETL_DataWarehouse_GenAI.py']
+
+# Jeu de données synthétique du benchmark statistiques (graine fixe)
+STATS_ROWS = 2_000_000
+STATS_MISSING_RATE = 0.05
+
+
+def parse_importtime(stderr):
+    """Lignes de -X importtime -> {module: (propre µs, cumulé µs)} des imports de premier niveau"""
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        # Les imports imbriqués sont indentés: seul le premier niveau est conservé
+        if name.startswith(' ') and not name.startswith('  '):
+            timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+
+def importtime(args):
+    """Exécuter python -X importtime dans un processus neuf, retourner les temps de premier niveau"""
+    env = dict(os.environ, MPLBACKEND='Agg')
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + args, cwd=PROJECT_DIR,
+                            env=env, capture_output=True, text=True)
+    return parse_importtime(result.stderr)
+
+
+def bench_imports(repetitions):
+    """Temps d'import cumulé de chaque module suivi (ms, médiane)"""
+    results = {}
+    for module in IMPORT_MODULES:
+        samples = []
+        for _ in range(repetitions):
+            timings = importtime(['-c', f'import {module}'])
+            if module not in timings:
+                break  # module non installé
+            samples.append(timings[module][1] / 1000)
+        if samples:
+            results[module] = statistics.median(samples)
+    return results
+
+
+def script_imports(script):
+    """Modules importés au niveau module d'un script (exécutés au démarrage)"""
+    with open(os.path.join(PROJECT_DIR, script), encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            modules.append(node.module)
+    return modules
+
+
+def bench_startup(repetitions):
+    """Temps d'import total de chaque script avant tout traitement (ms, médiane)"""
+    results = {}
+    for script in STARTUP_SCRIPTS:
+        statement = 'import ' + ', '.join(script_imports(script))
+        samples = []
+        for _ in range(repetitions):
+            timings = importtime(['-c', statement])
+            samples.append(sum(cumulative for _, cumulative in timings.values()) / 1000)
+        results[script] = statistics.median(samples)
+    return results
+
+
+def _timed(function, repetitions):
+    """Durée médiane (ms) et résultat de la dernière exécution"""
+    samples = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        result = function()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), result
+
+
+def bench_statistics(repetitions):
+    """Moyennes, variances et corrélations: pandas contre numeric_stats (ms, médiane)
+
+    Mesuré sur des colonnes complètes puis avec STATS_MISSING_RATE de valeurs absentes;
+    les résultats des deux implémentations doivent être égaux.
+    """
+    import numpy as np
+    import pandas as pd
+
+    from numeric_stats import NumericStats
+
+    rng = np.random.default_rng(42)
+    employees = rng.integers(10, 20_000, STATS_ROWS).astype(float)
+    df = pd.DataFrame({
+        'Employees_Impacted': employees,
+        'New_Roles_Created': rng.integers(0, 1_000, STATS_ROWS).astype(float),
+        'Training_Hours': rng.integers(0, 50_000, STATS_ROWS).astype(float),
+        'Productivity_Change': rng.normal(20, 8, STATS_ROWS),
+    })
+    df['Training_per_Employee'] = df['Training_Hours'] / (employees + 1)
+    df['New_Roles_Rate'] = df['New_Roles_Created'] / (employees + 1) * 100
+
+    missing = df.mask(rng.random(df.shape) < STATS_MISSING_RATE)
+    results = {}
+    for label, frame in [('complet', df), ('valeurs_absentes', missing)]:
+        results[f'pandas_{label}'], expected = _timed(
+            lambda: (frame.mean(), frame.var(), frame.corr()), repetitions)
+        results[f'numeric_stats_{label}'], stats = _timed(
+            lambda: NumericStats.from_frame(frame), repetitions)
+        for got, want in zip((stats.mean(), stats.var(), stats.corr()), expected):
+            np.testing.assert_allclose(got, want, rtol=1e-9, atol=1e-12)
+    return results
+
+
+BENCHMARKS = {
+    'imports': bench_imports,
+    'demarrage': bench_startup,
+    'statistiques': bench_statistics,
+}
+
+
+def save_history(benchmark, results, path=HISTORY_FILE):
+    """Ajouter les mesures à l'historique CSV (date, benchmark, mesure, valeur)"""
+    new_file = not os.path.exists(path)
+    date = datetime.now().isoformat(timespec='seconds')
+    with open(path, 'a', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(['Date', 'Benchmark', 'Mesure', 'Valeur_ms'])
+        for name, value in results.items():
+            writer.writerow([date, benchmark, name, f'{value:.1f}'])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmarks du projet BI GenAI")
+    parser.add_argument('benchmarks', nargs='*',
+                        help=f"Benchmarks à exécuter parmi {', '.join(BENCHMARKS)} (défaut: tous)")
+    parser.add_argument('--repetitions', type=int, default=3,
+                        help="Nombre de mesures par élément (la médiane est retenue)")
+    parser.add_argument('--historique', default=HISTORY_FILE,
+                        help="Fichier CSV de l'historique des mesures")
+    args = parser.parse_args()
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Benchmark inconnu: {', '.join(sorted(unknown))}")
+
+    for benchmark in args.benchmarks or list(BENCHMARKS):
+        print(f"\n[{benchmark.upper()}]")
+        results = BENCHMARKS[benchmark](args.repetitions)
+        for name, value in results.items():
+            print(f"  {name:<40} {value:>10.1f} ms")
+        save_history(benchmark, results, args.historique)
+    print(f"\n✓ Mesures ajoutées à {args.historique}")
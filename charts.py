@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""
+Import différé de matplotlib et seaborn pour les graphiques du projet GenAI
+
+matplotlib.pyplot et seaborn représentent l'essentiel du temps de démarrage
+des scripts (voir benchmark_genai.py). Ils ne sont importés qu'au premier
+graphique effectivement produit, avec le backend non interactif Agg choisi
+explicitement: les scripts n'affichent jamais de fenêtre, ils enregistrent
+des fichiers PNG.
+
+Chaque graphique du projet est une fonction de ce module qui reçoit des données
+déjà agrégées: les scripts les exécutent en parallèle (dag_runner, pool de processus).
+"""
+
+_pyplot = None
+
+
+def pyplot():
+    """Module matplotlib.pyplot configuré (backend Agg, style du projet), importé une seule fois"""
+    global _pyplot
+    if _pyplot is None:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
+        # Configuration des graphiques
+        plt.style.use('seaborn-v0_8-darkgrid')
+        sns.set_palette("husl")
+        _pyplot = plt
+    return _pyplot
+
+
+def seaborn():
+    """Module seaborn (après configuration de matplotlib)"""
+    pyplot()
+    import seaborn as sns
+    return sns
+
+
+# ==================================================================================
+# GRAPHIQUES DU PROJET (fonctions de module: exécutables dans un pool de processus)
+# ==================================================================================
+
+def country_distribution(country_counts, path='02_distribution_pays.png'):
+    """Top 15 des pays (nettoyage, 6.1)"""
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=(12, 6))
+    country_counts.plot(kind='bar', ax=ax, color='steelblue')
+    ax.set_title('Top 15 Pays avec Adoption GenAI', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Pays')
+    ax.set_ylabel('Nombre d\'entreprises')
+    plt.xticks(rotation=45, ha='right')
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
+    return path
+
+
+def industry_distribution(industry_counts, path='03_distribution_industrie.png'):
+    """Distribution par industrie (nettoyage, 6.2)"""
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=(12, 6))
+    industry_counts.plot(kind='barh', ax=ax, color='coral')
+    ax.set_title('Distribution par Secteur d\'Activité', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Nombre d\'entreprises')
+    ax.set_ylabel('Secteur')
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
+    return path
+
+
+def tool_distribution(genai_counts, path='04_distribution_genai_tools.png'):
+    """Répartition des outils GenAI (nettoyage, 6.3)"""
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=(10, 10))
+    colors = plt.cm.Set3(range(len(genai_counts)))
+    ax.pie(genai_counts, labels=genai_counts.index, autopct='%1.1f%%', colors=colors, startangle=90)
+    ax.set_title('Répartition des Outils GenAI', fontsize=14, fontweight='bold')
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
+    return path
+
+
+def adoption_trend(year_counts, path='05_evolution_adoption.png'):
+    """Évolution de l'adoption par année (nettoyage, 6.4)"""
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.plot(year_counts.index, year_counts.values, marker='o', linewidth=2, markersize=10, color='green')
+    ax.set_title('Évolution de l\'Adoption GenAI par Année', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Année')
+    ax.set_ylabel('Nombre d\'entreprises')
+    ax.grid(True, alpha=0.3)
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
+    return path
+
+
+def productivity_distribution(productivity, path='06_analyse_productivite.png'):
+    """Histogramme et box plot du changement de productivité (nettoyage, 6.5)"""
+    plt = pyplot()
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 6))
+
+    # Histogramme
+    ax1.hist(productivity, bins=30, color='purple', alpha=0.7, edgecolor='black')
+    ax1.set_title('Distribution du Changement de Productivité', fontsize=14, fontweight='bold')
+    ax1.set_xlabel('Changement de Productivité (%)')
+    ax1.set_ylabel('Fréquence')
+    ax1.axvline(productivity.mean(), color='red', linestyle='--', linewidth=2, label=f'Moyenne: {productivity.mean():.2f}%')
+    ax1.legend()
+
+    # Box plot
+    ax2.boxplot(productivity, vert=True)
+    ax2.set_title('Box Plot - Productivité', fontsize=14, fontweight='bold')
+    ax2.set_ylabel('Changement de Productivité (%)')
+    ax2.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
+    return path
+
+
+def correlation_heatmap(correlation_matrix, path='07_correlation_matrix.png'):
+    """Matrice de corrélation des variables numériques (nettoyage, 6.6)"""
+    plt = pyplot()
+    sns = seaborn()
+    fig, ax = plt.subplots(figsize=(10, 8))
+    sns.heatmap(correlation_matrix, annot=True, fmt='.2f', cmap='coolwarm',
+                center=0, square=True, linewidths=1, cbar_kws={"shrink": 0.8}, ax=ax)
+    ax.set_title('Matrice de Corrélation des Variables Numériques', fontsize=14, fontweight='bold')
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
+    return path
+
+
+def top_countries(df_pays, path='08_dw_top_pays.png'):
+    """Top 15 pays du Data Warehouse (ETL, graphique 1)"""
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.barh(df_pays['Country'], df_pays['Nombre_Entreprises'], color='steelblue')
+    ax.set_xlabel('Nombre d\'entreprises')
+    ax.set_title('Top 15 Pays - Adoption GenAI', fontsize=14, fontweight='bold')
+    ax.invert_yaxis()
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
+    return path
+
+
+def sector_share(df_secteur, path='09_dw_secteurs.png'):
+    """Répartition par type de secteur du Data Warehouse (ETL, graphique 2)"""
+    plt = pyplot()
+    fig, ax = plt.subplots(figsize=(10, 10))
+    colors = plt.cm.Set3(range(len(df_secteur)))
+    ax.pie(df_secteur['Total'], labels=df_secteur['Sector_Type'], autopct='%1.1f%%',
+           colors=colors, startangle=90)
+    ax.set_title('Répartition par Type de Secteur', fontsize=14, fontweight='bold')
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
+    return path
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Exécution en graphe de dépendances (DAG) des étapes du projet GenAI
+
+Chaque étape déclare ce qu'elle lit (inputs) et ce qu'elle produit (outputs):
+fichiers, tables ou vues. Une étape dépend des étapes qui produisent ses
+entrées; les étapes indépendantes s'exécutent en parallèle dans un pool de
+threads (E/S, SQLite, pandas) ou de processus (calcul Python, graphiques).
+Les ressources limitées (ex: un seul écrivain SQLite) sont des sémaphores:
+
+    runner = DagRunner(limits={'sqlite_writer': 1})
+    runner.add('vues', create_views, outputs=['VUE_PAYS'], resources=['sqlite_writer'])
+    runner.add('export', export_csv, outputs=['donnees_powerbi_genai.csv'])
+    runner.add('graphique', render, inputs=['VUE_PAYS'], executor='process')
+    runner.run()
+    print('\\n'.join(runner.report()))
+
+Le rapport donne, pour chaque étape, son début, sa durée et son attente (prête
+mais bloquée par une ressource ou un pool plein), ainsi que le chemin critique:
+la plus longue chaîne de dépendances, qui borne la durée totale quel que soit
+le nombre de workers. Les fonctions des étapes 'process' et leurs arguments
+doivent être sérialisables (fonctions définies dans un module importable).
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+EXECUTORS = ('thread', 'process')
+
+# Pool de processus par fork: les scripts du projet n'ont pas de garde
+# if __name__ == '__main__', qu'un démarrage spawn ré-exécuterait. Sans fork
+# (Windows), les étapes 'process' s'exécutent l'une après l'autre dans un thread dédié.
+FORK_AVAILABLE = 'fork' in multiprocessing.get_all_start_methods()
+
+
+class Stage:
+    """Étape du DAG: fonction, entrées/sorties déclarées, ressources et exécuteur"""
+
+    def __init__(self, name, func, inputs=(), outputs=(), resources=(), executor='thread',
+                 args=(), kwargs=None):
+        if executor not in EXECUTORS:
+            raise ValueError(f"Exécuteur inconnu pour {name}: {executor}")
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.resources = list(resources)
+        self.executor = executor
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.depends_on = []
+        self.ready_at = self.started_at = self.finished_at = None
+
+    @property
+    def duration(self):
+        return self.finished_at - self.started_at
+
+
+class DagRunner:
+    """Ordonnanceur des étapes selon leurs dépendances de données et leurs ressources"""
+
+    def __init__(self, max_workers=None, limits=None):
+        self.max_workers = max_workers or os.cpu_count() or 2
+        self.limits = dict(limits or {})
+        self.stages = {}
+        self.results = {}
+        self.elapsed = None
+
+    def add(self, name, func, inputs=(), outputs=(), resources=(), executor='thread', args=(), kwargs=None):
+        """Déclarer une étape; retourne l'objet Stage"""
+        if name in self.stages:
+            raise ValueError(f"Étape déjà déclarée: {name}")
+        unknown = set(resources) - set(self.limits)
+        if unknown:
+            raise ValueError(f"Ressource sans limite déclarée pour {name}: {', '.join(sorted(unknown))}")
+        stage = Stage(name, func, inputs, outputs, resources, executor, args, kwargs)
+        self.stages[name] = stage
+        return stage
+
+    def _resolve(self):
+        """Relier chaque entrée à l'étape qui la produit; vérifier l'absence de cycle"""
+        producers = {}
+        for stage in self.stages.values():
+            for output in stage.outputs:
+                if output in producers:
+                    raise ValueError(f"{output} est produit par {producers[output]} et {stage.name}")
+                producers[output] = stage.name
+        for stage in self.stages.values():
+            # Entrée sans producteur: donnée externe, déjà disponible
+            stage.depends_on = sorted({producers[i] for i in stage.inputs if i in producers})
+
+        order = []
+        state = {}
+
+        def visit(name, path):
+            if state.get(name) == 'fait':
+                return
+            if state.get(name) == 'en_cours':
+                raise ValueError(f"Cycle de dépendances: {' -> '.join(path + [name])}")
+            state[name] = 'en_cours'
+            for dependency in self.stages[name].depends_on:
+                visit(dependency, path + [name])
+            state[name] = 'fait'
+            order.append(name)
+
+        for name in self.stages:
+            visit(name, [])
+        return order
+
+    def run(self):
+        """Exécuter toutes les étapes; retourne {étape: résultat}
+
+        À la première erreur, plus aucune étape n'est lancée; les étapes en cours
+        se terminent puis l'exception est relevée.
+        """
+        order = self._resolve()
+        pending = list(order)
+        available = dict(self.limits)
+        running = {}
+        done = set()
+        error = None
+        start = time.perf_counter()
+
+        pools = {}
+
+        def pool(executor):
+            if executor not in pools:
+                if executor == 'thread':
+                    pools[executor] = ThreadPoolExecutor(max_workers=self.max_workers)
+                elif FORK_AVAILABLE:
+                    pools[executor] = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                          mp_context=multiprocessing.get_context('fork'))
+                else:
+                    pools[executor] = ThreadPoolExecutor(max_workers=1)
+            return pools[executor]
+
+        try:
+            while pending or running:
+                now = time.perf_counter() - start
+                for name in list(pending):
+                    stage = self.stages[name]
+                    if error or not all(d in done for d in stage.depends_on):
+                        continue
+                    if stage.ready_at is None:
+                        stage.ready_at = now
+                    if len(running) >= self.max_workers or any(available[r] <= 0 for r in stage.resources):
+                        continue
+                    for resource in stage.resources:
+                        available[resource] -= 1
+                    stage.started_at = time.perf_counter() - start
+                    future = pool(stage.executor).submit(stage.func, *stage.args, **stage.kwargs)
+                    running[future] = name
+                    pending.remove(name)
+                if error and not running:
+                    break
+                if not running:
+                    raise RuntimeError(f"Étapes bloquées (ressources épuisées): {', '.join(pending)}")
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stage = self.stages[running.pop(future)]
+                    stage.finished_at = time.perf_counter() - start
+                    for resource in stage.resources:
+                        available[resource] += 1
+                    try:
+                        self.results[stage.name] = future.result()
+                        done.add(stage.name)
+                    except Exception as e:
+                        error = error or e
+        finally:
+            for executor in pools.values():
+                executor.shutdown(wait=True)
+            self.elapsed = time.perf_counter() - start
+
+        if error:
+            raise error
+        return self.results
+
+    def critical_path(self):
+        """Plus longue chaîne de dépendances (somme des durées): [(étape, durée)], total"""
+        best = {}
+        for name in self._resolve():
+            stage = self.stages[name]
+            previous = max((best[d] for d in stage.depends_on), key=lambda b: b[0], default=(0.0, []))
+            best[name] = (previous[0] + stage.duration, previous[1] + [name])
+        total, path = max(best.values(), key=lambda b: b[0], default=(0.0, []))
+        return [(name, self.stages[name].duration) for name in path], total
+
+    def report(self):
+        """Lignes du rapport de durées: étapes (début, durée, attente) et chemin critique"""
+        lines = [f"  {'Étape':<28} {'Début':>8} {'Durée':>8} {'Attente':>8}"]
+        executed = [s for s in self.stages.values() if s.finished_at is not None]
+        for stage in sorted(executed, key=lambda s: s.started_at):
+            lines.append(f"  {stage.name:<28} {stage.started_at:>7.2f}s {stage.duration:>7.2f}s "
+                         f"{stage.started_at - stage.ready_at:>7.2f}s")
+        if len(executed) == len(self.stages):
+            path, total = self.critical_path()
+            lines.append(f"  Durée totale: {self.elapsed:.2f}s, chemin critique: {total:.2f}s")
+            lines.append("  Chemin critique: " + " -> ".join(f"{name} ({duration:.2f}s)" for name, duration in path))
+        return lines
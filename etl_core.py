@@ -0,0 +1,536 @@
+# -*- coding: utf-8 -*-
+"""
+Fonctions communes de l'ETL du Data Warehouse GenAI
+Schéma en étoile, enrichissement des dimensions et chargement SQLite
+
+Utilisé par 02_ETL_DataWarehouse_GenAI.py et par les modes de chargement
+alternatifs (pipeline concurrent, etc.). Les dimensions de référence sont
+alimentées par reference_data.seed_dimensions: le chargement des faits ne fait
+que résoudre les clés via le registre, sans accéder aux tables de dimensions.
+"""
+
+import hashlib
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from reference_data import UNKNOWN_KEY
+
+# ==================================================================================
+# SCHÉMA DU DATA WAREHOUSE
+# ==================================================================================
+
+SCHEMA_TABLES = {
+    'DIM_COMPANY': '''
+CREATE TABLE IF NOT EXISTS DIM_COMPANY (
+    Company_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+    Company_Name TEXT NOT NULL,
+    Company_Size TEXT,
+    Employees_Impacted_Category TEXT
+)
+''',
+    'DIM_GEOGRAPHY': '''
+CREATE TABLE IF NOT EXISTS DIM_GEOGRAPHY (
+    Geography_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+    Country TEXT NOT NULL,
+    Region TEXT
+)
+''',
+    'DIM_INDUSTRY': '''
+CREATE TABLE IF NOT EXISTS DIM_INDUSTRY (
+    Industry_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+    Industry_Name TEXT NOT NULL UNIQUE,
+    Sector_Type TEXT
+)
+''',
+    'DIM_GENAI_TOOL': '''
+CREATE TABLE IF NOT EXISTS DIM_GENAI_TOOL (
+    GenAI_Tool_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+    Tool_Name TEXT NOT NULL UNIQUE,
+    Tool_Category TEXT,
+    Tool_Provider TEXT
+)
+''',
+    'FAIT_ADOPTION': '''
+CREATE TABLE IF NOT EXISTS FAIT_ADOPTION (
+    Adoption_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+    Company_ID INTEGER,
+    Geography_ID INTEGER,
+    Industry_ID INTEGER,
+    GenAI_Tool_ID INTEGER,
+    Adoption_Year INTEGER,
+    Adoption_Phase TEXT,
+    Employees_Impacted INTEGER,
+    New_Roles_Created INTEGER,
+    Training_Hours INTEGER,
+    Productivity_Change REAL,
+    Productivity_Impact TEXT,
+    Training_per_Employee REAL,
+    New_Roles_Rate REAL,
+    Sentiment_Category TEXT,
+    Employee_Sentiment TEXT,
+    Sentiment_Text_ID INTEGER,
+    FOREIGN KEY (Company_ID) REFERENCES DIM_COMPANY(Company_ID),
+    FOREIGN KEY (Geography_ID) REFERENCES DIM_GEOGRAPHY(Geography_ID),
+    FOREIGN KEY (Industry_ID) REFERENCES DIM_INDUSTRY(Industry_ID),
+    FOREIGN KEY (GenAI_Tool_ID) REFERENCES DIM_GENAI_TOOL(GenAI_Tool_ID),
+    FOREIGN KEY (Sentiment_Text_ID) REFERENCES DIM_SENTIMENT_TEXT(Sentiment_Text_ID)
+)
+''',
+    # Dimension "junk" optionnelle (--sentiment-dim): chaque phrase de sentiment
+    # distincte est stockée une seule fois, les faits ne portent que sa clé
+    'DIM_SENTIMENT_TEXT': '''
+CREATE TABLE IF NOT EXISTS DIM_SENTIMENT_TEXT (
+    Sentiment_Text_ID INTEGER PRIMARY KEY,
+    Employee_Sentiment TEXT NOT NULL UNIQUE,
+    Sentiment_Category TEXT
+)
+''',
+    # Journal des chargements de FAIT_ADOPTION (reprise avec --resume): un lot
+    # est inscrit dans la même transaction que ses lignes
+    'ETL_LOAD': '''
+CREATE TABLE IF NOT EXISTS ETL_LOAD (
+    Load_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+    Source_File TEXT NOT NULL,
+    Source_Fingerprint TEXT NOT NULL,
+    Mode TEXT,
+    Started_At TEXT,
+    Finished_At TEXT,
+    Rows_Loaded INTEGER
+)
+''',
+    'ETL_BATCH_LOG': '''
+CREATE TABLE IF NOT EXISTS ETL_BATCH_LOG (
+    Load_ID INTEGER NOT NULL,
+    Batch_No INTEGER NOT NULL,
+    Source_Start INTEGER NOT NULL,
+    Source_End INTEGER NOT NULL,
+    Rows_Loaded INTEGER NOT NULL,
+    Rows_Rejected INTEGER NOT NULL,
+    First_Company_ID INTEGER,
+    Committed_At TEXT,
+    PRIMARY KEY (Load_ID, Batch_No),
+    FOREIGN KEY (Load_ID) REFERENCES ETL_LOAD(Load_ID)
+)
+''',
+}
+
+# Colonnes ajoutées après coup: migration des entrepôts créés avec un schéma antérieur
+SCHEMA_MIGRATIONS = {
+    'FAIT_ADOPTION': [('Sentiment_Text_ID', 'INTEGER')],
+}
+
+INSERT_COMPANY = '''
+INSERT INTO DIM_COMPANY (Company_ID, Company_Name, Company_Size, Employees_Impacted_Category)
+VALUES (?, ?, ?, ?)
+'''
+
+INSERT_FAIT = '''
+INSERT INTO FAIT_ADOPTION (
+    Company_ID, Geography_ID, Industry_ID, GenAI_Tool_ID,
+    Adoption_Year, Adoption_Phase,
+    Employees_Impacted, New_Roles_Created, Training_Hours,
+    Productivity_Change, Productivity_Impact,
+    Training_per_Employee, New_Roles_Rate,
+    Sentiment_Category, Employee_Sentiment, Sentiment_Text_ID
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+INSERT_SENTIMENT_TEXT = '''
+INSERT INTO DIM_SENTIMENT_TEXT (Sentiment_Text_ID, Employee_Sentiment, Sentiment_Category)
+VALUES (?, ?, ?)
+'''
+
+
+# ==================================================================================
+# REQUÊTES D'ANALYSE (statistiques de l'étape 7, export Power BI de l'étape 8)
+# ==================================================================================
+
+STATISTICS_QUERIES = {
+    'top_pays': """
+SELECT g.Country, COUNT(*) as Nombre_Adoptions
+FROM FAIT_ADOPTION f
+JOIN DIM_GEOGRAPHY g ON f.Geography_ID = g.Geography_ID
+GROUP BY g.Country
+ORDER BY Nombre_Adoptions DESC
+""",
+    'secteurs': """
+SELECT i.Sector_Type, COUNT(*) as Nombre
+FROM FAIT_ADOPTION f
+JOIN DIM_INDUSTRY i ON f.Industry_ID = i.Industry_ID
+GROUP BY i.Sector_Type
+ORDER BY Nombre DESC
+""",
+    'outils': """
+SELECT t.Tool_Name, t.Tool_Provider, COUNT(*) as Nombre_Utilisations
+FROM FAIT_ADOPTION f
+JOIN DIM_GENAI_TOOL t ON f.GenAI_Tool_ID = t.GenAI_Tool_ID
+GROUP BY t.Tool_Name, t.Tool_Provider
+ORDER BY Nombre_Utilisations DESC
+""",
+    'annees': """
+SELECT Adoption_Year, COUNT(*) as Nombre,
+       ROUND(AVG(Productivity_Change), 2) as Productivite_Moyenne
+FROM FAIT_ADOPTION
+GROUP BY Adoption_Year
+ORDER BY Adoption_Year
+""",
+    'globales': """
+SELECT
+    COUNT(*) as Total_Entreprises,
+    SUM(Employees_Impacted) as Total_Employes,
+    AVG(Employees_Impacted) as Moy_Employes,
+    SUM(New_Roles_Created) as Total_Nouveaux_Roles,
+    AVG(New_Roles_Created) as Moy_Nouveaux_Roles,
+    AVG(Productivity_Change) as Moy_Productivite,
+    AVG(Training_per_Employee) as Moy_Formation_Par_Employe
+FROM FAIT_ADOPTION
+""",
+    'sentiment': """
+SELECT Sentiment_Category, COUNT(*) as Nombre,
+       ROUND(COUNT(*) * 100.0 / (SELECT COUNT(*) FROM FAIT_ADOPTION), 1) as Pourcentage
+FROM FAIT_ADOPTION
+GROUP BY Sentiment_Category
+ORDER BY Nombre DESC
+""",
+}
+
+# Faits dénormalisés pour Power BI (le texte du sentiment est relu dans
+# DIM_SENTIMENT_TEXT lorsqu'il y est stocké, cf. --sentiment-dim)
+EXPORT_QUERY = """
+SELECT
+    f.Adoption_ID,
+    c.Company_Name,
+    c.Company_Size,
+    g.Country,
+    g.Region,
+    i.Industry_Name,
+    i.Sector_Type,
+    t.Tool_Name as GenAI_Tool,
+    t.Tool_Category,
+    t.Tool_Provider,
+    f.Adoption_Year,
+    f.Adoption_Phase,
+    f.Employees_Impacted,
+    f.New_Roles_Created,
+    f.Training_Hours,
+    f.Productivity_Change,
+    f.Productivity_Impact,
+    f.Training_per_Employee,
+    f.New_Roles_Rate,
+    f.Sentiment_Category,
+    COALESCE(f.Employee_Sentiment, s.Employee_Sentiment) AS Employee_Sentiment
+FROM FAIT_ADOPTION f
+LEFT JOIN DIM_COMPANY c ON f.Company_ID = c.Company_ID
+LEFT JOIN DIM_GEOGRAPHY g ON f.Geography_ID = g.Geography_ID
+LEFT JOIN DIM_INDUSTRY i ON f.Industry_ID = i.Industry_ID
+LEFT JOIN DIM_GENAI_TOOL t ON f.GenAI_Tool_ID = t.GenAI_Tool_ID
+LEFT JOIN DIM_SENTIMENT_TEXT s ON f.Sentiment_Text_ID = s.Sentiment_Text_ID
+"""
+
+
+def create_schema(cursor):
+    """Créer les tables du modèle en étoile (si elles n'existent pas)"""
+    for table, ddl in SCHEMA_TABLES.items():
+        cursor.execute(ddl)
+    for table, columns in SCHEMA_MIGRATIONS.items():
+        existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})").fetchall()}
+        for column, column_type in columns:
+            if column not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+    return list(SCHEMA_TABLES)
+
+
+# ==================================================================================
+# ENRICHISSEMENT DES DIMENSIONS
+# ==================================================================================
+
+def enrich_dimensions(df, registry):
+    """Ajouter Region, Sector_Type, Tool_Category et Tool_Provider (vectorisé)
+
+    Les correspondances proviennent du registre des clés (référentiel versionné,
+    reference_data.KeyRegistry).
+    """
+    df['Region'] = df['Country'].map(registry.attribute('DIM_GEOGRAPHY', 'Region')).fillna('Autre')
+    df['Sector_Type'] = df['Industry'].map(registry.attribute('DIM_INDUSTRY', 'Sector_Type')).fillna('Autre')
+    df['Tool_Category'] = df['GenAI Tool'].map(registry.attribute('DIM_GENAI_TOOL', 'Tool_Category')).fillna('Autre')
+    df['Tool_Provider'] = df['GenAI Tool'].map(registry.attribute('DIM_GENAI_TOOL', 'Tool_Provider')).fillna('Inconnu')
+    return df
+
+
+# ==================================================================================
+# VALIDATION DES VALEURS NUMÉRIQUES
+# ==================================================================================
+
+INT_COLUMNS = ['Adoption Year', 'Number of Employees Impacted', 'New Roles Created', 'Training Hours Provided']
+FLOAT_COLUMNS = ['Productivity Change (%)', 'Training_per_Employee', 'New_Roles_Rate']
+
+
+def reject_invalid_rows(df):
+    """Convertir les colonnes numériques et écarter les lignes invalides (vectorisé)
+
+    Comme en chargement séquentiel, une ligne dont une valeur numérique est
+    invalide (entier manquant ou non numérique, réel non numérique) est rejetée
+    sans interrompre le chargement. Retourne (lignes valides, positions des lignes
+    valides dans df, nombre de lignes rejetées).
+    """
+    df = df.copy()
+    valid = np.ones(len(df), dtype=bool)
+    for col in INT_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+        valid &= df[col].notna().to_numpy()
+    for col in FLOAT_COLUMNS:
+        values = pd.to_numeric(df[col], errors='coerce')
+        valid &= (values.notna() | df[col].isna()).to_numpy()
+        df[col] = values
+
+    df = df[valid]
+    for col in INT_COLUMNS:
+        df[col] = df[col].astype(int)
+    return df, np.flatnonzero(valid), int((~valid).sum())
+
+
+# ==================================================================================
+# CHARGEMENT
+# ==================================================================================
+
+def next_company_id(cursor):
+    """Prochain Company_ID libre (les IDs sont attribués par l'ETL, pas par SQLite)"""
+    cursor.execute("SELECT COALESCE(MAX(Company_ID), 0) FROM DIM_COMPANY")
+    return cursor.fetchone()[0] + 1
+
+
+def next_adoption_id(cursor):
+    """Prochain Adoption_ID attribué par AUTOINCREMENT (séquence SQLite)"""
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'FAIT_ADOPTION'")
+    row = cursor.fetchone()
+    return (row[0] if row else 0) + 1
+
+
+def encode_sentiment_text(cursor, df, known=None):
+    """Clés DIM_SENTIMENT_TEXT des phrases d'un lot (les phrases nouvelles sont insérées)
+
+    known: dictionnaire phrase -> clé conservé d'un lot à l'autre (lu en base si None).
+    Retourne la liste des clés alignée sur les lignes du lot (None si texte absent).
+    """
+    if known is None:
+        known = dict(cursor.execute(
+            "SELECT Employee_Sentiment, Sentiment_Text_ID FROM DIM_SENTIMENT_TEXT"
+        ).fetchall())
+    codes, phrases = df['Employee Sentiment'].factorize()
+    # Catégorie de chaque phrase: celle de sa première occurrence
+    present, first_rows = np.unique(codes, return_index=True)
+    categories = dict(zip(present, df['Sentiment_Category'].to_numpy()[first_rows]))
+
+    next_id = max(known.values(), default=0) + 1
+    keys = []
+    new_rows = []
+    for code, phrase in enumerate(phrases):
+        if phrase not in known:
+            known[phrase] = next_id
+            new_rows.append((next_id, phrase, categories[code]))
+            next_id += 1
+        keys.append(known[phrase])
+    cursor.executemany(INSERT_SENTIMENT_TEXT, new_rows)
+
+    keys.append(None)  # Code -1: phrase absente
+    return np.array(keys, dtype=object)[codes].tolist()
+
+
+def build_batch(df, company_ids, geography_mapping, industry_mapping, tool_mapping,
+                sentiment_ids=None):
+    """Construire les lignes DIM_COMPANY et FAIT_ADOPTION d'un lot (vectorisé)
+
+    company_ids: séquence des Company_ID attribués aux lignes du lot.
+    sentiment_ids: clés DIM_SENTIMENT_TEXT des lignes (encode_sentiment_text); si
+    fournies, le texte du sentiment n'est pas recopié dans FAIT_ADOPTION.
+    """
+    company_ids = list(company_ids)
+    if sentiment_ids is None:
+        sentiment_texts = df['Employee Sentiment']
+        sentiment_ids = [None] * len(df)
+    else:
+        sentiment_texts = [None] * len(df)
+    companies = list(zip(
+        company_ids,
+        df['Company Name'],
+        df['Company_Size'],
+        df['Company_Size']
+    ))
+    facts = list(zip(
+        company_ids,
+        df['Country'].map(geography_mapping).fillna(UNKNOWN_KEY).astype(int).tolist(),
+        df['Industry'].map(industry_mapping).fillna(UNKNOWN_KEY).astype(int).tolist(),
+        df['GenAI Tool'].map(tool_mapping).fillna(UNKNOWN_KEY).astype(int).tolist(),
+        df['Adoption Year'].astype(int).tolist(),
+        df['Adoption_Phase'],
+        df['Number of Employees Impacted'].astype(int).tolist(),
+        df['New Roles Created'].astype(int).tolist(),
+        df['Training Hours Provided'].astype(int).tolist(),
+        df['Productivity Change (%)'].astype(float).tolist(),
+        df['Productivity_Impact'],
+        df['Training_per_Employee'].astype(float).tolist(),
+        df['New_Roles_Rate'].astype(float).tolist(),
+        df['Sentiment_Category'],
+        sentiment_texts,
+        sentiment_ids
+    ))
+    return companies, facts
+
+
+def source_fingerprint(path, block_size=1 << 20):
+    """Empreinte du contenu d'un fichier source (BLAKE2b)"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class LoadCheckpoint:
+    """Point de reprise d'un chargement de FAIT_ADOPTION (ETL_LOAD / ETL_BATCH_LOG)
+
+    offset: nombre de lignes du fichier source déjà chargées (lots validés);
+    batch_no: numéro du dernier lot validé.
+    """
+
+    def __init__(self, load_id, batch_no=0, offset=0):
+        self.load_id = load_id
+        self.batch_no = batch_no
+        self.offset = offset
+
+    @classmethod
+    def open(cls, conn, source, mode, resume=False):
+        """Reprendre le dernier chargement de la même source (resume) ou en démarrer un nouveau
+
+        Le chargement repris est le plus récent dont l'empreinte du fichier source est
+        identique; s'il est déjà terminé, il ne reste aucune ligne à charger.
+        Les chargements arrêtés avant leur premier lot validé (aucune ligne écrite)
+        sont supprimés au préalable: ils ne restent pas indéfiniment interrompus.
+        """
+        conn.execute('''
+        DELETE FROM ETL_LOAD
+        WHERE Finished_At IS NULL
+          AND Load_ID NOT IN (SELECT Load_ID FROM ETL_BATCH_LOG)
+        ''')
+        # Validé tout de suite: l'écrivain du mode pipeline utilise sa propre connexion
+        conn.commit()
+        fingerprint = source_fingerprint(source)
+        if resume:
+            row = conn.execute('''
+            SELECT l.Load_ID, COUNT(b.Batch_No), COALESCE(MAX(b.Source_End), 0)
+            FROM ETL_LOAD l
+            LEFT JOIN ETL_BATCH_LOG b ON b.Load_ID = l.Load_ID
+            WHERE l.Source_Fingerprint = ?
+            GROUP BY l.Load_ID
+            ORDER BY l.Load_ID DESC
+            LIMIT 1
+            ''', (fingerprint,)).fetchone()
+            if row:
+                return cls(*row)
+
+        cursor = conn.execute('''
+        INSERT INTO ETL_LOAD (Source_File, Source_Fingerprint, Mode, Started_At)
+        VALUES (?, ?, ?, ?)
+        ''', (os.path.basename(source), fingerprint, mode, datetime.now().isoformat(timespec='seconds')))
+        conn.commit()
+        return cls(cursor.lastrowid)
+
+    @staticmethod
+    def interrupted(conn):
+        """Chargements non terminés: liste de (Load_ID, Source_File, lots validés, lignes source)"""
+        return conn.execute('''
+        SELECT l.Load_ID, l.Source_File, COUNT(b.Batch_No), COALESCE(MAX(b.Source_End), 0)
+        FROM ETL_LOAD l
+        LEFT JOIN ETL_BATCH_LOG b ON b.Load_ID = l.Load_ID
+        WHERE l.Finished_At IS NULL
+        GROUP BY l.Load_ID
+        ORDER BY l.Load_ID
+        ''').fetchall()
+
+    def log_batch(self, cursor, rows, loaded, rejected, first_company_id):
+        """Inscrire un lot de rows lignes source (à exécuter avant le commit du lot)"""
+        self.batch_no += 1
+        cursor.execute('''
+        INSERT INTO ETL_BATCH_LOG (Load_ID, Batch_No, Source_Start, Source_End,
+                                   Rows_Loaded, Rows_Rejected, First_Company_ID, Committed_At)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (self.load_id, self.batch_no, self.offset, self.offset + rows, loaded, rejected,
+              first_company_id, datetime.now().isoformat(timespec='seconds')))
+        self.offset += rows
+
+    def finish(self, conn):
+        """Marquer le chargement comme terminé; retourne le nombre total de lignes chargées"""
+        total = conn.execute("SELECT COALESCE(SUM(Rows_Loaded), 0) FROM ETL_BATCH_LOG WHERE Load_ID = ?",
+                             (self.load_id,)).fetchone()[0]
+        conn.execute("UPDATE ETL_LOAD SET Finished_At = ?, Rows_Loaded = ? WHERE Load_ID = ?",
+                     (datetime.now().isoformat(timespec='seconds'), total, self.load_id))
+        conn.commit()
+        return total
+
+
+def load_facts(conn, df, geography_mapping, industry_mapping, tool_mapping, sentiment_dim=False,
+               checkpoint=None, batch_size=10_000):
+    """Charger DIM_COMPANY et FAIT_ADOPTION ligne par ligne, retourner (chargés, erreurs)
+
+    sentiment_dim: texte du sentiment stocké dans DIM_SENTIMENT_TEXT (clé dans les faits).
+    checkpoint: LoadCheckpoint; chaque lot de batch_size lignes est inscrit dans
+    ETL_BATCH_LOG dans la même transaction que ses lignes.
+    """
+    cursor = conn.cursor()
+    loaded_count = 0
+    error_count = 0
+    company_id = next_company_id(cursor)
+    sentiment_ids = encode_sentiment_text(cursor, df) if sentiment_dim else [None] * len(df)
+    batch_start = (0, 0, 0, company_id)  # position, chargés, erreurs, premier Company_ID
+
+    for pos, (idx, row) in enumerate(df.iterrows()):
+        row_company_id = company_id
+        company_id += 1
+        try:
+            # Récupérer les IDs des dimensions
+            geography_id = geography_mapping.get(row['Country'], UNKNOWN_KEY)
+            industry_id = industry_mapping.get(row['Industry'], UNKNOWN_KEY)
+            tool_id = tool_mapping.get(row['GenAI Tool'], UNKNOWN_KEY)
+
+            # Valeurs du fait converties avant toute insertion: une ligne rejetée
+            # ne laisse pas d'entreprise orpheline dans DIM_COMPANY
+            fact = (
+                row_company_id, geography_id, industry_id, tool_id,
+                int(row['Adoption Year']), row['Adoption_Phase'],
+                int(row['Number of Employees Impacted']), int(row['New Roles Created']),
+                int(row['Training Hours Provided']),
+                float(row['Productivity Change (%)']), row['Productivity_Impact'],
+                float(row['Training_per_Employee']), float(row['New_Roles_Rate']),
+                row['Sentiment_Category'],
+                None if sentiment_dim else row['Employee Sentiment'],
+                sentiment_ids[pos]
+            )
+
+            # Insérer dans DIM_COMPANY puis dans FAIT_ADOPTION
+            cursor.execute(INSERT_COMPANY, (
+                row_company_id, row['Company Name'], row['Company_Size'], row['Company_Size']
+            ))
+            cursor.execute(INSERT_FAIT, fact)
+
+            loaded_count += 1
+
+        except Exception as e:
+            error_count += 1
+            if error_count <= 5:  # Afficher seulement les 5 premières erreurs
+                print(f"  ✗ Erreur ligne {idx}: {e}")
+
+        # Fin de lot: journal du lot et validation dans la même transaction
+        if (pos + 1) % batch_size == 0 or pos + 1 == len(df):
+            start_pos, start_loaded, start_errors, start_company_id = batch_start
+            if checkpoint:
+                checkpoint.log_batch(cursor, pos + 1 - start_pos, loaded_count - start_loaded,
+                                     error_count - start_errors, start_company_id)
+            conn.commit()
+            print(f"  ✓ {loaded_count:,} enregistrements chargés...")
+            batch_start = (pos + 1, loaded_count, error_count, company_id)
+
+    conn.commit()
+    return loaded_count, error_count
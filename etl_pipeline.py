@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Mode de chargement "pipeline" de l'ETL GenAI
+Lecture CSV, transformation et écriture SQLite en parallèle (producteur/consommateur)
+
+    lecteur (1 thread)  ->  file bornée  ->  transformation (pool de threads)
+                        ->  file bornée  ->  écrivain (1 thread, seul propriétaire
+                                                       de la connexion SQLite)
+
+Les files bornées assurent la contre-pression: le lecteur s'arrête quand les
+transformations ou l'écriture prennent du retard. SQLite et le parseur CSV de
+pandas relâchent le GIL, ce qui permet le recouvrement des E/S et du calcul.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from etl_core import (INSERT_COMPANY, INSERT_FAIT, build_batch, encode_sentiment_text, enrich_dimensions,
+                      next_company_id, reject_invalid_rows)
+from reference_data import KeyRegistry, register_members
+
+_FIN = object()  # Sentinelle de fin de flux
+
+
+def transform_chunk(chunk, registry):
+    """Enrichir un lot de données nettoyées (exécuté dans le pool de transformation)
+
+    Les lignes dont une valeur numérique est invalide sont rejetées
+    (reject_invalid_rows). Retourne (lignes valides, positions des lignes valides
+    dans le lot, nombre de lignes rejetées).
+    """
+    return reject_invalid_rows(enrich_dimensions(chunk.reset_index(drop=True), registry))
+
+
+def _put(q, item, stop):
+    """Déposer un élément dans une file bornée sans bloquer après un arrêt"""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q, stop):
+    """Retirer un élément d'une file, ou la sentinelle de fin après un arrêt"""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return _FIN
+
+
+def run_pipeline(csv_path, db_path, chunksize=50_000, workers=None, queue_size=4, registry=None,
+                 sentiment_dim=False, checkpoint=None, frames=None):
+    """Charger DIM_COMPANY et FAIT_ADOPTION depuis csv_path avec recouvrement E/S/calcul
+
+    Les dimensions de référence doivent déjà être alimentées (seed_dimensions):
+    les clés sont résolues via le registre, complété par l'écrivain pour les
+    valeurs hors référentiel (register_members). Le pool de transformation lit
+    une copie du registre prise au démarrage: l'écrivain est seul à modifier
+    le registre partagé.
+    sentiment_dim: texte du sentiment encodé dans DIM_SENTIMENT_TEXT par l'écrivain.
+    checkpoint: LoadCheckpoint; la lecture reprend après checkpoint.offset lignes et
+    chaque lot est inscrit dans ETL_BATCH_LOG dans la transaction de ses lignes.
+    frames: liste complétée par l'écrivain avec les lots chargés, indexés par
+    Company_ID (stockage colonnaire des faits).
+    Retourne un dictionnaire de statistiques (lignes, rejets, lots, temps par étage).
+    """
+    registry = registry or KeyRegistry.load()
+    # Attributs des membres ajoutés par l'écrivain: valeurs par défaut de enrich_dimensions
+    transform_registry = registry.snapshot()
+    workers = workers or max(1, (os.cpu_count() or 2) - 2)
+    raw_queue = queue.Queue(maxsize=queue_size)
+    ready_queue = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors = []
+    stats = {'lignes': 0, 'rejets': 0, 'lots': 0, 'lecture_s': 0.0, 'ecriture_s': 0.0}
+
+    def reader():
+        try:
+            start = time.perf_counter()
+            # Reprise: les lignes des lots déjà validés ne sont pas relues
+            skiprows = range(1, checkpoint.offset + 1) if checkpoint and checkpoint.offset else None
+            for chunk in pd.read_csv(csv_path, chunksize=chunksize, skiprows=skiprows):
+                if not _put(raw_queue, chunk, stop):
+                    return
+            stats['lecture_s'] = time.perf_counter() - start
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            _put(raw_queue, _FIN, stop)
+
+    def dispatcher(pool):
+        # Les futures sont transmises dans l'ordre de lecture: l'écrivain
+        # conserve l'ordre des lignes du fichier source.
+        try:
+            while True:
+                chunk = _get(raw_queue, stop)
+                if chunk is _FIN:
+                    break
+                if not _put(ready_queue, pool.submit(transform_chunk, chunk, transform_registry), stop):
+                    return
+        finally:
+            _put(ready_queue, _FIN, stop)
+
+    def writer():
+        conn = sqlite3.connect(db_path)
+        try:
+            cursor = conn.cursor()
+            company_id = next_company_id(cursor)
+            # Dictionnaire phrase -> clé conservé d'un lot à l'autre
+            known_sentiments = dict(cursor.execute(
+                "SELECT Employee_Sentiment, Sentiment_Text_ID FROM DIM_SENTIMENT_TEXT"
+            ).fetchall()) if sentiment_dim else None
+
+            while True:
+                future = _get(ready_queue, stop)
+                if future is _FIN:
+                    break
+                chunk, positions, rejected = future.result()
+                source_rows = len(chunk) + rejected
+
+                start = time.perf_counter()
+                # Valeurs absentes du référentiel: membres propres (seul l'écrivain modifie le registre)
+                for col, values in register_members(conn, registry, chunk).items():
+                    print(f"  ⚠️  {col} absents du référentiel (membres ajoutés): {', '.join(map(str, values))}")
+                sentiment_ids = (encode_sentiment_text(cursor, chunk, known_sentiments)
+                                 if sentiment_dim else None)
+                # Company_ID positionnels: une ligne rejetée consomme son ID (comme load_facts)
+                companies, facts = build_batch(chunk, (company_id + positions).tolist(),
+                                               *registry.mappings, sentiment_ids=sentiment_ids)
+                cursor.executemany(INSERT_COMPANY, companies)
+                cursor.executemany(INSERT_FAIT, facts)
+                if checkpoint:
+                    checkpoint.log_batch(cursor, source_rows, len(chunk), rejected, company_id)
+                conn.commit()
+                stats['ecriture_s'] += time.perf_counter() - start
+                if frames is not None:
+                    frames.append(chunk.set_axis(company_id + positions))
+
+                company_id += source_rows
+                stats['lignes'] += len(chunk)
+                stats['rejets'] += rejected
+                stats['lots'] += 1
+                if rejected:
+                    print(f"  ✗ Lot {stats['lots']}: {rejected} lignes rejetées (valeurs numériques invalides)")
+                print(f"  ✓ Lot {stats['lots']}: {stats['lignes']:,} enregistrements chargés...")
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            conn.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='etl-transform') as pool:
+        threads = [
+            threading.Thread(target=reader, name='etl-lecteur'),
+            threading.Thread(target=dispatcher, args=(pool,), name='etl-dispatch'),
+            threading.Thread(target=writer, name='etl-ecrivain'),
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    stats['total_s'] = time.perf_counter() - start
+
+    if errors:
+        raise errors[0]
+    return stats
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+Mode de chargement "shards" de l'ETL GenAI
+Chargement parallèle de FAIT_ADOPTION dans plusieurs fichiers SQLite, puis fusion
+
+1. Les dimensions (pays, industries, outils) sont alimentées une seule fois
+   depuis le référentiel: chaque processus reçoit le registre des clés
+   (reference_data.KeyRegistry, membres hors référentiel compris) et n'accède
+   jamais aux tables de dimensions.
+2. Les lignes dont une valeur numérique est invalide sont rejetées, puis les
+   Company_ID et Adoption_ID sont pré-attribués avant le partitionnement.
+3. Chaque shard (par Région ou par hachage du nom d'entreprise) est chargé dans
+   son propre fichier SQLite par un processus indépendant.
+4. Les shards sont fusionnés dans l'entrepôt principal via ATTACH DATABASE,
+   ce qui conserve un unique modèle en étoile pour Power BI.
+
+Les processus de chargement sont lancés en ligne de commande
+(python etl_shards.py --worker ...) afin de ne pas ré-exécuter le script ETL
+principal au démarrage des processus sous Windows.
+"""
+
+import argparse
+import os
+import pickle
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from etl_core import (INSERT_COMPANY, build_batch, create_schema, encode_sentiment_text, next_adoption_id,
+                      next_company_id, reject_invalid_rows)
+from reference_data import REFERENCE_DIR, KeyRegistry
+
+# Colonnes de FAIT_ADOPTION écrites dans les shards et recopiées lors de la fusion
+# (Adoption_ID pré-attribué dans l'ordre du fichier source, comme en chargement séquentiel)
+FACT_COLUMNS = '''Adoption_ID, Company_ID, Geography_ID, Industry_ID, GenAI_Tool_ID,
+    Adoption_Year, Adoption_Phase,
+    Employees_Impacted, New_Roles_Created, Training_Hours,
+    Productivity_Change, Productivity_Impact,
+    Training_per_Employee, New_Roles_Rate,
+    Sentiment_Category, Employee_Sentiment, Sentiment_Text_ID'''
+
+INSERT_SHARD_FAIT = f"INSERT INTO FAIT_ADOPTION ({FACT_COLUMNS}) VALUES ({', '.join('?' * 17)})"
+
+# Limite par défaut de SQLite (SQLITE_MAX_ATTACHED)
+MAX_ATTACHED = 10
+
+
+def partition(df, n_shards=None, by='region'):
+    """Découper les faits en shards: par Région ou par hachage de Company Name"""
+    if by == 'region':
+        return [(str(region), part) for region, part in df.groupby('Region', sort=True)]
+
+    n_shards = n_shards or os.cpu_count() or 2
+    # Hachage stable d'un processus à l'autre (contrairement à hash())
+    keys = pd.util.hash_pandas_object(df['Company Name'], index=False).to_numpy() % n_shards
+    return [(f'hash{k}', df[keys == k]) for k in range(n_shards) if np.any(keys == k)]
+
+
+def load_shard(df, shard_path, registry):
+    """Charger DIM_COMPANY et FAIT_ADOPTION d'un shard (Company_ID et Adoption_ID déjà attribués)
+
+    Si la colonne Sentiment_Text_ID est présente, les clés DIM_SENTIMENT_TEXT ont
+    été attribuées par le processus principal et remplacent le texte du sentiment.
+    """
+    if os.path.exists(shard_path):
+        os.remove(shard_path)
+
+    conn = sqlite3.connect(shard_path)
+    # Fichier temporaire: pas besoin de journal ni de synchronisation disque
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    cursor = conn.cursor()
+    create_schema(cursor)
+
+    sentiment_ids = df['Sentiment_Text_ID'].tolist() if 'Sentiment_Text_ID' in df else None
+    companies, facts = build_batch(df, df['Company_ID'], *registry.mappings, sentiment_ids=sentiment_ids)
+    cursor.executemany(INSERT_COMPANY, companies)
+    cursor.executemany(INSERT_SHARD_FAIT, [(adoption_id, *fact) for adoption_id, fact
+                                           in zip(df['Adoption_ID'].tolist(), facts)])
+    conn.commit()
+    conn.close()
+    return len(df)
+
+
+def merge_shards(conn, shard_paths):
+    """Fusionner les shards dans l'entrepôt principal (ATTACH + INSERT ... SELECT)
+
+    Les Adoption_ID pré-attribués sont conservés: les identifiants sont ceux d'un
+    chargement séquentiel dans l'ordre du fichier source.
+    """
+    merged = 0
+    for path in shard_paths:
+        conn.execute("ATTACH DATABASE ? AS shard", (path,))
+        conn.execute("INSERT INTO DIM_COMPANY SELECT * FROM shard.DIM_COMPANY")
+        cursor = conn.execute(f'''
+        INSERT INTO FAIT_ADOPTION ({FACT_COLUMNS})
+        SELECT {FACT_COLUMNS} FROM shard.FAIT_ADOPTION
+        ''')
+        merged += cursor.rowcount
+        conn.commit()
+        conn.execute("DETACH DATABASE shard")
+    return merged
+
+
+def attach_union(conn, shard_paths):
+    """Exposer les shards sans fusion: vues temporaires UNION ALL sur la connexion
+
+    Crée FAIT_ADOPTION_SHARDS et DIM_COMPANY_SHARDS (vues TEMP: SQLite n'autorise
+    pas une vue persistante à référencer une base attachée).
+    """
+    if len(shard_paths) > MAX_ATTACHED:
+        raise ValueError(f"Au plus {MAX_ATTACHED} shards peuvent être attachés à la fois")
+
+    aliases = []
+    for i, path in enumerate(shard_paths):
+        alias = f'shard{i}'
+        conn.execute(f"ATTACH DATABASE ? AS {alias}", (path,))
+        aliases.append(alias)
+
+    for table in ['FAIT_ADOPTION', 'DIM_COMPANY']:
+        union = "\nUNION ALL\n".join(f"SELECT * FROM {a}.{table}" for a in aliases)
+        conn.execute(f"DROP VIEW IF EXISTS temp.{table}_SHARDS")
+        conn.execute(f"CREATE TEMP VIEW {table}_SHARDS AS\n{union}")
+    return aliases
+
+
+def run_sharded_load(conn, df, n_shards=None, by='region', workdir=None,
+                     merge=True, reference_dir=REFERENCE_DIR, registry=None, sentiment_dim=False,
+                     checkpoint=None):
+    """Partitionner, charger les shards en parallèle puis les fusionner
+
+    registry: registre des clés transmis aux processus (chargé depuis reference_dir
+    si absent); les valeurs hors référentiel doivent y être enregistrées
+    (reference_data.register_members).
+
+    sentiment_dim: les phrases de sentiment sont encodées une seule fois dans
+    DIM_SENTIMENT_TEXT de l'entrepôt principal, avant le partitionnement.
+    checkpoint: LoadCheckpoint; après la fusion, le chargement est inscrit dans
+    ETL_BATCH_LOG en un seul lot (lignes source, chargées et rejetées).
+    Retourne un dictionnaire de statistiques et la liste des fichiers shards.
+    """
+    start = time.perf_counter()
+    registry = registry or KeyRegistry.load(reference_dir)
+    workdir = workdir or tempfile.mkdtemp(prefix='dw_shards_')
+    os.makedirs(workdir, exist_ok=True)
+
+    # Pré-attribution des identifiants dans l'ordre du fichier source: une ligne
+    # rejetée consomme son Company_ID mais pas d'Adoption_ID (comme load_facts)
+    source_rows = len(df)
+    first_company_id = next_company_id(conn.cursor())
+    df, positions, rejected = reject_invalid_rows(df)
+    df['Company_ID'] = first_company_id + positions
+    first_adoption_id = next_adoption_id(conn.cursor())
+    df['Adoption_ID'] = np.arange(first_adoption_id, first_adoption_id + len(df))
+    if sentiment_dim:
+        df['Sentiment_Text_ID'] = encode_sentiment_text(conn.cursor(), df)
+        conn.commit()
+
+    processes = []
+    shard_paths = []
+    for key, part in partition(df, n_shards, by):
+        job_path = os.path.join(workdir, f'{key}.pkl')
+        shard_path = os.path.join(workdir, f'datawarehouse_genai_{key}.db')
+        with open(job_path, 'wb') as f:
+            pickle.dump({'df': part, 'registre': registry}, f)
+        processes.append((key, subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--worker', job_path, shard_path]
+        )))
+        shard_paths.append(shard_path)
+
+    failed = [key for key, p in processes if p.wait() != 0]
+    if failed:
+        raise RuntimeError(f"Échec du chargement des shards: {', '.join(failed)}")
+    load_s = time.perf_counter() - start
+
+    merged = merge_shards(conn, shard_paths) if merge else 0
+    if checkpoint and merge:
+        checkpoint.log_batch(conn.cursor(), source_rows, merged, rejected, first_company_id)
+        conn.commit()
+    return {
+        'shards': len(shard_paths),
+        'lignes': len(df),
+        'rejets': rejected,
+        'fusionnees': merged,
+        'chargement_s': load_s,
+        'total_s': time.perf_counter() - start,
+    }, shard_paths
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Chargement d'un shard du Data Warehouse GenAI")
+    parser.add_argument('--worker', nargs=2, metavar=('JOB', 'SHARD_DB'), required=True)
+    args = parser.parse_args()
+
+    job_path, shard_path = args.worker
+    with open(job_path, 'rb') as f:
+        job = pickle.load(f)
+    count = load_shard(job['df'], shard_path, job['registre'])
+    os.remove(job_path)
+    print(f"  ✓ Shard {os.path.basename(shard_path)}: {count:,} enregistrements chargés")
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+Stockage colonnaire des faits GenAI en fichiers mappés en mémoire (NumPy memmap)
+
+Les faits d'un chargement sont convertis une seule fois, colonne par colonne,
+depuis la trame nettoyée et enrichie par l'ETL, puis ajoutés au stockage:
+    fact_store_genai/
+        manifest.json               # nombre de lignes, colonnes, membres des dimensions
+        <colonne>.npy               # mesures et clés de dimension (entiers)
+        <colonne>.codes.npy         # colonnes texte: codes entiers (encodage par dictionnaire)
+        <colonne>.labels.npy        #                 dictionnaire des libellés
+
+Adoption_ID et Company_ID sont ceux attribués par le chargement; le stockage suit
+FAIT_ADOPTION d'un chargement à l'autre (entrepôt existant, reprise --resume). Seuls
+les faits qu'il ne contient pas encore et qui n'appartiennent pas au chargement
+courant (lots d'un chargement interrompu, stockage créé sur un entrepôt existant ou
+référentiel modifié) sont relus dans SQLite.
+La relecture (np.load(mmap_mode='r')) ne copie rien: l'export Power BI, les
+agrégats et les graphiques lisent les mêmes pages du cache disque, et plusieurs
+processus d'analyse partagent les données sans charger chacun leur copie.
+Les attributs des dimensions (Région, Secteur, Fournisseur...) sont résolus à la
+lecture à partir des membres enregistrés dans le manifeste.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from reference_data import REFERENCE_TABLES, UNKNOWN_KEY
+
+FACT_STORE_DIR = 'fact_store_genai'
+
+# Colonnes numériques du stockage -> type
+NUMERIC_COLUMNS = {
+    'Adoption_ID': np.int64,
+    'Company_ID': np.int64,
+    'Geography_ID': np.int32,
+    'Industry_ID': np.int32,
+    'GenAI_Tool_ID': np.int32,
+    'Adoption_Year': np.int32,
+    'Employees_Impacted': np.int64,
+    'New_Roles_Created': np.int64,
+    'Training_Hours': np.int64,
+    'Productivity_Change': np.float64,
+    'Training_per_Employee': np.float64,
+    'New_Roles_Rate': np.float64,
+}
+
+TEXT_COLUMNS = [
+    'Company_Name', 'Company_Size', 'Adoption_Phase', 'Productivity_Impact',
+    'Sentiment_Category', 'Employee_Sentiment',
+]
+
+# Colonne du stockage -> colonne des données nettoyées
+FRAME_COLUMNS = {
+    'Adoption_Year': 'Adoption Year',
+    'Employees_Impacted': 'Number of Employees Impacted',
+    'New_Roles_Created': 'New Roles Created',
+    'Training_Hours': 'Training Hours Provided',
+    'Productivity_Change': 'Productivity Change (%)',
+    'Training_per_Employee': 'Training_per_Employee',
+    'New_Roles_Rate': 'New_Roles_Rate',
+    'Company_Name': 'Company Name',
+    'Company_Size': 'Company_Size',
+    'Adoption_Phase': 'Adoption_Phase',
+    'Productivity_Impact': 'Productivity_Impact',
+    'Sentiment_Category': 'Sentiment_Category',
+    'Employee_Sentiment': 'Employee Sentiment',
+}
+
+# Clé de dimension du stockage -> colonne des données nettoyées
+FRAME_KEYS = {
+    'Geography_ID': 'Country',
+    'Industry_ID': 'Industry',
+    'GenAI_Tool_ID': 'GenAI Tool',
+}
+
+# Faits absents du stockage, relus dans le Data Warehouse (texte du sentiment
+# relu dans DIM_SENTIMENT_TEXT si besoin)
+FACTS_QUERY = """
+SELECT
+    f.Adoption_ID, f.Company_ID, f.Geography_ID, f.Industry_ID, f.GenAI_Tool_ID,
+    f.Adoption_Year, f.Employees_Impacted, f.New_Roles_Created, f.Training_Hours,
+    f.Productivity_Change, f.Training_per_Employee, f.New_Roles_Rate,
+    c.Company_Name, c.Company_Size, f.Adoption_Phase, f.Productivity_Impact, f.Sentiment_Category,
+    COALESCE(f.Employee_Sentiment, s.Employee_Sentiment) AS Employee_Sentiment
+FROM FAIT_ADOPTION f
+LEFT JOIN DIM_COMPANY c ON f.Company_ID = c.Company_ID
+LEFT JOIN DIM_SENTIMENT_TEXT s ON f.Sentiment_Text_ID = s.Sentiment_Text_ID
+WHERE f.Adoption_ID > ? AND f.Adoption_ID < ?
+ORDER BY f.Adoption_ID
+"""
+
+# Colonnes et ordre de l'export Power BI (identiques à la requête SQL de l'étape 8)
+EXPORT_COLUMNS = [
+    'Adoption_ID', 'Company_Name', 'Company_Size', 'Country', 'Region',
+    'Industry_Name', 'Sector_Type', 'GenAI_Tool', 'Tool_Category', 'Tool_Provider',
+    'Adoption_Year', 'Adoption_Phase', 'Employees_Impacted', 'New_Roles_Created',
+    'Training_Hours', 'Productivity_Change', 'Productivity_Impact',
+    'Training_per_Employee', 'New_Roles_Rate', 'Sentiment_Category', 'Employee_Sentiment',
+]
+
+# Attribut de dimension -> (clé dans les faits, table, colonne de la dimension)
+DIMENSION_ATTRIBUTES = {
+    'Country': ('Geography_ID', 'DIM_GEOGRAPHY', 'Country'),
+    'Region': ('Geography_ID', 'DIM_GEOGRAPHY', 'Region'),
+    'Industry_Name': ('Industry_ID', 'DIM_INDUSTRY', 'Industry_Name'),
+    'Sector_Type': ('Industry_ID', 'DIM_INDUSTRY', 'Sector_Type'),
+    'GenAI_Tool': ('GenAI_Tool_ID', 'DIM_GENAI_TOOL', 'Tool_Name'),
+    'Tool_Category': ('GenAI_Tool_ID', 'DIM_GENAI_TOOL', 'Tool_Category'),
+    'Tool_Provider': ('GenAI_Tool_ID', 'DIM_GENAI_TOOL', 'Tool_Provider'),
+}
+
+
+def _read_manifest(path):
+    """Manifeste d'un stockage existant (None s'il n'existe pas)"""
+    manifest_path = os.path.join(path, 'manifest.json')
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _loaded_facts(conn, df, first_adoption_id, registry):
+    """Faits du chargement courant, construits depuis la trame chargée
+
+    Les identifiants attribués par le chargement (Adoption_ID, Company_ID) sont lus
+    dans FAIT_ADOPTION (clé primaire, sans jointure); les lignes rejetées n'y figurent pas.
+    """
+    ids = pd.read_sql_query(
+        "SELECT Adoption_ID, Company_ID FROM FAIT_ADOPTION WHERE Adoption_ID >= ? ORDER BY Adoption_ID",
+        conn, params=(first_adoption_id,))
+    rows = df.loc[ids['Company_ID']]
+    facts = {'Adoption_ID': ids['Adoption_ID'].to_numpy(), 'Company_ID': ids['Company_ID'].to_numpy()}
+    for col, source in FRAME_KEYS.items():
+        table = next(t for t, spec in REFERENCE_TABLES.items() if spec[1] == col)
+        facts[col] = rows[source].map(registry.keys[table]).fillna(UNKNOWN_KEY).to_numpy()
+    for col, source in FRAME_COLUMNS.items():
+        values = rows[source]
+        facts[col] = (pd.to_numeric(values) if col in NUMERIC_COLUMNS else values).to_numpy()
+    return pd.DataFrame(facts)
+
+
+def write_fact_store(conn, df, first_adoption_id, registry, path=FACT_STORE_DIR):
+    """Ajouter au stockage colonnaire les faits d'un chargement (une seule conversion)
+
+    df: données nettoyées du chargement indexées par Company_ID (les lignes rejetées
+    peuvent y figurer); first_adoption_id: premier Adoption_ID du chargement.
+    À appeler après le chargement: les faits sont ajoutés à la suite du stockage
+    existant. Un stockage d'un autre entrepôt ou d'une autre version du référentiel
+    (clés des faits promues par seed_dimensions) est reconstruit.
+    Les membres des dimensions (référentiel et hors référentiel) sont copiés
+    dans le manifeste.
+    """
+    os.makedirs(path, exist_ok=True)
+    manifest = _read_manifest(path)
+    if manifest and (manifest.get('version_referentiel') != registry.version
+                     or manifest.get('adoption_id_max', first_adoption_id) >= first_adoption_id):
+        manifest = None
+    stored_max = manifest['adoption_id_max'] if manifest else 0
+
+    new = _loaded_facts(conn, df, first_adoption_id, registry) if len(df) else pd.DataFrame()
+    if stored_max < first_adoption_id - 1:
+        # Faits écrits hors de ce chargement et absents du stockage
+        missing = pd.read_sql_query(FACTS_QUERY, conn, params=(stored_max, first_adoption_id))
+        new = pd.concat([missing, new], ignore_index=True) if len(new) else missing
+
+    columns = {}
+    for col, dtype in NUMERIC_COLUMNS.items():
+        values = new[col].to_numpy(dtype=dtype) if len(new) else np.empty(0, dtype=dtype)
+        if manifest:
+            values = np.concatenate([np.load(os.path.join(path, f'{col}.npy')), values])
+        np.save(os.path.join(path, f'{col}.npy'), values)
+        columns[col] = {'type': 'numeric', 'dtype': np.dtype(dtype).name}
+
+    for col in TEXT_COLUMNS:
+        values = new[col] if len(new) else pd.Series([], dtype=object)
+        labels = pd.Index(np.load(os.path.join(path, f'{col}.labels.npy')) if manifest else [], dtype=object)
+        # Libellés nouveaux ajoutés à la fin du dictionnaire: les codes existants restent valides
+        labels = labels.append(pd.Index(pd.unique(values.dropna())).difference(labels, sort=False))
+        codes = labels.get_indexer(values).astype(np.int32)
+        if manifest:
+            codes = np.concatenate([np.load(os.path.join(path, f'{col}.codes.npy')), codes])
+        np.save(os.path.join(path, f'{col}.codes.npy'), codes)
+        # Libellés en chaînes de longueur fixe: relisibles en memmap sans pickle
+        np.save(os.path.join(path, f'{col}.labels.npy'), np.asarray(labels, dtype=str))
+        columns[col] = {'type': 'text', 'cardinalite': int(len(labels))}
+
+    dimensions = {}
+    for table, (_, key_col, natural_col, attrs) in REFERENCE_TABLES.items():
+        members = pd.read_sql_query(f"SELECT {key_col}, {', '.join([natural_col] + attrs)} FROM {table}", conn)
+        dimensions[table] = members.rename(columns={key_col: 'cle'}).to_dict('records')
+
+    manifest = {
+        'lignes': (manifest['lignes'] if manifest else 0) + len(new),
+        'adoption_id_max': int(new['Adoption_ID'].max()) if len(new) else stored_max,
+        'version_referentiel': registry.version,
+        'colonnes': columns,
+        'dimensions': dimensions,
+    }
+    with open(os.path.join(path, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return manifest
+
+
+class FactStore:
+    """Lecture zéro-copie du stockage colonnaire des faits"""
+
+    def __init__(self, path=FACT_STORE_DIR):
+        self.path = path
+        with open(os.path.join(path, 'manifest.json'), encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self._cache = {}
+
+    def __len__(self):
+        return self.manifest['lignes']
+
+    def _load(self, filename):
+        if filename not in self._cache:
+            self._cache[filename] = np.load(os.path.join(self.path, filename), mmap_mode='r')
+        return self._cache[filename]
+
+    def column(self, name):
+        """Colonne numérique ou clé de dimension (np.memmap, sans copie)"""
+        return self._load(f'{name}.npy')
+
+    def codes(self, name):
+        """Codes d'une colonne texte (np.memmap) et son dictionnaire de libellés"""
+        return self._load(f'{name}.codes.npy'), self._load(f'{name}.labels.npy')
+
+    def _dimension_labels(self, attribute):
+        """Libellés d'un attribut de dimension indexés par clé (tableau dense)"""
+        key_col, table, dim_col = DIMENSION_ATTRIBUTES[attribute]
+        rows = self.manifest['dimensions'][table]
+        keys = np.array([r['cle'] for r in rows])
+        labels = np.empty(keys.max() + 1, dtype=object)
+        labels[keys] = [r[dim_col] for r in rows]
+        return key_col, labels
+
+    def series(self, name):
+        """Colonne sous forme de pandas.Series (catégorielle pour les textes)"""
+        if name in NUMERIC_COLUMNS:
+            return pd.Series(self.column(name), name=name, copy=False)
+        if name in TEXT_COLUMNS:
+            codes, labels = self.codes(name)
+            return pd.Series(pd.Categorical.from_codes(codes, labels), name=name)
+        if name in DIMENSION_ATTRIBUTES:
+            key_col, labels = self._dimension_labels(name)
+            keys = self.column(key_col)
+            categories = pd.unique(labels[~pd.isnull(labels)])
+            codes = pd.Index(categories).get_indexer(labels)[keys]
+            return pd.Series(pd.Categorical.from_codes(codes, categories), name=name)
+        raise KeyError(f"Colonne inconnue: {name}")
+
+    def to_frame(self, columns=EXPORT_COLUMNS):
+        """DataFrame des faits (dimensions résolues via les membres du manifeste)"""
+        return pd.DataFrame({col: self.series(col) for col in columns})
+
+    def group_by(self, attribute, sums=(), means=()):
+        """Agrégat par attribut (COUNT, SUM, AVG) calculé par np.bincount sur les codes"""
+        series = self.series(attribute)
+        codes = series.cat.codes.to_numpy()
+        valid = codes >= 0
+        codes = codes[valid]
+        size = len(series.cat.categories)
+        counts = np.bincount(codes, minlength=size)
+        result = pd.DataFrame({attribute: series.cat.categories, 'Nombre': counts})
+        for col in sums:
+            result[col] = np.bincount(codes, weights=self.column(col)[valid], minlength=size)
+        for col in means:
+            total = np.bincount(codes, weights=self.column(col)[valid], minlength=size)
+            result[col] = total / np.where(counts == 0, np.nan, counts)
+        return result[result['Nombre'] > 0].reset_index(drop=True)
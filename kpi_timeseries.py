@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+Série temporelle précalculée des KPIs par année et phase d'adoption
+
+Table KPI_SERIE_ANNUELLE, clé (Adoption_Year, Adoption_Phase, Region, Sector_Type,
+Tool_Provider): quelques milliers de lignes que Power BI lit à la place de la table
+de faits pour les mesures par année, par phase et les comparaisons YoY.
+
+    mesures additives     Nombre, Nombre_Positif, Employees_Impacted, ... (comme le cube)
+    cumuls                Nombre_Cumule, Employees_Impacted_Cumule (depuis la
+                          première année de la série Region x Sector_Type x Tool_Provider)
+    année précédente      Nombre_Annee_Precedente, Nombre_YoY, Nombre_YoY_Pct,
+                          Productivite_Moyenne_Annee, Productivite_YoY
+
+Cumuls et YoY sont calculés au niveau série x année (toutes phases de l'année).
+Une année absente d'une série compte pour 0 adoption (productivité inconnue).
+Le taux d'adoption par phase reste un rapport de sommes: SUM(Nombre) de la phase
+/ SUM(Nombre) de la sélection.
+
+Calcul: une agrégation SQL, puis un groupby pandas avec shift/cumsum. Le
+rafraîchissement est incrémental: seules les années ayant reçu des faits depuis le
+dernier calcul (Adoption_ID > filigrane) et les suivantes sont recalculées. Après une
+réalimentation des dimensions de référence (REF_VERSION: Région, Type de secteur ou
+Fournisseur modifiés, clés promues), toute la série est recalculée.
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from reference_data import reference_state
+
+KPI_TABLE = 'KPI_SERIE_ANNUELLE'
+REFRESH_TABLE = 'KPI_SERIE_RAFRAICHISSEMENT'
+
+KEYS = ['Adoption_Year', 'Adoption_Phase', 'Region', 'Sector_Type', 'Tool_Provider']
+SERIES = ['Region', 'Sector_Type', 'Tool_Provider']
+MEASURES = [
+    'Nombre', 'Nombre_Positif', 'Employees_Impacted', 'New_Roles_Created',
+    'Training_Hours', 'Productivity_Sum', 'Training_per_Employee_Sum', 'New_Roles_Rate_Sum',
+]
+DERIVED = [
+    'Nombre_Cumule', 'Employees_Impacted_Cumule', 'Nombre_Annee_Precedente', 'Nombre_YoY',
+    'Nombre_YoY_Pct', 'Productivite_Moyenne_Annee', 'Productivite_YoY',
+]
+COLUMNS = KEYS + MEASURES + DERIVED
+
+KPI_DDL = f'''
+CREATE TABLE IF NOT EXISTS {KPI_TABLE} (
+    Adoption_Year INTEGER NOT NULL,
+    Adoption_Phase TEXT NOT NULL,
+    Region TEXT NOT NULL,
+    Sector_Type TEXT NOT NULL,
+    Tool_Provider TEXT NOT NULL,
+    Nombre INTEGER,
+    Nombre_Positif INTEGER,
+    Employees_Impacted INTEGER,
+    New_Roles_Created INTEGER,
+    Training_Hours INTEGER,
+    Productivity_Sum REAL,
+    Training_per_Employee_Sum REAL,
+    New_Roles_Rate_Sum REAL,
+    Nombre_Cumule INTEGER,
+    Employees_Impacted_Cumule INTEGER,
+    Nombre_Annee_Precedente INTEGER,
+    Nombre_YoY INTEGER,
+    Nombre_YoY_Pct REAL,
+    Productivite_Moyenne_Annee REAL,
+    Productivite_YoY REAL,
+    PRIMARY KEY (Adoption_Year, Adoption_Phase, Region, Sector_Type, Tool_Provider)
+)
+'''
+
+REFRESH_DDL = f'''
+CREATE TABLE IF NOT EXISTS {REFRESH_TABLE} (
+    Refresh_ID INTEGER PRIMARY KEY AUTOINCREMENT,
+    Refreshed_At TEXT,
+    Adoption_ID_Max INTEGER,
+    Annee_Depart INTEGER,
+    Lignes INTEGER,
+    Ref_Version TEXT
+)
+'''
+
+# Agrégation des faits au grain de la table (filtre optionnel sur les années)
+KPI_QUERY = """
+SELECT
+    f.Adoption_Year,
+    f.Adoption_Phase,
+    g.Region,
+    i.Sector_Type,
+    t.Tool_Provider,
+    COUNT(*) AS Nombre,
+    SUM(f.Sentiment_Category = 'Positif') AS Nombre_Positif,
+    SUM(f.Employees_Impacted) AS Employees_Impacted,
+    SUM(f.New_Roles_Created) AS New_Roles_Created,
+    SUM(f.Training_Hours) AS Training_Hours,
+    SUM(f.Productivity_Change) AS Productivity_Sum,
+    SUM(f.Training_per_Employee) AS Training_per_Employee_Sum,
+    SUM(f.New_Roles_Rate) AS New_Roles_Rate_Sum
+FROM FAIT_ADOPTION f
+JOIN DIM_GEOGRAPHY g ON f.Geography_ID = g.Geography_ID
+JOIN DIM_INDUSTRY i ON f.Industry_ID = i.Industry_ID
+JOIN DIM_GENAI_TOOL t ON f.GenAI_Tool_ID = t.GenAI_Tool_ID
+WHERE f.Adoption_Year >= ?
+GROUP BY f.Adoption_Year, f.Adoption_Phase, g.Region, i.Sector_Type, t.Tool_Provider
+"""
+
+
+def build_timeseries(base, prior_totals=None):
+    """Ajouter cumuls et comparaisons YoY à l'agrégation par clé (vectorisé)
+
+    prior_totals: cumuls par série des années antérieures à base (DataFrame
+    SERIES + Nombre, Employees_Impacted), pour un rafraîchissement incrémental.
+    """
+    # Totaux série x année (toutes phases), triés par année dans chaque série
+    yearly = (base.groupby(SERIES + ['Adoption_Year'], as_index=False)
+              [['Nombre', 'Employees_Impacted', 'Productivity_Sum']].sum()
+              .sort_values(SERIES + ['Adoption_Year'], kind='mergesort'))
+    series = yearly.groupby(SERIES, sort=False)
+
+    yearly['Nombre_Cumule'] = series['Nombre'].cumsum()
+    yearly['Employees_Impacted_Cumule'] = series['Employees_Impacted'].cumsum()
+    if prior_totals is not None and len(prior_totals):
+        prior = yearly[SERIES].merge(prior_totals, on=SERIES, how='left').fillna(0)
+        yearly['Nombre_Cumule'] += prior['Nombre'].to_numpy()
+        yearly['Employees_Impacted_Cumule'] += prior['Employees_Impacted'].to_numpy()
+
+    # Année précédente de la série: seulement si elle est consécutive
+    consecutive = (series['Adoption_Year'].shift() == yearly['Adoption_Year'] - 1).to_numpy()
+    previous_count = series['Nombre'].shift()
+    previous_productivity = series['Productivity_Sum'].shift() / previous_count
+    yearly['Productivite_Moyenne_Annee'] = yearly['Productivity_Sum'] / yearly['Nombre']
+    yearly['Nombre_Annee_Precedente'] = np.where(consecutive, previous_count, 0).astype(np.int64)
+    yearly['Nombre_YoY'] = yearly['Nombre'] - yearly['Nombre_Annee_Precedente']
+    yearly['Nombre_YoY_Pct'] = (yearly['Nombre_YoY'] / yearly['Nombre_Annee_Precedente']
+                                .where(yearly['Nombre_Annee_Precedente'] > 0) * 100)
+    yearly['Productivite_YoY'] = (yearly['Productivite_Moyenne_Annee']
+                                  - previous_productivity.where(consecutive))
+
+    derived = yearly[SERIES + ['Adoption_Year'] + DERIVED]
+    return base.merge(derived, on=SERIES + ['Adoption_Year'], how='left')[COLUMNS]
+
+
+def refresh_kpi_timeseries(conn, full=False):
+    """Créer ou mettre à jour KPI_SERIE_ANNUELLE; retourne (première année recalculée, lignes écrites)
+
+    Sans full, seules les années des faits ajoutés depuis le dernier rafraîchissement
+    (et les années suivantes, dont les cumuls changent) sont recalculées, sauf si
+    les dimensions de référence ont été réalimentées depuis (tout est recalculé).
+    (None, 0) si aucun fait nouveau.
+    """
+    conn.execute(KPI_DDL)
+    conn.execute(REFRESH_DDL)
+    # Journal créé avant l'ajout de Ref_Version
+    if 'Ref_Version' not in {row[1] for row in conn.execute(f"PRAGMA table_info({REFRESH_TABLE})")}:
+        conn.execute(f"ALTER TABLE {REFRESH_TABLE} ADD COLUMN Ref_Version TEXT")
+    max_id = conn.execute("SELECT COALESCE(MAX(Adoption_ID), 0) FROM FAIT_ADOPTION").fetchone()[0]
+    ref_version = reference_state(conn)
+    watermark = conn.execute(
+        f"SELECT Adoption_ID_Max, Ref_Version FROM {REFRESH_TABLE} ORDER BY Refresh_ID DESC LIMIT 1"
+    ).fetchone()
+
+    if full or watermark is None or watermark[0] > max_id or watermark[1] != ref_version:
+        # Premier calcul (ou faits supprimés, ou libellés des dimensions modifiés depuis): tout recalculer
+        full = True
+        start = conn.execute("SELECT MIN(Adoption_Year) FROM FAIT_ADOPTION").fetchone()[0]
+    else:
+        start = conn.execute("SELECT MIN(Adoption_Year) FROM FAIT_ADOPTION WHERE Adoption_ID > ?",
+                             (watermark[0],)).fetchone()[0]
+    if start is None:
+        if full:
+            conn.execute(f"DELETE FROM {KPI_TABLE}")
+        conn.commit()
+        return None, 0
+
+    # L'année précédant start sert de référence YoY; les cumuls antérieurs
+    # proviennent de la table existante
+    base = pd.read_sql_query(KPI_QUERY, conn, params=(start - 1,))
+    prior_totals = pd.read_sql_query(f'''
+    SELECT Region, Sector_Type, Tool_Provider,
+           SUM(Nombre) AS Nombre, SUM(Employees_Impacted) AS Employees_Impacted
+    FROM {KPI_TABLE}
+    WHERE Adoption_Year < ?
+    GROUP BY Region, Sector_Type, Tool_Provider
+    ''', conn, params=(start - 1,))
+    table = build_timeseries(base, prior_totals)
+    table = table[table['Adoption_Year'] >= start]
+
+    rows = table.astype(object).where(table.notna(), None).itertuples(index=False, name=None)
+    conn.execute(f"DELETE FROM {KPI_TABLE} WHERE Adoption_Year >= ?", (start,))
+    conn.executemany(f"INSERT INTO {KPI_TABLE} ({', '.join(COLUMNS)}) "
+                     f"VALUES ({', '.join('?' * len(COLUMNS))})", rows)
+    conn.execute(f'''
+    INSERT INTO {REFRESH_TABLE} (Refreshed_At, Adoption_ID_Max, Annee_Depart, Lignes, Ref_Version)
+    VALUES (?, ?, ?, ?, ?)
+    ''', (datetime.now().isoformat(timespec='seconds'), max_id, start, len(table), ref_version))
+    conn.commit()
+    return start, len(table)
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Statistiques descriptives parallèles des colonnes numériques (nettoyage et entrepôt)
+
+Chaque lot de lignes est résumé par ses statistiques suffisantes, calculées par
+paires de colonnes (observations communes, comme pandas):
+
+    n[i, j]         nombre de lignes où i et j sont renseignées
+    mean[i, j]      moyenne de i sur ces lignes
+    m2[i, j]        Σ (x_i - mean[i, j])²
+    comoment[i, j]  Σ (x_i - mean[i, j]) (x_j - mean[j, i])
+
+Les lots sont résumés en parallèle (produits matriciels NumPy, qui relâchent le
+GIL) puis fusionnés deux à deux (formules de Chan, généralisation de Welford).
+Moyennes, variances, covariances et corrélations sont égales à celles de pandas
+(.mean(), .var(), .cov(), .corr()) à la précision numérique près; les quantiles
+sont exacts (np.nanquantile, interpolation linéaire comme pandas).
+
+    stats = NumericStats.from_frame(df_cleaned, numeric_cols)
+    stats.corr()
+    NumericStats.from_warehouse(conn).describe()
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+from semantic_layer import MEASURE_COLUMNS
+
+CHUNK_SIZE = 250_000
+
+
+class NumericStats:
+    """Statistiques suffisantes fusionnables d'un ensemble de colonnes numériques"""
+
+    def __init__(self, columns, n, mean, m2, comoment, minimum, maximum):
+        self.columns = list(columns)
+        self.n = n
+        self.mean_ = mean
+        self.m2 = m2
+        self.comoment = comoment
+        self.minimum = minimum
+        self.maximum = maximum
+
+    @classmethod
+    def from_array(cls, values, columns):
+        """Résumer un bloc de valeurs (lignes x colonnes, NaN = valeur absente)"""
+        values = np.asarray(values, dtype=np.float64)
+        valid = ~np.isnan(values)
+        if valid.all():
+            return cls._from_complete(values, columns)
+        weights = valid.astype(np.float64)
+        filled = np.where(valid, values, 0.0)
+        # Décalage par la moyenne du bloc: sommes de produits bien conditionnées
+        counts = weights.sum(axis=0)
+        shift = filled.sum(axis=0) / np.maximum(counts, 1)
+        centered = np.where(valid, values - shift, 0.0)
+        minimum = np.where(valid, values, np.inf).min(axis=0, initial=np.inf)
+        maximum = np.where(valid, values, -np.inf).max(axis=0, initial=-np.inf)
+
+        n = weights.T @ weights
+        sums = centered.T @ weights                     # Σ x_i sur les lignes communes à (i, j)
+        squares = (centered * centered).T @ weights
+        products = centered.T @ centered
+        with np.errstate(invalid='ignore', divide='ignore'):
+            shifted_mean = np.where(n > 0, sums / n, 0.0)
+            m2 = np.where(n > 0, squares - sums * shifted_mean, 0.0)
+            comoment = np.where(n > 0, products - sums * sums.T / n, 0.0)
+        mean = np.where(n > 0, shifted_mean + shift[:, None], 0.0)
+        return cls(columns, n, mean, m2, comoment, minimum, maximum)
+
+    @classmethod
+    def _from_complete(cls, values, columns):
+        """Bloc sans valeur absente: statistiques identiques pour toutes les paires"""
+        rows, width = values.shape
+        if rows == 0:
+            zeros = np.zeros((width, width))
+            return cls(columns, zeros, zeros, zeros, zeros, np.full(width, np.inf), np.full(width, -np.inf))
+        mean = values.mean(axis=0)
+        centered = values - mean
+        comoment = centered.T @ centered
+        return cls(columns, np.full((width, width), float(rows)), np.repeat(mean[:, None], width, axis=1),
+                   np.repeat(np.diag(comoment)[:, None], width, axis=1), comoment,
+                   values.min(axis=0), values.max(axis=0))
+
+    def merge(self, other):
+        """Fusionner deux résumés (formules de Chan: moyennes et co-moments par paire)"""
+        n = self.n + other.n
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.where(n > 0, self.n * other.n / n, 0.0)
+            delta = other.mean_ - self.mean_
+            mean = self.mean_ + np.where(n > 0, delta * other.n / n, 0.0)
+        return NumericStats(
+            self.columns, n, mean,
+            self.m2 + other.m2 + delta * delta * weight,
+            self.comoment + other.comoment + delta * delta.T * weight,
+            np.minimum(self.minimum, other.minimum),
+            np.maximum(self.maximum, other.maximum),
+        )
+
+    @classmethod
+    def from_chunks(cls, chunks, columns, workers=None):
+        """Résumer des lots de DataFrame (itérable) en parallèle puis les fusionner"""
+        columns = list(columns)
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            parts = list(pool.map(lambda chunk: cls.from_array(chunk[columns].to_numpy(np.float64), columns),
+                                  chunks))
+        if not parts:
+            return cls.from_array(np.empty((0, len(columns))), columns)
+        return reduce(cls.merge, parts)
+
+    @classmethod
+    def from_frame(cls, df, columns=None, chunksize=CHUNK_SIZE, workers=None):
+        """Résumer les colonnes d'un DataFrame par lots de chunksize lignes"""
+        columns = list(columns or df.select_dtypes('number').columns)
+        chunks = (df.iloc[start:start + chunksize] for start in range(0, len(df), chunksize))
+        return cls.from_chunks(chunks, columns, workers)
+
+    @classmethod
+    def from_warehouse(cls, conn, columns=MEASURE_COLUMNS, chunksize=CHUNK_SIZE, workers=None):
+        """Résumer les mesures de FAIT_ADOPTION, lues par lots (jamais chargées en entier)"""
+        sql = f"SELECT {', '.join(columns)} FROM FAIT_ADOPTION"
+        return cls.from_chunks(pd.read_sql_query(sql, conn, chunksize=chunksize), columns, workers)
+
+    # ------------------------------------------------------------------ résultats
+    def _series(self, values):
+        return pd.Series(values, index=self.columns)
+
+    def count(self):
+        return self._series(np.diag(self.n))
+
+    def mean(self):
+        n = np.diag(self.n)
+        return self._series(np.where(n > 0, np.diag(self.mean_), np.nan))
+
+    def var(self, ddof=1):
+        n = np.diag(self.n)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self._series(np.where(n > ddof, np.diag(self.m2) / (n - ddof), np.nan))
+
+    def std(self, ddof=1):
+        return np.sqrt(self.var(ddof))
+
+    def min(self):
+        return self._series(np.where(np.diag(self.n) > 0, self.minimum, np.nan))
+
+    def max(self):
+        return self._series(np.where(np.diag(self.n) > 0, self.maximum, np.nan))
+
+    def cov(self, ddof=1):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values = np.where(self.n > ddof, self.comoment / (self.n - ddof), np.nan)
+        return pd.DataFrame(values, index=self.columns, columns=self.columns)
+
+    def corr(self):
+        """Corrélation de Pearson par paires d'observations communes (comme DataFrame.corr)"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values = np.where(self.n > 0, self.comoment / np.sqrt(self.m2 * self.m2.T), np.nan)
+        return pd.DataFrame(values, index=self.columns, columns=self.columns)
+
+    def describe(self, quantile_values=None):
+        """Équivalent de DataFrame.describe() (quantiles: résultat de quantiles())"""
+        table = pd.DataFrame({'count': self.count(), 'mean': self.mean(), 'std': self.std(),
+                              'min': self.min()})
+        if quantile_values is not None:
+            for q, row in quantile_values.iterrows():
+                table[f'{q:.0%}'] = row
+        table['max'] = self.max()
+        return table.T
+
+
+def quantiles(df, columns=None, q=(0.25, 0.5, 0.75), workers=None):
+    """Quantiles exacts des colonnes (une colonne par tâche), comme DataFrame.quantile"""
+    columns = list(columns or df.select_dtypes('number').columns)
+
+    def column_quantiles(column):
+        values = df[column].to_numpy(np.float64)
+        return np.nanquantile(values, q) if np.any(~np.isnan(values)) else np.full(len(q), np.nan)
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        results = list(pool.map(column_quantiles, columns))
+    return pd.DataFrame(np.column_stack(results) if results else np.empty((len(q), 0)),
+                        index=list(q), columns=columns)
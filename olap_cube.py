@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+Cube OLAP en mémoire pour les KPIs du dashboard GenAI
+Stockage colonnaire NumPy avec encodage par dictionnaire des axes
+
+Axes: Country × Industry_Name × GenAI_Tool × Adoption_Year × Sentiment_Category
+Agrégations hiérarchiques: Country -> Region, Industry_Name -> Sector_Type,
+Adoption_Year -> Adoption_Phase
+
+Toutes les mesures stockées sont additives; les KPIs du guide Power BI
+(03_Guide_PowerBI_KPIs.md) sont des ratios de ces mesures:
+
+    Productivite_Moyenne   = Productivity_Sum / Nombre
+    Taux_Sentiment_Positif = Nombre_Positif / Nombre
+    ROI_Formation          = Productivite_Moyenne / (Training_per_Employee_Sum / Nombre)
+    Taux_Nouveaux_Roles    = New_Roles_Rate_Sum / Nombre
+    Part_Entreprises       = Nombre / Nombre du groupe parent (le dernier axe de
+                             l'agrégation est réparti au sein des précédents:
+                             by=['Region', 'Adoption_Phase'] -> taux par phase de
+                             chaque région)
+
+Exemple:
+    cube = OlapCube.from_warehouse(conn)
+    cube.slice(Region='Europe', Adoption_Year=[2023, 2024]).aggregate(['Adoption_Phase'])
+    cube.yoy('Productivite_Moyenne', by=['Sector_Type'])
+"""
+
+import numpy as np
+import pandas as pd
+
+AXES = ['Country', 'Industry_Name', 'GenAI_Tool', 'Adoption_Year', 'Sentiment_Category']
+
+# Niveau agrégé -> axe de base
+ROLLUPS = {
+    'Region': 'Country',
+    'Sector_Type': 'Industry_Name',
+    'Adoption_Phase': 'Adoption_Year',
+}
+
+# Libellé des valeurs manquantes des axes texte (membre "Inconnu" des dimensions)
+UNKNOWN_LABEL = 'Inconnu'
+
+MEASURES = [
+    'Nombre', 'Nombre_Positif', 'Employees_Impacted', 'New_Roles_Created',
+    'Training_Hours', 'Productivity_Sum', 'Training_per_Employee_Sum', 'New_Roles_Rate_Sum',
+]
+
+# Requête d'alimentation depuis le Data Warehouse (une seule agrégation SQL)
+CUBE_QUERY = """
+SELECT
+    g.Country,
+    g.Region,
+    i.Industry_Name,
+    i.Sector_Type,
+    t.Tool_Name AS GenAI_Tool,
+    f.Adoption_Year,
+    f.Adoption_Phase,
+    f.Sentiment_Category,
+    COUNT(*) AS Nombre,
+    SUM(f.Sentiment_Category = 'Positif') AS Nombre_Positif,
+    SUM(f.Employees_Impacted) AS Employees_Impacted,
+    SUM(f.New_Roles_Created) AS New_Roles_Created,
+    SUM(f.Training_Hours) AS Training_Hours,
+    SUM(f.Productivity_Change) AS Productivity_Sum,
+    SUM(f.Training_per_Employee) AS Training_per_Employee_Sum,
+    SUM(f.New_Roles_Rate) AS New_Roles_Rate_Sum
+FROM FAIT_ADOPTION f
+JOIN DIM_GEOGRAPHY g ON f.Geography_ID = g.Geography_ID
+JOIN DIM_INDUSTRY i ON f.Industry_ID = i.Industry_ID
+JOIN DIM_GENAI_TOOL t ON f.GenAI_Tool_ID = t.GenAI_Tool_ID
+GROUP BY g.Country, i.Industry_Name, t.Tool_Name, f.Adoption_Year, f.Sentiment_Category
+"""
+
+# Colonnes des données nettoyées -> noms des axes du cube
+SOURCE_COLUMNS = {
+    'Industry': 'Industry_Name',
+    'GenAI Tool': 'GenAI_Tool',
+    'Adoption Year': 'Adoption_Year',
+    'Number of Employees Impacted': 'Employees_Impacted',
+    'New Roles Created': 'New_Roles_Created',
+    'Training Hours Provided': 'Training_Hours',
+    'Productivity Change (%)': 'Productivity_Sum',
+    'Training_per_Employee': 'Training_per_Employee_Sum',
+    'New_Roles_Rate': 'New_Roles_Rate_Sum',
+}
+
+
+# KPI -> formule sur les mesures additives (Series pandas ou scalaires)
+KPI_FORMULAS = {
+    'Productivite_Moyenne': lambda m: m['Productivity_Sum'] / m['Nombre'],
+    'Taux_Sentiment_Positif': lambda m: m['Nombre_Positif'] / m['Nombre'] * 100,
+    'Formation_Moy_par_Employe': lambda m: m['Training_per_Employee_Sum'] / m['Nombre'],
+    'ROI_Formation': lambda m: m['Productivity_Sum'] / m['Training_per_Employee_Sum'],
+    'Taux_Nouveaux_Roles': lambda m: m['New_Roles_Rate_Sum'] / m['Nombre'],
+}
+
+
+def add_kpis(result, within=()):
+    """Ajouter les KPIs (ratios de mesures additives) à un résultat agrégé
+
+    within: attributs du groupe parent de Part_Entreprises (total de la tranche si vide).
+    """
+    measures = result[MEASURES].replace(0, np.nan)
+    for kpi, formula in KPI_FORMULAS.items():
+        result[kpi] = formula(measures)
+    within = list(within)
+    total = result.groupby(within)['Nombre'].transform('sum') if within else result['Nombre'].sum()
+    result['Part_Entreprises'] = result['Nombre'] / total * 100
+    return result
+
+
+class OlapCube:
+    """Cube dense (axes encodés par dictionnaire) de mesures additives"""
+
+    def __init__(self, levels, data, rollups):
+        self.levels = levels    # axe -> np.ndarray des libellés (dictionnaire)
+        self.data = data        # np.ndarray de forme (len(axe)..., len(MEASURES))
+        self.rollups = rollups  # niveau agrégé -> {libellé de base: libellé agrégé}
+
+    # ------------------------------------------------------------------ construction
+    @classmethod
+    def from_frame(cls, df):
+        """Construire le cube depuis un DataFrame (faits détaillés ou pré-agrégés)
+
+        Accepte les colonnes des données nettoyées (Industry, GenAI Tool, ...) ou
+        celles du Data Warehouse (Industry_Name, GenAI_Tool, ...). Les valeurs
+        manquantes des axes texte sont regroupées sous UNKNOWN_LABEL; les faits
+        sans Adoption_Year sont écartés (nombre affiché).
+        """
+        df = df.rename(columns=SOURCE_COLUMNS)
+        missing_year = df['Adoption_Year'].isna()
+        if missing_year.any():
+            print(f"  ⚠️  Cube OLAP: {int(missing_year.sum())} faits sans Adoption_Year écartés")
+            df = df[~missing_year].astype({'Adoption_Year': int})
+        df = df.fillna({axis: UNKNOWN_LABEL for axis in AXES if axis != 'Adoption_Year'})
+        if 'Nombre' not in df.columns:
+            df = df.assign(Nombre=1,
+                           Nombre_Positif=(df['Sentiment_Category'] == 'Positif').astype(int))
+
+        levels = {}
+        codes = []
+        for axis in AXES:
+            axis_codes, uniques = pd.factorize(df[axis], sort=True)
+            levels[axis] = np.asarray(uniques)
+            codes.append(axis_codes)
+
+        shape = tuple(len(levels[a]) for a in AXES)
+        flat = np.ravel_multi_index(codes, shape)
+        size = int(np.prod(shape))
+        data = np.empty(shape + (len(MEASURES),), dtype=np.float64)
+        for m, measure in enumerate(MEASURES):
+            data[..., m] = np.bincount(flat, weights=df[measure].to_numpy(dtype=np.float64),
+                                       minlength=size).reshape(shape)
+
+        rollups = {}
+        for level, base in ROLLUPS.items():
+            if level in df.columns:
+                pairs = df[[base, level]].drop_duplicates(base)
+                rollups[level] = dict(zip(pairs[base], pairs[level]))
+        return cls(levels, data, rollups)
+
+    @classmethod
+    def from_warehouse(cls, conn):
+        """Construire le cube par une seule agrégation SQL sur le Data Warehouse"""
+        return cls.from_frame(pd.read_sql_query(CUBE_QUERY, conn))
+
+    # ------------------------------------------------------------------ requêtes
+    def _axis_labels(self, name):
+        """Libellés d'un axe ou d'un niveau agrégé, alignés sur l'axe de base"""
+        if name in self.levels:
+            return name, self.levels[name]
+        if name in self.rollups:
+            base = ROLLUPS[name]
+            mapping = self.rollups[name]
+            return base, np.array([mapping.get(v) for v in self.levels[base]], dtype=object)
+        raise KeyError(f"Axe inconnu: {name}")
+
+    def slice(self, **filters):
+        """Filtrer le cube (valeur unique ou liste de valeurs par axe ou niveau agrégé)"""
+        levels = dict(self.levels)
+        data = self.data
+        for name, values in filters.items():
+            base = self._axis_labels(name)[0]
+            if base == name:
+                labels = levels[base]
+            else:
+                # Libellés agrégés recalculés sur l'axe de base déjà filtré
+                labels = np.array([self.rollups[name].get(v) for v in levels[base]], dtype=object)
+            values = values if isinstance(values, (list, tuple, set)) else [values]
+            keep = np.isin(labels, list(values))
+            axis = AXES.index(base)
+            data = np.compress(keep, data, axis=axis)
+            levels[base] = levels[base][keep]
+        return OlapCube(levels, data, self.rollups)
+
+    def aggregate(self, by=(), kpis=True):
+        """Agréger les mesures par axes et/ou niveaux agrégés (ex: ['Region', 'Adoption_Year'])"""
+        by = list(by)
+        bases = [self._axis_labels(name)[0] for name in by]
+        kept = [a for a in AXES if a in bases]
+        data = self.data.sum(axis=tuple(AXES.index(a) for a in AXES if a not in kept))
+
+        if kept:
+            grids = np.meshgrid(*[self.levels[a] for a in kept], indexing='ij')
+            result = pd.DataFrame({a: g.ravel() for a, g in zip(kept, grids)})
+            measures = data.reshape(-1, len(MEASURES))
+        else:
+            result = pd.DataFrame(index=[0])
+            measures = data.reshape(1, -1)
+        result[MEASURES] = measures
+
+        for name in by:
+            if name in self.rollups:
+                result[name] = result[ROLLUPS[name]].map(self.rollups[name])
+        if kept:
+            result = result.groupby(by, sort=True)[MEASURES].sum().reset_index()
+        result = result[result['Nombre'] > 0].reset_index(drop=True)
+        return add_kpis(result, within=by[:-1]) if kpis else result
+
+    def totals(self, **filters):
+        """Mesures additives totales d'une tranche (chemin NumPy, sans pandas)"""
+        data = self.slice(**filters).data if filters else self.data
+        return dict(zip(MEASURES, data.reshape(-1, len(MEASURES)).sum(axis=0)))
+
+    def value(self, kpi, **filters):
+        """Valeur scalaire d'un KPI ou d'une mesure sur une tranche du cube"""
+        totals = self.totals(**filters)
+        if kpi in totals:
+            return totals[kpi]
+        if not totals['Nombre']:
+            return np.nan
+        return KPI_FORMULAS[kpi](totals)
+
+    def yoy(self, kpi='Productivite_Moyenne', by=()):
+        """Écart d'une année sur l'autre (YoY) d'un KPI, par groupe
+
+        Chaque année est comparée à l'année civile précédente du même groupe
+        (jointure sur Adoption_Year - 1): sans faits l'année précédente, l'écart est NaN.
+        """
+        by = list(by)
+        result = self.aggregate(by + ['Adoption_Year'])
+        previous = result[by + ['Adoption_Year', kpi]].assign(Adoption_Year=result['Adoption_Year'] + 1)
+        result = result.merge(previous, on=by + ['Adoption_Year'], how='left', suffixes=('', '_precedent'))
+        result[f'{kpi}_YoY'] = result[kpi] - result[f'{kpi}_precedent']
+        result = result.sort_values(by + ['Adoption_Year'])
+        return result[by + ['Adoption_Year', kpi, f'{kpi}_YoY']].reset_index(drop=True)
+
+    # ------------------------------------------------------------------ persistance
+    def to_frame(self):
+        """Cellules non vides du cube au format long (axes + niveaux agrégés + mesures)"""
+        result = self.aggregate(AXES, kpis=False)
+        for level, base in ROLLUPS.items():
+            if level in self.rollups:
+                result[level] = result[base].map(self.rollups[level])
+        return result
+
+    def to_parquet(self, path):
+        """Sauvegarder le cube au format Parquet (nécessite pyarrow)"""
+        frame = self.to_frame()
+        for col in AXES + list(self.rollups):
+            if col != 'Adoption_Year':
+                frame[col] = frame[col].astype('category')
+        frame.to_parquet(path, index=False)
+
+    @classmethod
+    def from_parquet(cls, path):
+        """Recharger un cube sauvegardé par to_parquet"""
+        frame = pd.read_parquet(path)
+        for col in frame.columns:
+            if isinstance(frame[col].dtype, pd.CategoricalDtype):
+                frame[col] = frame[col].astype(object)
+        return cls.from_frame(frame)
+
+    def __repr__(self):
+        shape = ' × '.join(f"{a}[{len(self.levels[a])}]" for a in AXES)
+        return f"<OlapCube {shape}, {int(self.data[..., 0].sum()):,} faits>"
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Chaîne complète du projet BI GenAI: nettoyage puis ETL
+
+Les deux scripts communiquent par fichiers; ce lanceur les déclare comme étapes
+d'un DAG (dag_runner) avec leurs fichiers d'entrée et de sortie, exécute chaque
+script dans un processus neuf et affiche le rapport de durées (chemin critique).
+Les options non reconnues sont transmises au script ETL.
+
+Usage:
+    python pipeline_genai.py
+    python pipeline_genai.py --skip-cleaning --mode pipeline --no-charts
+"""
+
+import argparse
+import subprocess
+import sys
+
+from dag_runner import DagRunner
+
+RAW_FILE = 'enterprise_genai_data.csv'
+CLEANED_FILE = 'donnees_genai_nettoyees.csv'
+DB_FILE = 'datawarehouse_genai.db'
+EXPORT_FILE = 'donnees_powerbi_genai.csv'
+
+
+def run_script(script, *script_args):
+    """Exécuter un script du projet; erreur si son code de retour est non nul"""
+    subprocess.run([sys.executable, script, *script_args], check=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Nettoyage puis ETL du projet GenAI")
+    parser.add_argument('--skip-cleaning', action='store_true',
+                        help=f"Réutiliser {CLEANED_FILE} sans relancer le nettoyage")
+    args, etl_args = parser.parse_known_args()
+
+    runner = DagRunner()
+    if not args.skip_cleaning:
+        runner.add('nettoyage', run_script, inputs=[RAW_FILE], outputs=[CLEANED_FILE],
+                   args=('01_Nettoyage_GenAI.py',))
+    runner.add('etl', run_script, inputs=[CLEANED_FILE], outputs=[DB_FILE, EXPORT_FILE],
+               args=('02_ETL_DataWarehouse_GenAI.py', *etl_args))
+    runner.run()
+
+    print("\n⏱️  Durées de la chaîne complète:")
+    for line in runner.report():
+        print(line)
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+Export Power BI ciblé: projection de colonnes et filtres poussés dans la source
+
+L'export complet de l'étape 8 contient les 21 colonnes de chaque fait, dont les
+textes Company_Name et Employee_Sentiment. La plupart des pages du dashboard
+n'utilisent que quelques colonnes, sur quelques années ou régions.
+
+    export_frame(source, colonnes, filtres)
+        source = connexion SQLite: la requête générée ne sélectionne que les
+                 colonnes demandées, ne joint que les dimensions nécessaires et
+                 applique les filtres dans le WHERE (paramètres SQL);
+        source = fichier Parquet: lecture des seules colonnes demandées, filtres
+                 transmis au lecteur Parquet (groupes de lignes ignorés).
+
+    export_pages(source, ...)
+        un extrait par page du rapport (referentiel/pages_powerbi.json).
+
+Usage:
+    python powerbi_export.py                                   # toutes les pages
+    python powerbi_export.py --pages vue_ensemble outils --annees 2023 2024
+    python powerbi_export.py --colonnes Country Adoption_Year Productivity_Change --regions Europe
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+
+import pandas as pd
+
+from reference_data import REFERENCE_DIR
+
+PAGES_FILE = os.path.join(REFERENCE_DIR, 'pages_powerbi.json')
+EXPORT_DIR = 'exports_powerbi'
+
+# Colonne de l'export -> (expression SQL, alias de la dimension à joindre)
+# Même contenu et même ordre que etl_core.EXPORT_QUERY
+COLUMNS = {
+    'Adoption_ID': ('f.Adoption_ID', None),
+    'Company_Name': ('c.Company_Name', 'c'),
+    'Company_Size': ('c.Company_Size', 'c'),
+    'Country': ('g.Country', 'g'),
+    'Region': ('g.Region', 'g'),
+    'Industry_Name': ('i.Industry_Name', 'i'),
+    'Sector_Type': ('i.Sector_Type', 'i'),
+    'GenAI_Tool': ('t.Tool_Name', 't'),
+    'Tool_Category': ('t.Tool_Category', 't'),
+    'Tool_Provider': ('t.Tool_Provider', 't'),
+    'Adoption_Year': ('f.Adoption_Year', None),
+    'Adoption_Phase': ('f.Adoption_Phase', None),
+    'Employees_Impacted': ('f.Employees_Impacted', None),
+    'New_Roles_Created': ('f.New_Roles_Created', None),
+    'Training_Hours': ('f.Training_Hours', None),
+    'Productivity_Change': ('f.Productivity_Change', None),
+    'Productivity_Impact': ('f.Productivity_Impact', None),
+    'Training_per_Employee': ('f.Training_per_Employee', None),
+    'New_Roles_Rate': ('f.New_Roles_Rate', None),
+    'Sentiment_Category': ('f.Sentiment_Category', None),
+    'Employee_Sentiment': ('COALESCE(f.Employee_Sentiment, s.Employee_Sentiment)', 's'),
+}
+
+JOINS = {
+    'c': "LEFT JOIN DIM_COMPANY c ON f.Company_ID = c.Company_ID",
+    'g': "LEFT JOIN DIM_GEOGRAPHY g ON f.Geography_ID = g.Geography_ID",
+    'i': "LEFT JOIN DIM_INDUSTRY i ON f.Industry_ID = i.Industry_ID",
+    't': "LEFT JOIN DIM_GENAI_TOOL t ON f.GenAI_Tool_ID = t.GenAI_Tool_ID",
+    's': "LEFT JOIN DIM_SENTIMENT_TEXT s ON f.Sentiment_Text_ID = s.Sentiment_Text_ID",
+}
+
+# Options de la ligne de commande -> colonne filtrée
+FILTER_OPTIONS = {
+    'annees': 'Adoption_Year',
+    'regions': 'Region',
+    'secteurs': 'Sector_Type',
+    'outils': 'GenAI_Tool',
+}
+
+
+def _check_columns(columns):
+    unknown = [c for c in columns if c not in COLUMNS]
+    if unknown:
+        raise ValueError(f"Colonne inconnue dans l'export Power BI: {', '.join(unknown)}")
+
+
+def build_export_query(columns=None, filters=None):
+    """Requête SQL d'export réduite aux colonnes et dimensions utiles: (sql, paramètres)
+
+    filters: {colonne: valeur ou liste de valeurs} (égalité / IN).
+    """
+    columns = list(columns or COLUMNS)
+    filters = {col: v if isinstance(v, (list, tuple, set)) else [v]
+               for col, v in (filters or {}).items()}
+    _check_columns(columns + list(filters))
+
+    # Jointures dans l'ordre de la requête complète, seulement si une colonne
+    # projetée ou filtrée les utilise
+    used = {COLUMNS[c][1] for c in columns + list(filters)}
+    joins = [clause for alias, clause in JOINS.items() if alias in used]
+
+    select = ',\n    '.join(f"{COLUMNS[c][0]} AS {c}" for c in columns)
+    sql = f"SELECT\n    {select}\nFROM FAIT_ADOPTION f"
+    if joins:
+        sql += '\n' + '\n'.join(joins)
+
+    where = []
+    params = []
+    for col, values in filters.items():
+        values = list(values)
+        where.append(f"{COLUMNS[col][0]} IN ({', '.join('?' * len(values))})")
+        params += values
+    if where:
+        sql += "\nWHERE " + "\n  AND ".join(where)
+    return sql, params
+
+
+def export_frame(source, columns=None, filters=None):
+    """Extrait Power BI (DataFrame) depuis une connexion SQLite ou un fichier Parquet"""
+    if isinstance(source, sqlite3.Connection):
+        sql, params = build_export_query(columns, filters)
+        return pd.read_sql_query(sql, source, params=params)
+
+    # Fichier Parquet: projection et filtres transmis au lecteur (pyarrow)
+    columns = list(columns or COLUMNS)
+    filters = filters or {}
+    _check_columns(columns + list(filters))
+    arrow_filters = [(col, 'in', list(v) if isinstance(v, (list, tuple, set)) else [v])
+                     for col, v in filters.items()]
+    read_columns = columns + [c for c in filters if c not in columns]
+    frame = pd.read_parquet(source, columns=read_columns, filters=arrow_filters or None)
+    return frame[columns]
+
+
+def write_extract(frame, path, file_format='csv'):
+    """Écrire un extrait au format CSV (UTF-8) ou Parquet"""
+    if file_format == 'parquet':
+        frame.to_parquet(path, index=False)
+    else:
+        frame.to_csv(path, index=False, encoding='utf-8')
+
+
+def load_pages(pages_file=PAGES_FILE):
+    """Pages du rapport: {page: {"colonnes": [...], "filtres": {...}}}"""
+    with open(pages_file, encoding='utf-8') as f:
+        return json.load(f)['pages']
+
+
+def export_pages(source, pages=None, filters=None, output_dir=EXPORT_DIR,
+                 pages_file=PAGES_FILE, file_format='csv'):
+    """Écrire un extrait par page du rapport; retourne {page: (fichier, lignes, colonnes)}
+
+    filters: filtres communs ajoutés à ceux de chaque page (ex: années d'une actualisation).
+    """
+    definitions = load_pages(pages_file)
+    unknown = set(pages or []) - set(definitions)
+    if unknown:
+        raise ValueError(f"Page inconnue: {', '.join(sorted(unknown))}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    written = {}
+    for page in pages or definitions:
+        spec = definitions[page]
+        page_filters = dict(spec.get('filtres', {}), **(filters or {}))
+        frame = export_frame(source, spec['colonnes'], page_filters)
+        path = os.path.join(output_dir, f'{page}.{file_format}')
+        write_extract(frame, path, file_format)
+        written[page] = (path, len(frame), len(frame.columns))
+    return written
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export Power BI ciblé (colonnes et filtres)")
+    parser.add_argument('--db', default='datawarehouse_genai.db', help="Data Warehouse SQLite source")
+    parser.add_argument('--parquet', default=None,
+                        help="Source Parquet des faits (au lieu du Data Warehouse SQLite)")
+    parser.add_argument('--pages', nargs='*', default=None,
+                        help="Pages du rapport à exporter (défaut: toutes)")
+    parser.add_argument('--colonnes', nargs='*', default=None,
+                        help="Export unique de ces colonnes (au lieu des extraits par page)")
+    parser.add_argument('--annees', nargs='*', type=int, default=None)
+    parser.add_argument('--regions', nargs='*', default=None)
+    parser.add_argument('--secteurs', nargs='*', default=None)
+    parser.add_argument('--outils', nargs='*', default=None)
+    parser.add_argument('--sortie', default=EXPORT_DIR, help="Répertoire des extraits")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    args = parser.parse_args()
+
+    filters = {col: getattr(args, opt) for opt, col in FILTER_OPTIONS.items() if getattr(args, opt)}
+    source = args.parquet or sqlite3.connect(args.db)
+
+    if args.colonnes:
+        frame = export_frame(source, args.colonnes, filters)
+        os.makedirs(args.sortie, exist_ok=True)
+        path = os.path.join(args.sortie, f'extrait.{args.format}')
+        write_extract(frame, path, args.format)
+        print(f"✓ {path}: {len(frame):,} lignes × {len(frame.columns)} colonnes")
+    else:
+        for page, (path, rows, cols) in export_pages(source, args.pages, filters, args.sortie,
+                                                     file_format=args.format).items():
+            print(f"✓ {path}: {rows:,} lignes × {cols} colonnes")
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Moteur de règles de qualité des données GenAI (étape 4 du nettoyage)
+
+Les règles sont déclarées dans referentiel/regles_qualite.json:
+    plage        valeur comprise entre min et/ou max (une valeur manquante viole la règle)
+    valeurs      valeur appartenant à une liste ou aux membres d'une dimension du référentiel
+    non_nul      valeur renseignée
+    comparaison  règle entre deux colonnes (ex: New Roles Created <= Number of Employees Impacted)
+    iqr          valeur aberrante hors de [Q1 - k·IQR, Q3 + k·IQR]
+    zscore       valeur aberrante dont |z| dépasse le seuil
+
+Une règle "bloquante" (par défaut) met la ligne en quarantaine; les autres sont
+de simples alertes comptées dans le rapport de nettoyage.
+
+Toutes les règles d'un lot sont évaluées en une passe vectorisée: les règles
+de bornes (plage, iqr, zscore) forment une seule comparaison matricielle
+(lignes × règles), quel que soit leur nombre. Le résultat est une matrice de
+violations et un bitmap par ligne (bit i = règle i violée). Les bornes
+statistiques (quantiles, moyenne, écart-type) sont calculées par fit(), une
+seule fois pour tout le fichier, puis réutilisées pour chaque lot.
+"""
+
+import json
+import operator
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from reference_data import REFERENCE_DIR, REFERENCE_TABLES, KeyRegistry
+
+RULES_FILE = os.path.join(REFERENCE_DIR, 'regles_qualite.json')
+REJECT_FILE = 'donnees_genai_quarantaine.csv'
+
+OPERATORS = {
+    '<': operator.lt, '<=': operator.le, '>': operator.gt,
+    '>=': operator.ge, '==': operator.eq, '!=': operator.ne,
+}
+
+# Règles évaluées par la comparaison matricielle des bornes
+BOUND_RULES = ('plage', 'iqr', 'zscore')
+
+# Taille du bitmap par ligne (np.uint64)
+MAX_RULES = 64
+
+
+class QualityRules:
+    """Évaluation vectorisée des règles de qualité, bitmap des violations et quarantaine"""
+
+    def __init__(self, config, registry=None):
+        self.rules = config['regles']
+        if len(self.rules) > MAX_RULES:
+            raise ValueError(f"Au plus {MAX_RULES} règles de qualité (bitmap de 64 bits)")
+        unknown = {r['type'] for r in self.rules} - set(BOUND_RULES) - {'valeurs', 'non_nul', 'comparaison'}
+        if unknown:
+            raise ValueError(f"Type de règle inconnu: {', '.join(sorted(unknown))}")
+
+        self.names = [r['nom'] for r in self.rules]
+        self.blocking = np.array([r.get('bloquante', True) for r in self.rules])
+        self.bound_index = [i for i, r in enumerate(self.rules) if r['type'] in BOUND_RULES]
+
+        # Ensembles de valeurs admises (listes explicites ou membres du référentiel)
+        self.allowed = {}
+        for i, rule in enumerate(self.rules):
+            if rule['type'] == 'valeurs':
+                if 'referentiel' in rule:
+                    registry = registry or KeyRegistry.load()
+                    natural_col = REFERENCE_TABLES[rule['referentiel']][2]
+                    values = [row[natural_col] for row in registry.tables[rule['referentiel']]]
+                else:
+                    values = rule['valeurs']
+                self.allowed[i] = pd.Index(values)
+
+        self.bounds = None
+        self.stats = {'lignes': 0, 'quarantaine': 0,
+                      'violations': dict.fromkeys(self.names, 0)}
+        self._reject_header = True
+
+    @classmethod
+    def load(cls, rules_file=RULES_FILE, registry=None):
+        """Charger les règles depuis le fichier de configuration"""
+        with open(rules_file, encoding='utf-8') as f:
+            return cls(json.load(f), registry)
+
+    # ------------------------------------------------------------------ bornes
+    def fit(self, df):
+        """Calculer les bornes des règles de bornes (quantiles et moments vectorisés)"""
+        columns = [self.rules[i]['colonne'] for i in self.bound_index]
+        kinds = np.array([self.rules[i]['type'] for i in self.bound_index])
+        values = df[columns].to_numpy(dtype=np.float64)
+        low = np.array([self.rules[i].get('min', -np.inf) for i in self.bound_index], dtype=np.float64)
+        high = np.array([self.rules[i].get('max', np.inf) for i in self.bound_index], dtype=np.float64)
+
+        with warnings.catch_warnings():
+            # Colonne vide ou entièrement manquante: bornes NaN, aucune aberration signalée
+            warnings.simplefilter('ignore', RuntimeWarning)
+            iqr = np.flatnonzero(kinds == 'iqr')
+            if len(iqr):
+                k = np.array([self.rules[self.bound_index[j]].get('k', 1.5) for j in iqr])
+                q1, q3 = np.nanquantile(values[:, iqr], [0.25, 0.75], axis=0)
+                low[iqr] = q1 - k * (q3 - q1)
+                high[iqr] = q3 + k * (q3 - q1)
+            zscore = np.flatnonzero(kinds == 'zscore')
+            if len(zscore):
+                seuil = np.array([self.rules[self.bound_index[j]].get('seuil', 3.0) for j in zscore])
+                mean = np.nanmean(values[:, zscore], axis=0)
+                std = np.nanstd(values[:, zscore], axis=0)
+                low[zscore] = mean - seuil * std
+                high[zscore] = mean + seuil * std
+
+        # Une valeur manquante viole une règle de plage, pas une détection d'aberration
+        missing_ok = kinds != 'plage'
+        self.bounds = (columns, low, high, missing_ok)
+        return self
+
+    # ------------------------------------------------------------------ évaluation
+    def evaluate(self, df):
+        """Matrice des violations (lignes × règles) d'un lot, en une passe vectorisée"""
+        if self.bounds is None:
+            self.fit(df)
+        violations = np.zeros((len(df), len(self.rules)), dtype=bool)
+
+        if self.bound_index:
+            columns, low, high, missing_ok = self.bounds
+            values = df[columns].to_numpy(dtype=np.float64)
+            inside = (values >= low) & (values <= high)
+            violations[:, self.bound_index] = ~(inside | (np.isnan(values) & missing_ok))
+
+        for i, rule in enumerate(self.rules):
+            if rule['type'] == 'non_nul':
+                violations[:, i] = df[rule['colonne']].isna().to_numpy()
+            elif rule['type'] == 'valeurs':
+                column = df[rule['colonne']]
+                violations[:, i] = (column.notna() & ~column.isin(self.allowed[i])).to_numpy()
+            elif rule['type'] == 'comparaison':
+                compare = OPERATORS[rule['operateur']]
+                left, right = df[rule['colonne']], df[rule['autre']]
+                violations[:, i] = (left.notna() & right.notna() & ~compare(left, right)).to_numpy()
+        return violations
+
+    @staticmethod
+    def bitmap(violations):
+        """Bitmap des règles violées par ligne (bit i = règle i), en np.uint64"""
+        bits = np.uint64(1) << np.arange(violations.shape[1], dtype=np.uint64)
+        return (violations.astype(np.uint64) * bits).sum(axis=1, dtype=np.uint64)
+
+    def describe(self, bitmap):
+        """Noms des règles violées pour chaque valeur du bitmap"""
+        return [', '.join(n for i, n in enumerate(self.names) if code >> i & 1)
+                for code in bitmap.tolist()]
+
+    def apply(self, df, reject_file=None):
+        """Évaluer un lot, écrire les lignes en quarantaine et retourner les lignes valides
+
+        Les lignes en quarantaine sont ajoutées à reject_file avec le bitmap et les
+        noms des règles violées. Retourne (lignes valides, matrice des violations).
+        """
+        violations = self.evaluate(df)
+        rejected = violations[:, self.blocking].any(axis=1)
+
+        self.stats['lignes'] += len(df)
+        self.stats['quarantaine'] += int(rejected.sum())
+        for name, count in zip(self.names, violations.sum(axis=0).tolist()):
+            self.stats['violations'][name] += count
+
+        if reject_file:
+            bitmap = self.bitmap(violations[rejected])
+            quarantine = df[rejected].assign(Bitmap_Regles=bitmap,
+                                             Regles_Violees=self.describe(bitmap))
+            quarantine.to_csv(reject_file, mode='w' if self._reject_header else 'a',
+                              header=self._reject_header, index=False, encoding='utf-8')
+            self._reject_header = False
+        return df[~rejected], violations
+
+    def report(self):
+        """Lignes du rapport de nettoyage: nombre de violations par règle"""
+        lines = []
+        for rule, (name, count) in zip(self.rules, self.stats['violations'].items()):
+            kind = 'bloquante' if rule.get('bloquante', True) else 'alerte'
+            lines.append(f"     • {name} ({rule['type']}, {kind}): {count:,}")
+        return lines
@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+"""
+Service de requêtes HTTP/JSON en lecture seule sur le Data Warehouse GenAI
+
+Expose les vues agrégées, les statistiques de l'étape 7 et les faits
+dénormalisés de l'export Power BI, sans relancer l'ETL:
+
+    GET /                               liste des points d'accès et de leurs filtres
+    GET /vues/pays?Region=Europe
+    GET /stats/annees?Adoption_Year=2023&Adoption_Year=2024
+    GET /kpi/serie?Region=Europe                série annuelle des KPIs (YoY, cumuls)
+    GET /faits?Country=France&limit=1000&offset=0
+
+Les filtres sont des égalités (un paramètre répété devient un IN), toujours
+passés en paramètres SQL. Les réponses sont diffusées par blocs (Transfer-Encoding:
+chunked) au fil du curseur SQLite: un export complet n'est jamais chargé en mémoire.
+
+Chaque requête emprunte une connexion à un pool de connexions en lecture seule
+(mode=ro, PRAGMA query_only). Avec le journal WAL activé par l'ETL, les lecteurs
+voient un instantané cohérent et ne bloquent pas le chargement en cours.
+
+Usage:
+    python query_service.py --db datawarehouse_genai.db --port 8050
+"""
+
+import argparse
+import json
+import os
+import queue
+import sqlite3
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from urllib.request import pathname2url
+
+from etl_core import EXPORT_QUERY, STATISTICS_QUERIES
+
+DB_PATH = 'datawarehouse_genai.db'
+
+# Lignes lues par appel à fetchmany (et envoyées par bloc HTTP)
+BATCH_SIZE = 1000
+MAX_LIMIT = 1_000_000
+
+# Point d'accès -> requête, filtres autorisés (colonne du résultat -> type), tri
+ENDPOINTS = {
+    '/vues/pays': {
+        'sql': "SELECT * FROM VUE_PAYS",
+        'filtres': {'Country': str, 'Region': str},
+        'tri': 'Nombre_Entreprises DESC',
+    },
+    '/vues/industrie': {
+        'sql': "SELECT * FROM VUE_INDUSTRIE",
+        'filtres': {'Industry_Name': str, 'Sector_Type': str},
+        'tri': 'Nombre_Entreprises DESC',
+    },
+    '/vues/genai_tool': {
+        'sql': "SELECT * FROM VUE_GENAI_TOOL",
+        'filtres': {'Tool_Name': str, 'Tool_Provider': str},
+        'tri': 'Nombre_Utilisations DESC',
+    },
+    '/stats/top_pays': {
+        'sql': STATISTICS_QUERIES['top_pays'],
+        'filtres': {'Country': str},
+        'tri': 'Nombre_Adoptions DESC',
+    },
+    '/stats/secteurs': {
+        'sql': STATISTICS_QUERIES['secteurs'],
+        'filtres': {'Sector_Type': str},
+        'tri': 'Nombre DESC',
+    },
+    '/stats/outils': {
+        'sql': STATISTICS_QUERIES['outils'],
+        'filtres': {'Tool_Name': str, 'Tool_Provider': str},
+        'tri': 'Nombre_Utilisations DESC',
+    },
+    '/stats/annees': {
+        'sql': STATISTICS_QUERIES['annees'],
+        'filtres': {'Adoption_Year': int},
+        'tri': 'Adoption_Year',
+    },
+    '/stats/globales': {
+        'sql': STATISTICS_QUERIES['globales'],
+        'filtres': {},
+        'tri': None,
+    },
+    '/stats/sentiment': {
+        'sql': STATISTICS_QUERIES['sentiment'],
+        'filtres': {'Sentiment_Category': str},
+        'tri': 'Nombre DESC',
+    },
+    '/kpi/serie': {
+        'sql': "SELECT * FROM KPI_SERIE_ANNUELLE",
+        'filtres': {'Adoption_Year': int, 'Adoption_Phase': str, 'Region': str,
+                    'Sector_Type': str, 'Tool_Provider': str},
+        'tri': 'Adoption_Year, Region, Sector_Type, Tool_Provider, Adoption_Phase',
+    },
+    '/faits': {
+        'sql': EXPORT_QUERY,
+        'filtres': {'Country': str, 'Region': str, 'Industry_Name': str, 'Sector_Type': str,
+                    'GenAI_Tool': str, 'Tool_Provider': str, 'Company_Size': str,
+                    'Adoption_Year': int, 'Adoption_Phase': str, 'Sentiment_Category': str},
+        'tri': 'Adoption_ID',
+    },
+}
+
+
+class ReadOnlyPool:
+    """Pool de connexions SQLite en lecture seule partagé par les threads du serveur"""
+
+    def __init__(self, db_path=DB_PATH, size=4, timeout=5.0):
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(f"Data Warehouse introuvable: {db_path}")
+        self.timeout = timeout
+        self._idle = queue.Queue()
+        uri = f"file:{pathname2url(os.path.abspath(db_path))}?mode=ro"
+        for _ in range(size):
+            conn = sqlite3.connect(uri, uri=True, timeout=timeout, check_same_thread=False)
+            conn.execute("PRAGMA query_only = ON")
+            self._idle.put(conn)
+        self.size = size
+
+    @contextmanager
+    def connection(self):
+        """Emprunter une connexion (TimeoutError si toutes restent occupées)"""
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError("Aucune connexion disponible") from None
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        for _ in range(self.size):
+            self._idle.get().close()
+
+
+def build_query(endpoint, params):
+    """Requête SQL paramétrée d'un point d'accès: (sql, paramètres)
+
+    params: dictionnaire issu de parse_qs (chaque valeur est une liste).
+    Lève ValueError pour un filtre inconnu ou une valeur invalide.
+    """
+    spec = ENDPOINTS[endpoint]
+    unknown = set(params) - set(spec['filtres']) - {'limit', 'offset'}
+    if unknown:
+        raise ValueError(f"Filtre inconnu pour {endpoint}: {', '.join(sorted(unknown))}")
+
+    where = []
+    values = []
+    for column, cast in spec['filtres'].items():
+        if column in params:
+            try:
+                selected = [cast(v) for v in params[column]]
+            except ValueError:
+                raise ValueError(f"Valeur invalide pour {column}: {params[column]}") from None
+            where.append(f"{column} IN ({', '.join('?' * len(selected))})")
+            values += selected
+
+    limit = int(params.get('limit', [MAX_LIMIT])[0])
+    offset = int(params.get('offset', [0])[0])
+    if not 0 <= limit <= MAX_LIMIT or offset < 0:
+        raise ValueError(f"limit doit être compris entre 0 et {MAX_LIMIT:,}, offset positif")
+
+    sql = f"SELECT * FROM ({spec['sql']}) AS resultat"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    if spec['tri']:
+        sql += f" ORDER BY {spec['tri']}"
+    sql += " LIMIT ? OFFSET ?"
+    return sql, values + [limit, offset]
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """Points d'accès JSON (une connexion du pool par requête, réponse diffusée par blocs)"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        endpoint = url.path.rstrip('/') or '/'
+        if endpoint == '/':
+            self._send_json(200, {name: sorted(spec['filtres']) + ['limit', 'offset']
+                                  for name, spec in ENDPOINTS.items()})
+            return
+        if endpoint not in ENDPOINTS:
+            self._send_json(404, {'erreur': f"Point d'accès inconnu: {endpoint}"})
+            return
+
+        try:
+            sql, values = build_query(endpoint, parse_qs(url.query))
+        except ValueError as e:
+            self._send_json(400, {'erreur': str(e)})
+            return
+
+        self._streaming = False
+        try:
+            with self.server.pool.connection() as conn:
+                cursor = conn.execute(sql, values)
+                try:
+                    self._stream(cursor)
+                finally:
+                    # Termine la transaction de lecture (client déconnecté ou non)
+                    cursor.close()
+        except TimeoutError as e:
+            self._send_json(503, {'erreur': str(e)})
+        except sqlite3.Error as e:
+            if not self._streaming:
+                self._send_json(500, {'erreur': str(e)})
+                return
+            # Statut 200 et premiers blocs déjà envoyés: pas de second statut. Le flux
+            # est interrompu sans bloc final, le client voit une réponse incomplète.
+            self.log_error("Erreur SQLite pendant la diffusion de %s: %s", endpoint, e)
+            self.close_connection = True
+        except (BrokenPipeError, ConnectionResetError) as e:
+            # Client déconnecté pendant le téléchargement: rien à lui répondre
+            self.log_error("Client déconnecté pendant la diffusion de %s: %s", endpoint, e)
+            self.close_connection = True
+
+    def _stream(self, cursor):
+        """Diffuser {"colonnes": [...], "lignes": [[...], ...]} par blocs de BATCH_SIZE lignes"""
+        rows = cursor.fetchmany(BATCH_SIZE)
+        columns = [d[0] for d in cursor.description]
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        self._streaming = True
+
+        self._chunk('{"colonnes": ' + json.dumps(columns, ensure_ascii=False) + ', "lignes": [')
+        first = True
+        while rows:
+            body = ', '.join(json.dumps(row, ensure_ascii=False) for row in rows)
+            self._chunk(body if first else ', ' + body)
+            first = False
+            rows = cursor.fetchmany(BATCH_SIZE)
+        self._chunk(']}')
+        self.wfile.write(b'0\r\n\r\n')
+
+    def _chunk(self, text):
+        data = text.encode('utf-8')
+        self.wfile.write(f'{len(data):X}\r\n'.encode('ascii') + data + b'\r\n')
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        print(f"  {self.address_string()} - {format % args}")
+
+
+def create_server(db_path=DB_PATH, host='127.0.0.1', port=8050, pool_size=4):
+    """Serveur HTTP multi-thread adossé à un pool de connexions en lecture seule"""
+    server = ThreadingHTTPServer((host, port), QueryHandler)
+    server.daemon_threads = True
+    server.pool = ReadOnlyPool(db_path, pool_size)
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Service de requêtes JSON sur le Data Warehouse GenAI")
+    parser.add_argument('--db', default=DB_PATH, help="Fichier SQLite du Data Warehouse")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8050)
+    parser.add_argument('--pool', type=int, default=4, help="Nombre de connexions en lecture seule")
+    args = parser.parse_args()
+
+    server = create_server(args.db, args.host, args.port, args.pool)
+    print(f"✓ Service de requêtes: http://{args.host}:{server.server_address[1]}/ "
+          f"({args.pool} connexions en lecture seule sur {args.db})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n✓ Arrêt du service")
+    finally:
+        server.server_close()
+        server.pool.close()
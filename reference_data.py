@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+"""
+Référentiel des dimensions du Data Warehouse GenAI
+Tables de référence versionnées (referentiel/*.csv) et registre des clés
+
+Les dimensions DIM_GEOGRAPHY, DIM_INDUSTRY et DIM_GENAI_TOOL sont alimentées
+une seule fois à partir du référentiel, avec des clés de substitution stables.
+Le registre des clés (KeyRegistry) ne dépend que de la bibliothèque standard:
+il peut être chargé dans n'importe quel processus de chargement (pipeline,
+shards) sans jamais lire ni écrire les tables de dimensions.
+
+Pour ajouter un pays, un secteur ou un outil GenAI: ajouter une ligne au CSV
+correspondant et incrémenter referentiel/VERSION. Une valeur des données absente
+du référentiel n'est pas perdue: register_members lui attribue un membre propre
+(clé à partir de EXTENSION_KEY_START, attributs par défaut).
+"""
+
+import csv
+import os
+from datetime import datetime
+
+REFERENCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'referentiel')
+
+# Clé du membre "Inconnu" de chaque dimension (valeur manquante)
+UNKNOWN_KEY = 0
+
+# Première clé des membres hors référentiel (les clés du référentiel restent inférieures)
+EXTENSION_KEY_START = 1000
+
+# Table de dimension -> (fichier CSV, clé, colonne naturelle, attributs)
+REFERENCE_TABLES = {
+    'DIM_GEOGRAPHY': ('geographie.csv', 'Geography_ID', 'Country', ['Region']),
+    'DIM_INDUSTRY': ('industries.csv', 'Industry_ID', 'Industry_Name', ['Sector_Type']),
+    'DIM_GENAI_TOOL': ('outils_genai.csv', 'GenAI_Tool_ID', 'Tool_Name', ['Tool_Category', 'Tool_Provider']),
+}
+
+# Colonne des données nettoyées portant la valeur naturelle de chaque dimension
+SOURCE_COLUMNS = {
+    'DIM_GEOGRAPHY': 'Country',
+    'DIM_INDUSTRY': 'Industry',
+    'DIM_GENAI_TOOL': 'GenAI Tool',
+}
+
+# Attributs des valeurs absentes du référentiel
+DEFAULT_ATTRIBUTES = {
+    'Region': 'Autre',
+    'Sector_Type': 'Autre',
+    'Tool_Category': 'Autre',
+    'Tool_Provider': 'Inconnu',
+}
+
+
+def _read_reference(path):
+    """Lire un fichier CSV du référentiel"""
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+class KeyRegistry:
+    """Registre des clés de substitution et des attributs des dimensions de référence"""
+
+    def __init__(self, version, tables):
+        self.version = version
+        self.tables = tables  # table -> liste de lignes (dict)
+
+        self.keys = {}        # table -> {valeur naturelle: clé}
+        self.attributes = {}  # table -> {attribut: {valeur naturelle: valeur}}
+        for table, (_, key_col, natural_col, attrs) in REFERENCE_TABLES.items():
+            rows = tables[table]
+            self.keys[table] = {r[natural_col]: int(r[key_col]) for r in rows
+                                if int(r[key_col]) != UNKNOWN_KEY}
+            self.attributes[table] = {a: {r[natural_col]: r[a] for r in rows} for a in attrs}
+
+    @classmethod
+    def load(cls, directory=REFERENCE_DIR):
+        """Charger le référentiel depuis un répertoire"""
+        with open(os.path.join(directory, 'VERSION'), encoding='utf-8') as f:
+            version = f.read().strip()
+        tables = {table: _read_reference(os.path.join(directory, filename))
+                  for table, (filename, *_) in REFERENCE_TABLES.items()}
+        return cls(version, tables)
+
+    # Correspondances utilisées par l'enrichissement et le chargement des faits
+    @property
+    def geography_mapping(self):
+        return self.keys['DIM_GEOGRAPHY']
+
+    @property
+    def industry_mapping(self):
+        return self.keys['DIM_INDUSTRY']
+
+    @property
+    def tool_mapping(self):
+        return self.keys['DIM_GENAI_TOOL']
+
+    @property
+    def mappings(self):
+        return self.geography_mapping, self.industry_mapping, self.tool_mapping
+
+    def snapshot(self):
+        """Copie indépendante du registre, lisible pendant que l'original est complété (add_member)"""
+        return KeyRegistry(self.version, {table: list(rows) for table, rows in self.tables.items()})
+
+    def attribute(self, table, name):
+        """Correspondance valeur naturelle -> attribut (ex: Country -> Region)"""
+        return self.attributes[table][name]
+
+    def add_member(self, table, value, key):
+        """Ajouter au registre un membre hors référentiel (attributs par défaut)"""
+        _, key_col, natural_col, attrs = REFERENCE_TABLES[table]
+        self.keys[table][value] = key
+        self.tables[table].append({key_col: str(key), natural_col: value,
+                                   **{a: DEFAULT_ATTRIBUTES[a] for a in attrs}})
+        for a in attrs:
+            self.attributes[table][a][value] = DEFAULT_ATTRIBUTES[a]
+
+    def unknown_values(self, df):
+        """Valeurs des données absentes du registre, par colonne source (ordre d'apparition)"""
+        unknown = {}
+        for table, col in SOURCE_COLUMNS.items():
+            natural_col = REFERENCE_TABLES[table][2]
+            reserved = {r[natural_col] for r in self.tables[table]
+                        if int(r[REFERENCE_TABLES[table][1]]) == UNKNOWN_KEY}
+            values = [v for v in df[col].dropna().unique()
+                      if v not in self.keys[table] and v not in reserved]
+            if values:
+                unknown[col] = values
+        return unknown
+
+
+def seed_dimensions(conn, registry, force=False):
+    """Alimenter les dimensions de référence avec leurs clés stables
+
+    Sans effet si la version du référentiel est déjà chargée (sauf force=True).
+    Retourne True si les dimensions ont été (ré)alimentées.
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS REF_VERSION (
+        Table_Name TEXT PRIMARY KEY,
+        Version TEXT NOT NULL,
+        Seeded_At TEXT
+    )
+    ''')
+    loaded = dict(cursor.execute("SELECT Table_Name, Version FROM REF_VERSION"))
+    if not force and all(loaded.get(t) == registry.version for t in REFERENCE_TABLES):
+        return False
+
+    # Date d'alimentation précise: elle distingue deux réalimentations (reference_state)
+    seeded_at = datetime.now().isoformat(timespec='microseconds')
+    for table, (_, key_col, natural_col, attrs) in REFERENCE_TABLES.items():
+        # Membres hors référentiel entrés depuis au référentiel: faits rattachés à la clé du référentiel
+        reference_keys = {row[natural_col]: int(row[key_col]) for row in registry.tables[table]}
+        promoted = [(reference_keys[value], key) for value, key in cursor.execute(
+            f"SELECT {natural_col}, {key_col} FROM {table} WHERE {key_col} >= ?", (EXTENSION_KEY_START,)
+        ).fetchall() if reference_keys.get(value, key) != key]
+        cursor.executemany(f"UPDATE FAIT_ADOPTION SET {key_col} = ? WHERE {key_col} = ?", promoted)
+        cursor.executemany(f"DELETE FROM {table} WHERE {key_col} = ?", [(key,) for _, key in promoted])
+
+        columns = [key_col, natural_col] + attrs
+        updates = ', '.join(f"{c} = excluded.{c}" for c in columns[1:])
+        cursor.executemany(f'''
+        INSERT INTO {table} ({', '.join(columns)})
+        VALUES ({', '.join('?' * len(columns))})
+        ON CONFLICT({key_col}) DO UPDATE SET {updates}
+        ''', [tuple(row[c] for c in columns) for row in registry.tables[table]])
+        cursor.execute('''
+        INSERT OR REPLACE INTO REF_VERSION (Table_Name, Version, Seeded_At)
+        VALUES (?, ?, ?)
+        ''', (table, registry.version, seeded_at))
+
+    conn.commit()
+    return True
+
+
+def reference_state(conn):
+    """État des dimensions de référence chargées: 'version@date d'alimentation' (None si absent)
+
+    Change à chaque (ré)alimentation par seed_dimensions (attributs modifiés, faits
+    rattachés à une autre clé): les agrégats calculés sur un état précédent sont périmés.
+    """
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'REF_VERSION'").fetchone()
+    if not exists:
+        return None
+    version, seeded_at = conn.execute("SELECT MAX(Version), MAX(Seeded_At) FROM REF_VERSION").fetchone()
+    return f"{version}@{seeded_at}" if version else None
+
+
+def register_members(conn, registry, df):
+    """Attribuer un membre propre aux valeurs des données absentes du référentiel
+
+    Les membres enregistrés par un chargement précédent sont relus dans les
+    dimensions; une valeur nouvelle reçoit la clé libre suivante à partir de
+    EXTENSION_KEY_START (dans l'ordre d'apparition, quel que soit le mode de
+    chargement) et les attributs par défaut. Le registre est complété en place.
+    Retourne les valeurs nouvelles par colonne source.
+    """
+    cursor = conn.cursor()
+    added = {}
+    for col, values in registry.unknown_values(df).items():
+        table = next(t for t, c in SOURCE_COLUMNS.items() if c == col)
+        _, key_col, natural_col, attrs = REFERENCE_TABLES[table]
+        existing = dict(cursor.execute(
+            f"SELECT {natural_col}, {key_col} FROM {table} WHERE {key_col} >= ?", (EXTENSION_KEY_START,)
+        ).fetchall())
+        next_key = max(existing.values(), default=EXTENSION_KEY_START - 1) + 1
+        rows = []
+        for value in values:
+            if value not in existing:
+                existing[value] = next_key
+                rows.append((next_key, value, *[DEFAULT_ATTRIBUTES[a] for a in attrs]))
+                next_key += 1
+            registry.add_member(table, value, existing[value])
+        columns = [key_col, natural_col] + attrs
+        cursor.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                           rows)
+        if rows:
+            added[col] = [row[1] for row in rows]
+    conn.commit()
+    return added
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+Couche sémantique du modèle en étoile GenAI: requêtes KPI sans jointures inutiles
+
+L'appelant décrit des mesures et des attributs d'analyse, la couche génère le SQL:
+
+    layer = SemanticLayer(conn)
+    layer.query({'Total_Employes': ('SUM', 'Employees_Impacted'),
+                 'Productivite_Moyenne': ('AVG', 'Productivity_Change'),
+                 'Nombre': ('COUNT', '*')},
+                by=['Region', 'Adoption_Year'], filters={'Sector_Type': 'Tech & Digital'})
+
+Plans générés, du moins coûteux au plus coûteux:
+  1. agrégat matérialisé (table AGG_*) dont le grain couvre les attributs demandés
+     et qui est à jour (même MAX(Adoption_ID) et même nombre de faits que la table
+     de faits, même état du référentiel des dimensions, cf. REF_VERSION);
+  2. attributs de la table de faits seulement: aucune jointure;
+  3. pré-agrégation: les faits sont agrégés par clé de dimension (sommes et
+     comptages partiels), puis le résultat, petit, est joint aux seules
+     dimensions utiles et ré-agrégé. AVG = somme des sommes / somme des comptages.
+"""
+
+import json
+from datetime import datetime
+
+import pandas as pd
+
+from reference_data import reference_state
+
+# Alias de la dimension -> (table, clé commune avec FAIT_ADOPTION)
+DIMENSIONS = {
+    'g': ('DIM_GEOGRAPHY', 'Geography_ID'),
+    'i': ('DIM_INDUSTRY', 'Industry_ID'),
+    't': ('DIM_GENAI_TOOL', 'GenAI_Tool_ID'),
+    'c': ('DIM_COMPANY', 'Company_ID'),
+}
+
+# Attribut d'analyse -> (alias de la table, colonne); 'f' = table de faits
+ATTRIBUTES = {
+    'Country': ('g', 'Country'),
+    'Region': ('g', 'Region'),
+    'Industry_Name': ('i', 'Industry_Name'),
+    'Sector_Type': ('i', 'Sector_Type'),
+    'GenAI_Tool': ('t', 'Tool_Name'),
+    'Tool_Category': ('t', 'Tool_Category'),
+    'Tool_Provider': ('t', 'Tool_Provider'),
+    'Company_Size': ('c', 'Company_Size'),
+    'Adoption_Year': ('f', 'Adoption_Year'),
+    'Adoption_Phase': ('f', 'Adoption_Phase'),
+    'Productivity_Impact': ('f', 'Productivity_Impact'),
+    'Sentiment_Category': ('f', 'Sentiment_Category'),
+}
+
+# Colonnes de FAIT_ADOPTION agrégeables
+MEASURE_COLUMNS = [
+    'Employees_Impacted', 'New_Roles_Created', 'Training_Hours',
+    'Productivity_Change', 'Training_per_Employee', 'New_Roles_Rate',
+]
+
+# Fonction -> agrégats partiels nécessaires; chaque partiel se ré-agrège par
+# la fonction indiquée (SUM des sommes, MIN des minimums...)
+PARTIALS = {'SUM': ['SUM'], 'COUNT': ['CNT'], 'AVG': ['SUM', 'CNT'], 'MIN': ['MIN'], 'MAX': ['MAX']}
+PARTIAL_SQL = {'SUM': 'SUM({})', 'CNT': 'COUNT({})', 'MIN': 'MIN({})', 'MAX': 'MAX({})'}
+REAGGREGATE = {'SUM': 'SUM', 'CNT': 'SUM', 'MIN': 'MIN', 'MAX': 'MAX'}
+
+CATALOG_TABLE = 'AGG_CATALOGUE'
+
+# Colonnes du catalogue ajoutées après sa création (migration des entrepôts existants)
+CATALOG_MIGRATIONS = [('Faits', 'INTEGER'), ('Ref_Version', 'TEXT')]
+
+# Agrégat matérialisé par défaut: grain des KPIs du dashboard
+DEFAULT_AGGREGATES = {
+    'AGG_KPI': ['Country', 'Region', 'Industry_Name', 'Sector_Type', 'GenAI_Tool',
+                'Tool_Provider', 'Adoption_Year', 'Adoption_Phase', 'Sentiment_Category'],
+}
+
+
+def _partial_name(partial, column):
+    """Nom de colonne d'un agrégat partiel (COUNT(*) -> Nombre)"""
+    return 'Nombre' if column == '*' else f'{partial}__{column}'
+
+
+def _normalize(measures, by, filters):
+    """Valider la demande; retourner (mesures, attributs, filtres en listes, partiels requis)"""
+    by = list(by)
+    filters = {a: list(v) if isinstance(v, (list, tuple, set)) else [v]
+               for a, v in (filters or {}).items()}
+    unknown = [a for a in by + list(filters) if a not in ATTRIBUTES]
+    if unknown:
+        raise ValueError(f"Attribut inconnu: {', '.join(unknown)}")
+
+    partials = {}
+    for alias, (function, column) in measures.items():
+        function = function.upper()
+        if function not in PARTIALS:
+            raise ValueError(f"Fonction d'agrégation inconnue: {function}")
+        if column == '*' and function != 'COUNT':
+            raise ValueError(f"{function}(*) n'est pas une mesure valide")
+        if column != '*' and column not in MEASURE_COLUMNS:
+            raise ValueError(f"Mesure inconnue: {column}")
+        for partial in (['CNT'] if column == '*' else PARTIALS[function]):
+            partials[_partial_name(partial, column)] = (partial, column)
+    return measures, by, filters, partials
+
+
+def _final_expression(function, column, source):
+    """Expression de ré-agrégation d'une mesure à partir des partiels de source"""
+    function = function.upper()
+    if column == '*':
+        return f"SUM({source}.Nombre)"
+    if function == 'AVG':
+        return (f"SUM({source}.{_partial_name('SUM', column)}) * 1.0 / "
+                f"NULLIF(SUM({source}.{_partial_name('CNT', column)}), 0)")
+    partial = PARTIALS[function][0]
+    return f"{REAGGREGATE[partial]}({source}.{_partial_name(partial, column)})"
+
+
+def _where(conditions):
+    return ("\nWHERE " + "\n  AND ".join(conditions)) if conditions else ""
+
+
+class SemanticLayer:
+    """Générateur de requêtes KPI sur le modèle en étoile, avec routage vers les agrégats"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    # ------------------------------------------------------------------ catalogue
+    def catalog(self):
+        """Agrégats matérialisés: {table: (grain, partiels, lignes, état des faits et du référentiel)}
+
+        L'état est (Adoption_ID max, nombre de faits, état du référentiel) au moment du
+        calcul; il vaut None pour un agrégat inscrit avant l'ajout de ces colonnes.
+        """
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (CATALOG_TABLE,)
+        ).fetchone()
+        if not exists:
+            return {}
+        cursor = self.conn.execute(f"SELECT * FROM {CATALOG_TABLE}")
+        columns = [d[0] for d in cursor.description]
+        catalog = {}
+        for row in cursor.fetchall():
+            entry = dict(zip(columns, row))
+            state = ((entry['Adoption_ID_Max'], entry['Faits'], entry['Ref_Version'])
+                     if 'Ref_Version' in entry else None)
+            catalog[entry['Table_Name']] = (json.loads(entry['Grain']), json.loads(entry['Partiels']),
+                                            entry['Lignes'], state)
+        return catalog
+
+    def _state(self):
+        """État courant: (Adoption_ID max, nombre de faits, état du référentiel)"""
+        max_id, facts = self.conn.execute(
+            "SELECT COALESCE(MAX(Adoption_ID), 0), COUNT(*) FROM FAIT_ADOPTION"
+        ).fetchone()
+        return max_id, facts, reference_state(self.conn)
+
+    def _route(self, attributes, partials):
+        """Plus petit agrégat matérialisé à jour couvrant la demande (ou None)
+
+        Un agrégat est périmé si des faits ont été ajoutés ou supprimés, ou si les
+        dimensions de référence ont été réalimentées depuis son calcul.
+        """
+        catalog = self.catalog()
+        if not catalog:
+            return None
+        current = self._state()
+        candidates = [(lines, name) for name, (grain, stored, lines, state) in catalog.items()
+                      if state == current and set(attributes) <= set(grain) and set(partials) <= set(stored)]
+        return min(candidates)[1] if candidates else None
+
+    # ------------------------------------------------------------------ génération SQL
+    def sql(self, measures, by=(), filters=None, plan='auto'):
+        """Requête SQL et paramètres d'une demande de KPI
+
+        plan: 'auto' (agrégat matérialisé si possible, sinon pré-agrégation),
+        'preagregation' ou 'jointure' (jointure directe faits x dimensions, pour comparaison).
+        """
+        measures, by, filters, partials = _normalize(measures, by, filters)
+        attributes = list(dict.fromkeys(by + list(filters)))
+
+        aggregate = self._route(attributes, partials) if plan == 'auto' else None
+        if aggregate:
+            return self._sql_aggregate(aggregate, measures, by, filters)
+
+        aliases = {ATTRIBUTES[a][0] for a in attributes} - {'f'}
+        if not aliases or plan == 'jointure':
+            return self._sql_join(measures, by, filters, aliases)
+        return self._sql_preaggregate(measures, by, filters, partials, aliases)
+
+    def _sql_aggregate(self, table, measures, by, filters):
+        """Ré-agrégation d'une table AGG_* (colonnes nommées comme les attributs)"""
+        select = [f"a.{a} AS {a}" for a in by]
+        select += [f"{_final_expression(fn, col, 'a')} AS {alias}" for alias, (fn, col) in measures.items()]
+        params = []
+        conditions = []
+        for attribute, values in filters.items():
+            conditions.append(f"a.{attribute} IN ({', '.join('?' * len(values))})")
+            params += values
+        sql = f"SELECT {', '.join(select)}\nFROM {table} a" + _where(conditions)
+        return self._group_order(sql, by, [f"a.{a}" for a in by]), params
+
+    def _sql_join(self, measures, by, filters, aliases):
+        """Agrégation directe sur les faits, jointes aux seules dimensions utiles"""
+        columns = [f"{ATTRIBUTES[a][0]}.{ATTRIBUTES[a][1]}" for a in by]
+        select = [f"{col} AS {a}" for col, a in zip(columns, by)]
+        for alias, (function, column) in measures.items():
+            target = '*' if column == '*' else f"f.{column}"
+            select.append(f"{function.upper()}({target}) AS {alias}")
+
+        sql = f"SELECT {', '.join(select)}\nFROM FAIT_ADOPTION f"
+        for alias in sorted(aliases):
+            table, key = DIMENSIONS[alias]
+            sql += f"\nJOIN {table} {alias} ON f.{key} = {alias}.{key}"
+        conditions, params = self._conditions(filters)
+        sql += _where(conditions)
+        return self._group_order(sql, by, columns), params
+
+    def _sql_preaggregate(self, measures, by, filters, partials, aliases):
+        """Faits pré-agrégés par clé de dimension, puis jointure aux petites dimensions"""
+        fact_attributes = [a for a in dict.fromkeys(by + list(filters)) if ATTRIBUTES[a][0] == 'f']
+        keys = [DIMENSIONS[alias][1] for alias in sorted(aliases)]
+        inner_group = [f"f.{k}" for k in keys] + [f"f.{ATTRIBUTES[a][1]}" for a in fact_attributes]
+        inner_select = inner_group + [
+            f"{PARTIAL_SQL[partial].format('*' if column == '*' else 'f.' + column)} AS {name}"
+            for name, (partial, column) in partials.items()
+        ]
+        fact_filters = {a: v for a, v in filters.items() if ATTRIBUTES[a][0] == 'f'}
+        dimension_filters = {a: v for a, v in filters.items() if ATTRIBUTES[a][0] != 'f'}
+        inner_conditions, params = self._conditions(fact_filters)
+        inner = (f"SELECT {', '.join(inner_select)}\n    FROM FAIT_ADOPTION f"
+                 + _where(inner_conditions).replace('\n', '\n    ')
+                 + f"\n    GROUP BY {', '.join(inner_group)}")
+
+        # Dans la sous-requête, les attributs des faits gardent leur nom de colonne
+        def column(attribute):
+            alias, name = ATTRIBUTES[attribute]
+            return f"p.{name}" if alias == 'f' else f"{alias}.{name}"
+
+        columns = [column(a) for a in by]
+        select = [f"{col} AS {a}" for col, a in zip(columns, by)]
+        select += [f"{_final_expression(fn, col, 'p')} AS {alias}" for alias, (fn, col) in measures.items()]
+        sql = f"SELECT {', '.join(select)}\nFROM (\n    {inner}\n) p"
+        for alias in sorted(aliases):
+            table, key = DIMENSIONS[alias]
+            sql += f"\nJOIN {table} {alias} ON p.{key} = {alias}.{key}"
+        conditions = []
+        for attribute, values in dimension_filters.items():
+            conditions.append(f"{column(attribute)} IN ({', '.join('?' * len(values))})")
+            params += values
+        sql += _where(conditions)
+        return self._group_order(sql, by, columns), params
+
+    @staticmethod
+    def _conditions(filters):
+        conditions = []
+        params = []
+        for attribute, values in filters.items():
+            alias, name = ATTRIBUTES[attribute]
+            conditions.append(f"{alias}.{name} IN ({', '.join('?' * len(values))})")
+            params += values
+        return conditions, params
+
+    @staticmethod
+    def _group_order(sql, by, columns):
+        if by:
+            sql += f"\nGROUP BY {', '.join(columns)}\nORDER BY {', '.join(columns)}"
+        return sql
+
+    # ------------------------------------------------------------------ exécution
+    def query(self, measures, by=(), filters=None, plan='auto'):
+        """Exécuter une demande de KPI et retourner un DataFrame"""
+        sql, params = self.sql(measures, by, filters, plan)
+        return pd.read_sql_query(sql, self.conn, params=params)
+
+    def materialize(self, table, grain, columns=MEASURE_COLUMNS):
+        """Créer (ou recréer) une table d'agrégats partiels au grain donné et l'inscrire au catalogue"""
+        if not table.startswith('AGG_') or not table[4:].replace('_', '').isalnum():
+            raise ValueError(f"Nom d'agrégat invalide (AGG_...): {table}")
+        measures = {'Nombre': ('COUNT', '*')}
+        for col in columns:
+            measures.update({f'SUM__{col}': ('SUM', col), f'CNT__{col}': ('COUNT', col),
+                             f'MIN__{col}': ('MIN', col), f'MAX__{col}': ('MAX', col)})
+        # Les partiels sont calculés sur les faits (jamais routés vers un autre agrégat)
+        sql, params = self.sql(measures, grain, plan='preagregation')
+        max_id, facts, ref_version = self._state()
+
+        self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+        self.conn.execute(f"CREATE TABLE {table} AS {sql}", params)
+        self.conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {CATALOG_TABLE} (
+            Table_Name TEXT PRIMARY KEY,
+            Grain TEXT NOT NULL,
+            Partiels TEXT NOT NULL,
+            Lignes INTEGER,
+            Adoption_ID_Max INTEGER,
+            Built_At TEXT
+        )
+        ''')
+        existing = {row[1] for row in self.conn.execute(f"PRAGMA table_info({CATALOG_TABLE})").fetchall()}
+        for column, column_type in CATALOG_MIGRATIONS:
+            if column not in existing:
+                self.conn.execute(f"ALTER TABLE {CATALOG_TABLE} ADD COLUMN {column} {column_type}")
+        lines = self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        self.conn.execute(f'''
+        INSERT OR REPLACE INTO {CATALOG_TABLE}
+            (Table_Name, Grain, Partiels, Lignes, Adoption_ID_Max, Faits, Ref_Version, Built_At)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (table, json.dumps(list(grain)), json.dumps(list(measures)), lines, max_id, facts, ref_version,
+              datetime.now().isoformat(timespec='seconds')))
+        self.conn.commit()
+        return lines
+
+    def refresh(self, defaults=DEFAULT_AGGREGATES):
+        """Recalculer les agrégats du catalogue (et créer ceux par défaut); retourne {table: lignes}"""
+        grains = dict(defaults or {})
+        grains.update({name: grain for name, (grain, *_) in self.catalog().items()})
+        return {table: self.materialize(table, grain) for table, grain in grains.items()}
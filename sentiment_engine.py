@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Moteur de classification du sentiment des employés (Employee Sentiment)
+
+Les phrases de sentiment sont très répétitives (quelques milliers de phrases
+distinctes pour des millions de lignes). Le moteur:
+  1. factorise la colonne en valeurs distinctes (pd.factorize),
+  2. classe chaque phrase distincte une seule fois avec une unique expression
+     régulière compilée (alternance de tous les mots-clés, un groupe nommé
+     par catégorie),
+  3. rediffuse le résultat sur toutes les lignes par indexation des codes.
+
+Les mots-clés sont configurables (referentiel/sentiment_mots_cles.json): les
+catégories sont testées par ordre de priorité, la première trouvée l'emporte.
+Les phrases déjà classées sont mémorisées dans un cache persistant, invalidé
+automatiquement si les mots-clés changent.
+"""
+
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from reference_data import REFERENCE_DIR
+
+KEYWORDS_FILE = os.path.join(REFERENCE_DIR, 'sentiment_mots_cles.json')
+CACHE_FILE = 'cache_sentiment_genai.json'
+
+
+class SentimentEngine:
+    """Classification par mots-clés des phrases de sentiment, avec mémoïsation"""
+
+    def __init__(self, config, cache_file=None):
+        self.default = config['defaut']
+        self.categories = [c['categorie'] for c in config['categories']]
+        self.signature = hashlib.sha1(
+            json.dumps(config, sort_keys=True, ensure_ascii=False).encode('utf-8')
+        ).hexdigest()
+
+        # Un groupe nommé par catégorie, dans une assertion avant (?=...): chaque
+        # position est testée, aucun mot-clé n'est masqué par un autre qui le chevauche
+        #   (?=(?P<c0>anxiety|concern|scary)|(?P<c1>love|exciting|improved))
+        groups = []
+        for i, c in enumerate(config['categories']):
+            words = sorted((re.escape(w.lower()) for w in c['mots_cles']), key=len, reverse=True)
+            groups.append(f"(?P<c{i}>{'|'.join(words)})")
+        self.pattern = re.compile(f"(?=(?:{'|'.join(groups)}))")
+
+        self.cache_file = cache_file
+        self.memo = {}
+        self.stats = {'lignes': 0, 'distinctes': 0, 'cache': 0, 'classees': 0}
+        if cache_file and os.path.exists(cache_file):
+            with open(cache_file, encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get('signature') == self.signature:
+                self.memo = cached['phrases']
+
+    @classmethod
+    def load(cls, keywords_file=KEYWORDS_FILE, cache_file=CACHE_FILE):
+        """Charger le moteur depuis le fichier de mots-clés"""
+        with open(keywords_file, encoding='utf-8') as f:
+            return cls(json.load(f), cache_file)
+
+    def classify_phrase(self, sentiment):
+        """Catégorie d'une phrase (priorité à la première catégorie trouvée)"""
+        best = len(self.categories)
+        for match in self.pattern.finditer(sentiment.lower()):
+            best = min(best, int(match.lastgroup[1:]))
+            if best == 0:
+                break
+        return self.categories[best] if best < len(self.categories) else self.default
+
+    def classify(self, sentiments):
+        """Classer une colonne: une classification par phrase distincte, rediffusée par code"""
+        codes, uniques = pd.factorize(sentiments)
+        labels = []
+        hits = 0
+        for phrase in uniques:
+            category = self.memo.get(phrase)
+            if category is None:
+                category = self.classify_phrase(phrase)
+                self.memo[phrase] = category
+            else:
+                hits += 1
+            labels.append(category)
+
+        # Valeurs manquantes (code -1): catégorie par défaut
+        labels = np.array(labels + [self.default], dtype=object)
+        self.stats['lignes'] += len(codes)
+        self.stats['distinctes'] += len(uniques)
+        self.stats['cache'] += hits
+        self.stats['classees'] += len(uniques) - hits
+        return pd.Series(labels[codes], index=sentiments.index, name='Sentiment_Category')
+
+    def save_cache(self):
+        """Enregistrer le cache des phrases classées"""
+        if not self.cache_file:
+            return
+        with open(self.cache_file, 'w', encoding='utf-8') as f:
+            json.dump({'signature': self.signature, 'phrases': self.memo}, f, ensure_ascii=False)
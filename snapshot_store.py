@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+"""
+Archive des sorties du nettoyage: instantanés Parquet compressés et dédupliqués
+
+Chaque exécution du nettoyage enregistre un instantané dans snapshots_genai/:
+
+    objets/ab/ab12....parquet   une partie d'un fichier de données: les lignes d'une
+                                année d'adoption, Parquet compressé zstd (groupes de lignes)
+    objets/cd/cd34....txt.zst   rapport de nettoyage, texte compressé zstd
+    manifestes/<id>.json        manifeste de l'exécution: fichiers archivés, empreinte
+                                des sources, colonnes, objets par année, ordre des lignes
+
+Chaque objet est nommé par l'empreinte BLAKE2b de son contenu: une année inchangée
+d'une exécution à l'autre donne le même objet, écrit une seule fois et partagé par
+les manifestes. L'ordre d'origine des lignes est conservé par la suite des années
+(objet 'ordre', omis si le fichier est déjà groupé par année): le rechargement
+restitue exactement le DataFrame lu par pd.read_csv(float_precision='round_trip'), et
+restore() réécrit des fichiers identiques aux originaux.
+
+    store = SnapshotStore()
+    manifest = store.save(CLEANING_OUTPUTS, report=REPORT_FILE)
+    df = store.load(manifest['id'], annees=[2024])            # lecture des seules parties utiles
+    store.load_warehouse(manifest['id'], 'entrepot_snapshot.db')   # entrepôt de travail
+
+Usage:
+    python snapshot_store.py liste
+    python snapshot_store.py enregistrer --nettoyees copie_2024_05.csv --rapport rapport_2024_05.txt
+    python snapshot_store.py restaurer 20261019-115742 --dossier restauration/
+    python snapshot_store.py entrepot 20261019-115742 --db entrepot_snapshot.db
+
+Nécessite pyarrow (Parquet et codec zstd).
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from etl_core import (INSERT_COMPANY, INSERT_FAIT, build_batch, create_schema, encode_sentiment_text,
+                      enrich_dimensions, next_company_id, source_fingerprint)
+from quality_rules import REJECT_FILE
+from reference_data import KeyRegistry, register_members, seed_dimensions
+
+SNAPSHOT_DIR = 'snapshots_genai'
+PARTITION_COLUMN = 'Adoption Year'
+COMPRESSION_LEVEL = 9
+ROW_GROUP_SIZE = 250_000
+
+# Sorties du nettoyage archivées (nom logique -> fichier)
+CLEANING_OUTPUTS = {'nettoyees': 'donnees_genai_nettoyees.csv', 'quarantaine': REJECT_FILE}
+REPORT_FILE = 'rapport_nettoyage_genai.txt'
+
+
+def _digest(data):
+    """Empreinte du contenu d'un objet (BLAKE2b, comme etl_core.source_fingerprint)"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _label(value):
+    """Libellé d'une année dans le manifeste (None: année absente)"""
+    if pd.isna(value):
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _encode_parquet(table):
+    """Sérialiser une table Arrow en Parquet zstd (octets identiques pour un même contenu)"""
+    sink = pa.BufferOutputStream()
+    pq.write_table(table, sink, compression='zstd', compression_level=COMPRESSION_LEVEL,
+                   row_group_size=ROW_GROUP_SIZE)
+    return sink.getvalue().to_pybytes()
+
+
+class SnapshotStore:
+    """Instantanés des sorties du nettoyage, stockés par contenu"""
+
+    def __init__(self, root=SNAPSHOT_DIR):
+        self.root = root
+        self.objects_dir = os.path.join(root, 'objets')
+        self.manifests_dir = os.path.join(root, 'manifestes')
+
+    def _object_path(self, digest, suffix='.parquet'):
+        return os.path.join(self.objects_dir, digest[:2], digest + suffix)
+
+    def _put(self, data, stats, suffix='.parquet'):
+        """Écrire un objet s'il est absent (compté dans stats); retourne son empreinte"""
+        digest = _digest(data)
+        path = self._object_path(digest, suffix)
+        if os.path.exists(path):
+            stats['objets_partages'] += 1
+            stats['octets_partages'] += len(data)
+            return digest
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Écriture puis renommage: jamais d'objet partiel sous son nom définitif
+        with open(path + '.tmp', 'wb') as f:
+            f.write(data)
+        os.replace(path + '.tmp', path)
+        stats['objets_nouveaux'] += 1
+        stats['octets_ecrits'] += len(data)
+        return digest
+
+    def _save_frame(self, frame, pool, stats):
+        """Découper un DataFrame par année, écrire les parties absentes; retourne l'entrée du manifeste"""
+        if PARTITION_COLUMN in frame.columns and len(frame):
+            codes, keys = pd.factorize(frame[PARTITION_COLUMN], use_na_sentinel=False)
+        else:
+            codes, keys = np.zeros(len(frame), dtype=np.int64), [None]
+        # Lignes de chaque année, dans l'ordre du fichier
+        order = np.argsort(codes, kind='stable')
+        parts = np.split(order, np.cumsum(np.bincount(codes, minlength=len(keys)))[:-1])
+
+        # Schéma du fichier entier: types identiques dans toutes les parties
+        schema = pa.Schema.from_pandas(frame, preserve_index=False)
+        encoded = pool.map(lambda rows: _encode_parquet(
+            pa.Table.from_pandas(frame.iloc[rows], schema=schema, preserve_index=False)), parts)
+
+        groups = []
+        for key, rows, data in zip(keys, parts, encoded):
+            groups.append({'annee': _label(key), 'lignes': len(rows), 'objet': self._put(data, stats),
+                           'octets': len(data)})
+
+        ordre = None
+        if np.any(np.diff(codes) < 0):
+            ordre = self._put(_encode_parquet(pa.table({'Groupe': codes.astype(np.int32)})), stats)
+        return {'lignes': len(frame), 'colonnes': list(frame.columns), 'partition': PARTITION_COLUMN,
+                'groupes': groups, 'ordre': ordre}
+
+    def save(self, files=None, report=REPORT_FILE):
+        """Archiver les fichiers CSV {nom: chemin} et le rapport; retourne le manifeste"""
+        files = CLEANING_OUTPUTS if files is None else files
+        created = datetime.now()
+        snapshot_id = created.strftime('%Y%m%d-%H%M%S')
+        suffix = 1
+        while os.path.exists(os.path.join(self.manifests_dir, f'{snapshot_id}.json')):
+            suffix += 1
+            snapshot_id = f"{created.strftime('%Y%m%d-%H%M%S')}-{suffix}"
+
+        stats = {'objets_nouveaux': 0, 'objets_partages': 0, 'octets_ecrits': 0, 'octets_partages': 0}
+        datasets = {}
+        with ThreadPoolExecutor() as pool:
+            for name, path in files.items():
+                if not os.path.exists(path):
+                    continue
+                # Lecture exacte des réels: valeurs identiques au texte du fichier
+                entry = self._save_frame(pd.read_csv(path, float_precision='round_trip'), pool, stats)
+                datasets[name] = dict(fichier=os.path.basename(path), empreinte_source=source_fingerprint(path),
+                                      **entry)
+
+        report_entry = None
+        if report and os.path.exists(report):
+            with open(report, 'rb') as f:
+                text = f.read()
+            data = pa.Codec('zstd', COMPRESSION_LEVEL).compress(text, asbytes=True)
+            report_entry = {'fichier': os.path.basename(report), 'objet': self._put(data, stats, '.txt.zst'),
+                            'octets_texte': len(text)}
+
+        manifest = {'id': snapshot_id, 'date': created.isoformat(timespec='seconds'),
+                    'donnees': datasets, 'rapport': report_entry, **stats}
+        os.makedirs(self.manifests_dir, exist_ok=True)
+        with open(os.path.join(self.manifests_dir, f'{snapshot_id}.json'), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        return manifest
+
+    def snapshots(self):
+        """Manifestes de tous les instantanés, du plus ancien au plus récent"""
+        if not os.path.isdir(self.manifests_dir):
+            return []
+        manifests = []
+        for name in sorted(os.listdir(self.manifests_dir)):
+            if name.endswith('.json'):
+                with open(os.path.join(self.manifests_dir, name), encoding='utf-8') as f:
+                    manifests.append(json.load(f))
+        return manifests
+
+    def manifest(self, snapshot_id=None):
+        """Manifeste d'un instantané (le plus récent si snapshot_id est None)"""
+        if snapshot_id is None:
+            manifests = self.snapshots()
+            if not manifests:
+                raise FileNotFoundError(f"Aucun instantané dans {self.manifests_dir}")
+            return manifests[-1]
+        with open(os.path.join(self.manifests_dir, f'{snapshot_id}.json'), encoding='utf-8') as f:
+            return json.load(f)
+
+    def load(self, snapshot_id=None, name='nettoyees', columns=None, annees=None):
+        """DataFrame d'un fichier archivé, dans l'ordre d'origine des lignes
+
+        columns: colonnes lues (projection Parquet); annees: seules les parties de
+        ces années sont lues.
+        """
+        entry = self.manifest(snapshot_id)['donnees'][name]
+        wanted = None if annees is None else {str(a) for a in annees}
+        selected = [i for i, group in enumerate(entry['groupes']) if wanted is None or group['annee'] in wanted]
+        paths = [self._object_path(entry['groupes'][i]['objet']) for i in selected]
+        with ThreadPoolExecutor() as pool:
+            tables = list(pool.map(lambda path: pq.read_table(path, columns=columns), paths))
+        table = pa.concat_tables(tables) if tables else pq.read_table(
+            self._object_path(entry['groupes'][0]['objet']), columns=columns).slice(0, 0)
+
+        if entry['ordre']:
+            codes = pq.read_table(self._object_path(entry['ordre']))['Groupe'].to_numpy()
+            codes = codes[np.isin(codes, selected)]
+            # Ligne d'origine i = i-ème ligne lue dans l'ordre (année, position dans l'année)
+            inverse = np.empty(len(codes), dtype=np.int64)
+            inverse[np.argsort(codes, kind='stable')] = np.arange(len(codes))
+            table = table.take(pa.array(inverse))
+        return table.to_pandas()
+
+    def load_report(self, snapshot_id=None):
+        """Texte du rapport de nettoyage archivé"""
+        entry = self.manifest(snapshot_id)['rapport']
+        with open(self._object_path(entry['objet'], '.txt.zst'), 'rb') as f:
+            data = f.read()
+        return pa.Codec('zstd').decompress(data, decompressed_size=entry['octets_texte'],
+                                           asbytes=True).decode('utf-8')
+
+    def restore(self, snapshot_id=None, directory='.'):
+        """Réécrire les fichiers d'un instantané (CSV et rapport) dans directory"""
+        manifest = self.manifest(snapshot_id)
+        os.makedirs(directory, exist_ok=True)
+        written = []
+        for name, entry in manifest['donnees'].items():
+            path = os.path.join(directory, entry['fichier'])
+            self.load(manifest['id'], name).to_csv(path, index=False, encoding='utf-8')
+            written.append(path)
+        if manifest['rapport']:
+            path = os.path.join(directory, manifest['rapport']['fichier'])
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                f.write(self.load_report(manifest['id']))
+            written.append(path)
+        return written
+
+    def load_warehouse(self, snapshot_id=None, db_path='entrepot_snapshot.db', sentiment_dim=False):
+        """Construire un entrepôt de travail à partir des données nettoyées d'un instantané
+
+        Même modèle en étoile que l'ETL, chargé en un lot vectorisé (comme un shard);
+        la base est recréée. Retourne le nombre de faits chargés.
+        """
+        df = self.load(snapshot_id)
+        for path in (db_path, db_path + '-wal', db_path + '-shm'):
+            if os.path.exists(path):
+                os.remove(path)
+        conn = sqlite3.connect(db_path)
+        try:
+            # Entrepôt jetable: ni journal ni synchronisation disque
+            conn.execute("PRAGMA journal_mode = OFF")
+            conn.execute("PRAGMA synchronous = OFF")
+            cursor = conn.cursor()
+            create_schema(cursor)
+            registry = KeyRegistry.load()
+            seed_dimensions(conn, registry)
+            register_members(conn, registry, df)
+            df = enrich_dimensions(df, registry)
+            first_id = next_company_id(cursor)
+            sentiment_ids = encode_sentiment_text(cursor, df) if sentiment_dim else None
+            companies, facts = build_batch(df, range(first_id, first_id + len(df)), *registry.mappings,
+                                           sentiment_ids=sentiment_ids)
+            cursor.executemany(INSERT_COMPANY, companies)
+            cursor.executemany(INSERT_FAIT, facts)
+            conn.commit()
+        finally:
+            conn.close()
+        return len(df)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Instantanés des sorties du nettoyage GenAI")
+    parser.add_argument('--racine', default=SNAPSHOT_DIR, help="Répertoire des instantanés")
+    commands = parser.add_subparsers(dest='commande', required=True)
+    commands.add_parser('liste', help="Lister les instantanés")
+    save_parser = commands.add_parser('enregistrer', help="Archiver des sorties du nettoyage")
+    save_parser.add_argument('--nettoyees', default=CLEANING_OUTPUTS['nettoyees'])
+    save_parser.add_argument('--quarantaine', default=CLEANING_OUTPUTS['quarantaine'])
+    save_parser.add_argument('--rapport', default=REPORT_FILE)
+    restore_parser = commands.add_parser('restaurer', help="Réécrire les fichiers d'un instantané")
+    restore_parser.add_argument('id', nargs='?', default=None, help="Instantané (défaut: le plus récent)")
+    restore_parser.add_argument('--dossier', default='restauration_snapshot')
+    warehouse_parser = commands.add_parser('entrepot', help="Charger un instantané dans un entrepôt de travail")
+    warehouse_parser.add_argument('id', nargs='?', default=None, help="Instantané (défaut: le plus récent)")
+    warehouse_parser.add_argument('--db', default='entrepot_snapshot.db')
+    warehouse_parser.add_argument('--sentiment-dim', action='store_true')
+    args = parser.parse_args()
+
+    store = SnapshotStore(args.racine)
+    if args.commande == 'liste':
+        for manifest in store.snapshots():
+            rows = ', '.join(f"{name}: {entry['lignes']:,} lignes" for name, entry in manifest['donnees'].items())
+            print(f"{manifest['id']}  {manifest['date']}  {rows}  "
+                  f"({manifest['objets_nouveaux']} objets écrits, {manifest['objets_partages']} partagés)")
+    elif args.commande == 'enregistrer':
+        manifest = store.save({'nettoyees': args.nettoyees, 'quarantaine': args.quarantaine}, report=args.rapport)
+        print(f"✓ Instantané {manifest['id']}: {manifest['objets_nouveaux']} objets écrits "
+              f"({manifest['octets_ecrits'] / 1024:,.0f} Ko), {manifest['objets_partages']} partagés "
+              f"({manifest['octets_partages'] / 1024:,.0f} Ko)")
+    elif args.commande == 'restaurer':
+        for path in store.restore(args.id, args.dossier):
+            print(f"✓ {path}")
+    else:
+        loaded = store.load_warehouse(args.id, args.db, sentiment_dim=args.sentiment_dim)
+        print(f"✓ Entrepôt de travail {args.db}: {loaded:,} enregistrements chargés")
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+Jeux de données générés et exécutions des deux scripts pour la suite de tests
+
+Chaque jeu (FIXTURES) est généré avec une graine et une taille fixes, anomalies
+comprises (doublons, valeurs impossibles, outils hors référentiel, sentiments
+manquants). Le nettoyage puis l'ETL (un répertoire de travail par mode) sont
+exécutés une seule fois par session, à la demande, et leurs durées enregistrées.
+
+Options:
+    --update-golden      régénérer les résultats de référence (tests/golden/*.json)
+    --update-baseline    enregistrer les durées de cette exécution comme référence
+    --perf-threshold N   ralentissement toléré par étape, en % (défaut: 40)
+"""
+
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(TESTS_DIR)
+GOLDEN_DIR = os.path.join(TESTS_DIR, 'golden')
+BASELINE_FILE = os.path.join(TESTS_DIR, 'perf_baseline.json')
+
+# Jeux de données générés: nom -> (lignes, graine)
+FIXTURES = {
+    'petit': (3_000, 42),
+    'moyen': (30_000, 7),
+}
+ETL_MODES = ['sequentiel', 'pipeline', 'shards']
+ETL_SCRIPT = '02_ETL_DataWarehouse_GenAI.py'
+
+COUNTRIES = ['USA', 'Canada', 'Brazil', 'UK', 'Germany', 'France', 'Switzerland', 'South Africa',
+             'UAE', 'India', 'Singapore', 'Japan', 'South Korea', 'Australia']
+INDUSTRIES = ['Technology', 'Healthcare', 'Finance', 'Retail', 'Manufacturing', 'Education',
+              'Transportation', 'Telecom', 'Hospitality', 'Entertainment', 'Legal Services',
+              'Advertising', 'Utilities', 'Defense']
+TOOLS = ['ChatGPT', 'Claude', 'Gemini', 'LLaMA', 'Mixtral', 'Groq']
+SENTIMENTS = ['I love the new tools', 'Some anxiety about job security', 'Exciting times ahead',
+              'It is fine', 'Workflow improved a lot', 'Concern about privacy', 'Scary changes',
+              'Neutral overall']
+
+
+def generate_source(path, rows, seed):
+    """Écrire enterprise_genai_data.csv: données aléatoires reproductibles et ~1% d'anomalies par type"""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Company Name': [f'Company {i}' for i in range(rows)],
+        'Industry': rng.choice(INDUSTRIES, rows),
+        'Country': rng.choice(COUNTRIES, rows),
+        'GenAI Tool': rng.choice(TOOLS, rows),
+        'Adoption Year': rng.choice([2022, 2023, 2024], rows),
+        'Number of Employees Impacted': rng.integers(0, 20_000, rows),
+        'New Roles Created': rng.integers(0, 30, rows),
+        'Training Hours Provided': rng.integers(0, 25_000, rows),
+        'Productivity Change (%)': rng.uniform(0, 40, rows).round(2),
+        'Employee Sentiment': rng.choice(SENTIMENTS, rows).astype(object),
+    })
+
+    anomalies = np.array_split(rng.choice(rows, 5 * max(1, rows // 100), replace=False), 5)
+    df.loc[anomalies[0], 'Number of Employees Impacted'] *= -1          # quarantaine
+    df.loc[anomalies[1], 'Adoption Year'] = 2019                        # quarantaine
+    df.loc[anomalies[2], 'GenAI Tool'] = 'Copilot'                      # hors référentiel
+    df.loc[anomalies[3], 'Employee Sentiment'] = None                   # sentiment manquant
+    df.loc[anomalies[4], 'Number of Employees Impacted'] = 5            # rôles > employés
+    df.loc[anomalies[4], 'New Roles Created'] = 20
+
+    duplicates = df.iloc[rng.choice(rows, max(1, rows // 100), replace=False)]
+    pd.concat([df, duplicates]).to_csv(path, index=False)
+
+
+def run_script(script, workdir, *args):
+    """Exécuter un script du projet dans workdir; retourne sa durée (s)"""
+    env = dict(os.environ, MPLBACKEND='Agg', PYTHONIOENCODING='utf-8')
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, os.path.join(PROJECT_DIR, script), *args], cwd=workdir,
+                            env=env, capture_output=True, text=True, encoding='utf-8')
+    elapsed = time.perf_counter() - start
+    assert result.returncode == 0, f"{script} {' '.join(args)} a échoué:\n{result.stdout[-3000:]}\n{result.stderr[-3000:]}"
+    return elapsed
+
+
+def simulate_interruption(db_path, batches=1):
+    """Ramener l'entrepôt à l'état d'un chargement arrêté après ses premiers lots validés
+
+    Les lots suivants sont retirés comme l'aurait fait l'annulation de leur
+    transaction (faits, entreprises, journal des lots, séquence des Adoption_ID).
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        load_id = conn.execute("SELECT MAX(Load_ID) FROM ETL_LOAD").fetchone()[0]
+        first_company_id = conn.execute(
+            "SELECT First_Company_ID FROM ETL_BATCH_LOG WHERE Load_ID = ? AND Batch_No = ?",
+            (load_id, batches + 1)).fetchone()[0]
+        conn.execute("DELETE FROM FAIT_ADOPTION WHERE Company_ID >= ?", (first_company_id,))
+        conn.execute("DELETE FROM DIM_COMPANY WHERE Company_ID >= ?", (first_company_id,))
+        conn.execute("DELETE FROM ETL_BATCH_LOG WHERE Load_ID = ? AND Batch_No > ?", (load_id, batches))
+        conn.execute("UPDATE ETL_LOAD SET Finished_At = NULL, Rows_Loaded = NULL WHERE Load_ID = ?", (load_id,))
+        conn.execute("UPDATE sqlite_sequence SET seq = (SELECT MAX(Adoption_ID) FROM FAIT_ADOPTION) "
+                     "WHERE name = 'FAIT_ADOPTION'")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+class PipelineRuns:
+    """Exécutions du nettoyage et de l'ETL par jeu de données, lancées une seule fois"""
+
+    def __init__(self, root):
+        self.root = root
+        self.timings = {name: {} for name in FIXTURES}
+
+    def cleaning_dir(self, fixture):
+        """Répertoire du nettoyage du jeu fixture (source générée puis 01_Nettoyage_GenAI.py)"""
+        workdir = os.path.join(self.root, fixture, 'nettoyage')
+        if not os.path.isdir(workdir):
+            os.makedirs(workdir)
+            rows, seed = FIXTURES[fixture]
+            generate_source(os.path.join(workdir, 'enterprise_genai_data.csv'), rows, seed)
+            self.timings[fixture]['script_nettoyage'] = run_script('01_Nettoyage_GenAI.py', workdir)
+        return workdir
+
+    def _etl_workdir(self, fixture, name):
+        """Nouveau répertoire d'ETL contenant les données nettoyées du jeu (None s'il existe)"""
+        workdir = os.path.join(self.root, fixture, name)
+        if os.path.isdir(workdir):
+            return None
+        cleaned = os.path.join(self.cleaning_dir(fixture), 'donnees_genai_nettoyees.csv')
+        os.makedirs(workdir)
+        shutil.copy(cleaned, workdir)
+        return workdir
+
+    def warehouse_dir(self, fixture, mode, *options):
+        """Répertoire de l'ETL du jeu fixture dans un mode de chargement (sans graphiques)
+
+        options: options supplémentaires de l'ETL (--fact-store, ...); seule
+        l'exécution sans option est chronométrée.
+        """
+        name = f'etl_{mode}' + ''.join(options).replace('--', '_')
+        workdir = self._etl_workdir(fixture, name)
+        if workdir:
+            elapsed = run_script(ETL_SCRIPT, workdir, '--mode', mode, '--no-charts', *options)
+            if not options:
+                self.timings[fixture][f'script_etl_{mode}'] = elapsed
+        return os.path.join(self.root, fixture, name)
+
+    def resumed_dir(self, fixture, mode, *options):
+        """ETL interrompu après son premier lot (simulé), puis repris avec --resume et options"""
+        name = f'etl_{mode}_resume' + ''.join(options).replace('--', '_')
+        workdir = self._etl_workdir(fixture, name)
+        if workdir:
+            run_script(ETL_SCRIPT, workdir, '--mode', mode, '--chunksize', '10000',
+                       '--no-charts', '--no-cube', '--no-aggregates')
+            simulate_interruption(os.path.join(workdir, 'datawarehouse_genai.db'))
+            run_script(ETL_SCRIPT, workdir, '--mode', mode, '--chunksize', '10000', '--resume',
+                       '--no-charts', *options)
+        return os.path.join(self.root, fixture, name)
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('genai', "Suite de régression du projet BI GenAI")
+    group.addoption('--update-golden', action='store_true',
+                    help="Régénérer les résultats de référence (tests/golden/*.json)")
+    group.addoption('--update-baseline', action='store_true',
+                    help="Enregistrer les durées de cette exécution comme référence (tests/perf_baseline.json)")
+    group.addoption('--perf-threshold', type=float, default=40.0,
+                    help="Ralentissement toléré par étape par rapport à la référence, en %% (défaut: 40)")
+
+
+@pytest.fixture(scope='session')
+def runs(tmp_path_factory, request):
+    pipeline_runs = PipelineRuns(str(tmp_path_factory.mktemp('genai')))
+    request.config._genai_runs = pipeline_runs
+    return pipeline_runs
+
+
+@pytest.fixture(scope='session')
+def golden(request):
+    """Comparer (ou régénérer avec --update-golden) un résultat de référence"""
+    update = request.config.getoption('--update-golden')
+
+    def check(name, actual):
+        path = os.path.join(GOLDEN_DIR, f'{name}.json')
+        # Aller-retour JSON: clés et nombres comparés tels qu'ils sont stockés
+        actual = json.loads(json.dumps(actual, ensure_ascii=False))
+        if update or not os.path.exists(path):
+            os.makedirs(GOLDEN_DIR, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(actual, f, ensure_ascii=False, indent=2, sort_keys=True)
+            pytest.skip(f"Référence {name} régénérée")
+        with open(path, encoding='utf-8') as f:
+            assert actual == json.load(f)
+
+    return check
+
+
+def load_baseline():
+    if not os.path.exists(BASELINE_FILE):
+        return {}
+    with open(BASELINE_FILE, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def pytest_sessionfinish(session):
+    """Conserver les durées de la session (cache pytest) et, si demandé, la nouvelle référence"""
+    pipeline_runs = getattr(session.config, '_genai_runs', None)
+    if pipeline_runs is None:
+        return
+    timings = {name: stages for name, stages in pipeline_runs.timings.items() if stages}
+    session.config.cache.set('genai/durees', timings)
+    if session.config.getoption('--update-baseline') and timings:
+        baseline = load_baseline()
+        for name, stages in timings.items():
+            baseline.setdefault('jeux', {}).setdefault(name, {}).update(
+                {stage: round(seconds, 4) for stage, seconds in stages.items()})
+        baseline['machine'] = f"{platform.system()} {platform.machine()}, Python {platform.python_version()}"
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    """Tableau des durées par étape comparées à la référence"""
+    pipeline_runs = getattr(config, '_genai_runs', None)
+    if pipeline_runs is None or not any(pipeline_runs.timings.values()):
+        return
+    reference = load_baseline().get('jeux', {})
+    terminalreporter.section("Durées par étape (référence: tests/perf_baseline.json)")
+    terminalreporter.write_line(f"  {'Jeu':<8} {'Étape':<28} {'Référence':>10} {'Mesure':>10} {'Écart':>8}")
+    for name, stages in pipeline_runs.timings.items():
+        for stage, seconds in sorted(stages.items()):
+            base = reference.get(name, {}).get(stage)
+            delta = f"{(seconds / base - 1) * 100:+.0f}%" if base else '-'
+            base_text = f"{base:.3f}s" if base else '-'
+            terminalreporter.write_line(f"  {name:<8} {stage:<28} {base_text:>10} {seconds:>9.3f}s {delta:>8}")
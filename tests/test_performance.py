@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+Durées par étape comparées à la référence (tests/perf_baseline.json)
+
+Une étape échoue si elle est plus lente que sa référence de plus de
+--perf-threshold % (et d'au moins MIN_SLACK_S, bruit de mesure des étapes
+courtes). Étapes mesurées:
+
+    script_*           exécution complète d'un script (processus neuf)
+    autres             fonctions du projet sur les données du jeu, meilleur de
+                       REPETITIONS essais (préparation hors mesure: chaque étape
+                       est un gestionnaire de contexte qui fournit la fonction mesurée)
+
+Après une optimisation confirmée: pytest -m perf --update-baseline
+"""
+
+import os
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+
+import pandas as pd
+import pytest
+
+from conftest import ETL_MODES, FIXTURES, load_baseline
+from etl_core import EXPORT_QUERY, build_batch, create_schema, enrich_dimensions, load_facts
+from quality_rules import QualityRules
+from reference_data import KeyRegistry, seed_dimensions
+from sentiment_engine import SentimentEngine
+
+pytestmark = pytest.mark.perf
+
+REPETITIONS = 5
+MIN_SLACK_S = 0.05
+
+
+def best_time(function, repetitions=REPETITIONS):
+    """Meilleure durée (s) de plusieurs exécutions"""
+    samples = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return min(samples)
+
+
+def _source(runs, fixture):
+    raw = pd.read_csv(os.path.join(runs.cleaning_dir(fixture), 'enterprise_genai_data.csv'))
+    return raw.drop_duplicates(keep='first')
+
+
+def _cleaned(runs, fixture):
+    return pd.read_csv(os.path.join(runs.cleaning_dir(fixture), 'donnees_genai_nettoyees.csv'))
+
+
+@contextmanager
+def stage_quality_rules(runs, fixture, tmp_path):
+    raw = _source(runs, fixture)
+    rules = QualityRules.load()
+    yield lambda: rules.fit(raw).apply(raw)
+
+
+@contextmanager
+def stage_sentiment(runs, fixture, tmp_path):
+    sentiments = _source(runs, fixture)['Employee Sentiment']
+    yield lambda: SentimentEngine.load(cache_file=None).classify(sentiments)
+
+
+@contextmanager
+def stage_enrichment(runs, fixture, tmp_path):
+    cleaned, registry = _cleaned(runs, fixture), KeyRegistry.load()
+    yield lambda: enrich_dimensions(cleaned, registry)
+
+
+@contextmanager
+def stage_build_batch(runs, fixture, tmp_path):
+    registry = KeyRegistry.load()
+    enriched = enrich_dimensions(_cleaned(runs, fixture), registry)
+    yield lambda: build_batch(enriched, range(1, len(enriched) + 1), *registry.mappings)
+
+
+@contextmanager
+def stage_load_facts(runs, fixture, tmp_path):
+    registry = KeyRegistry.load()
+    enriched = enrich_dimensions(_cleaned(runs, fixture), registry)
+    db_path = os.path.join(tmp_path, 'chargement.db')
+
+    def load():
+        if os.path.exists(db_path):
+            os.remove(db_path)
+        with closing(sqlite3.connect(db_path)) as conn:
+            create_schema(conn.cursor())
+            seed_dimensions(conn, registry)
+            load_facts(conn, enriched, *registry.mappings)
+    yield load
+
+
+@contextmanager
+def stage_views(runs, fixture, tmp_path):
+    db_path = os.path.join(runs.warehouse_dir(fixture, 'sequentiel'), 'datawarehouse_genai.db')
+    with closing(sqlite3.connect(db_path)) as conn:
+        yield lambda: [conn.execute(f"SELECT * FROM {view}").fetchall()
+                       for view in ['VUE_PAYS', 'VUE_INDUSTRIE', 'VUE_GENAI_TOOL']]
+
+
+@contextmanager
+def stage_export(runs, fixture, tmp_path):
+    db_path = os.path.join(runs.warehouse_dir(fixture, 'sequentiel'), 'datawarehouse_genai.db')
+    with closing(sqlite3.connect(db_path)) as conn:
+        yield lambda: pd.read_sql_query(EXPORT_QUERY, conn)
+
+
+FUNCTION_STAGES = {
+    'regles_qualite': stage_quality_rules,
+    'sentiment': stage_sentiment,
+    'enrichissement': stage_enrichment,
+    'build_batch': stage_build_batch,
+    'chargement_faits': stage_load_facts,
+    'vues_sql': stage_views,
+    'export_sql': stage_export,
+}
+SCRIPT_STAGES = ['script_nettoyage'] + [f'script_etl_{mode}' for mode in ETL_MODES]
+
+
+def measure(runs, fixture, stage, tmp_path):
+    """Durée de l'étape (s), enregistrée dans runs.timings"""
+    if stage in FUNCTION_STAGES:
+        # Préparation (et fermeture des connexions) hors mesure
+        with FUNCTION_STAGES[stage](runs, fixture, tmp_path) as function:
+            runs.timings[fixture][stage] = best_time(function)
+    elif stage == 'script_nettoyage':
+        runs.cleaning_dir(fixture)
+    else:
+        runs.warehouse_dir(fixture, stage[len('script_etl_'):])
+    return runs.timings[fixture][stage]
+
+
+@pytest.mark.parametrize('stage', SCRIPT_STAGES + list(FUNCTION_STAGES))
+@pytest.mark.parametrize('fixture', FIXTURES)
+def test_stage_duration(runs, fixture, stage, tmp_path, request):
+    seconds = measure(runs, fixture, stage, tmp_path)
+    if request.config.getoption('--update-baseline'):
+        return
+
+    reference = load_baseline().get('jeux', {}).get(fixture, {}).get(stage)
+    if reference is None:
+        pytest.skip(f"Pas de durée de référence pour {fixture}/{stage} (--update-baseline)")
+    threshold = request.config.getoption('--perf-threshold')
+    limit = max(reference * (1 + threshold / 100), reference + MIN_SLACK_S)
+    assert seconds <= limit, (f"{fixture}/{stage}: {seconds:.3f}s contre {reference:.3f}s de référence "
+                              f"(+{(seconds / reference - 1) * 100:.0f}%, seuil {threshold:.0f}%)")
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+Résultats de référence du nettoyage et de l'ETL sur les jeux générés
+
+Comptes des tables, contenu des vues, distributions des catégories et empreintes
+des exports sont comparés à tests/golden/<jeu>_*.json. Les trois modes de
+chargement de l'ETL, avec ou sans option (--fact-store, --sentiment-dim, reprise
+avec --resume), doivent produire exactement le même entrepôt.
+"""
+
+import hashlib
+import os
+import shutil
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from conftest import ETL_MODES, FIXTURES, run_script
+from etl_core import EXPORT_QUERY, LoadCheckpoint, create_schema
+from kpi_timeseries import KPI_TABLE, refresh_kpi_timeseries
+from quality_rules import REJECT_FILE
+from reference_data import KeyRegistry, seed_dimensions
+from semantic_layer import SemanticLayer
+
+CATEGORY_COLUMNS = ['Company_Size', 'Productivity_Impact', 'Adoption_Phase', 'Sentiment_Category']
+TABLES = ['DIM_COMPANY', 'DIM_GEOGRAPHY', 'DIM_INDUSTRY', 'DIM_GENAI_TOOL', 'FAIT_ADOPTION',
+          'AGG_KPI', 'KPI_SERIE_ANNUELLE']
+VIEWS = {
+    'VUE_PAYS': 'Country, Region',
+    'VUE_INDUSTRIE': 'Industry_Name, Sector_Type',
+    'VUE_GENAI_TOOL': 'Tool_Name, Tool_Provider',
+}
+
+
+def md5(path):
+    with open(path, 'rb') as f:
+        return hashlib.md5(f.read()).hexdigest()
+
+
+def counts(values):
+    """Effectifs par modalité (clés texte, ordre stable)"""
+    return {str(k): int(v) for k, v in values.value_counts(dropna=False).sort_index().items()}
+
+
+@pytest.mark.parametrize('fixture', FIXTURES)
+def test_cleaning_outputs(runs, golden, fixture):
+    workdir = runs.cleaning_dir(fixture)
+    cleaned = pd.read_csv(os.path.join(workdir, 'donnees_genai_nettoyees.csv'))
+    quarantine = pd.read_csv(os.path.join(workdir, REJECT_FILE))
+
+    golden(f'{fixture}_nettoyage', {
+        'lignes': len(cleaned),
+        'colonnes': list(cleaned.columns),
+        'quarantaine': len(quarantine),
+        'regles_quarantaine': counts(quarantine['Regles_Violees']),
+        'distributions': {col: counts(cleaned[col]) for col in CATEGORY_COLUMNS},
+        'md5_nettoyees': md5(os.path.join(workdir, 'donnees_genai_nettoyees.csv')),
+    })
+
+
+def warehouse_summary(workdir):
+    """Comptes des tables, vues, distributions et empreintes des exports d'un entrepôt"""
+    conn = sqlite3.connect(os.path.join(workdir, 'datawarehouse_genai.db'))
+    try:
+        tables = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in TABLES}
+        views = {view: pd.read_sql_query(f"SELECT * FROM {view} ORDER BY {order}", conn)
+                 .round(6).to_dict('split')['data'] for view, order in VIEWS.items()}
+        facts = pd.read_sql_query("""
+        SELECT f.Productivity_Impact, f.Adoption_Phase, f.Sentiment_Category, c.Company_Size
+        FROM FAIT_ADOPTION f JOIN DIM_COMPANY c ON f.Company_ID = c.Company_ID
+        """, conn)
+    finally:
+        conn.close()
+
+    return {
+        'tables': tables,
+        'vues': views,
+        'distributions': {col: counts(facts[col]) for col in CATEGORY_COLUMNS},
+        'md5_export': md5(os.path.join(workdir, 'donnees_powerbi_genai.csv')),
+        'md5_kpis_annuels': md5(os.path.join(workdir, 'kpis_annuels_genai.csv')),
+    }
+
+
+@pytest.mark.parametrize('mode', ETL_MODES)
+@pytest.mark.parametrize('fixture', FIXTURES)
+def test_warehouse_outputs(runs, golden, fixture, mode):
+    # Même référence pour tous les modes: les chargements sont interchangeables
+    golden(f'{fixture}_entrepot', warehouse_summary(runs.warehouse_dir(fixture, mode)))
+
+
+@pytest.mark.parametrize('option', ['--fact-store', '--sentiment-dim'])
+@pytest.mark.parametrize('mode', ETL_MODES)
+def test_option_outputs(runs, golden, mode, option):
+    """Stockage colonnaire (export et graphiques) ou texte du sentiment encodé: même entrepôt"""
+    golden('petit_entrepot', warehouse_summary(runs.warehouse_dir('petit', mode, option)))
+
+
+@pytest.mark.parametrize('options', [(), ('--fact-store',), ('--sentiment-dim',)],
+                         ids=['resume', 'fact-store', 'sentiment-dim'])
+@pytest.mark.parametrize('mode', ['sequentiel', 'pipeline'])
+def test_resumed_outputs(runs, golden, mode, options):
+    """Chargement interrompu après son premier lot puis repris avec --resume: même entrepôt"""
+    golden('moyen_entrepot', warehouse_summary(runs.resumed_dir('moyen', mode, *options)))
+
+
+def test_fact_store_existing_warehouse(runs, tmp_path):
+    """Second chargement dans un entrepôt existant: l'export du stockage reste celui de SQLite"""
+    cleaned = os.path.join(runs.cleaning_dir('petit'), 'donnees_genai_nettoyees.csv')
+    shutil.copy(cleaned, tmp_path)
+    for _ in range(2):
+        run_script('02_ETL_DataWarehouse_GenAI.py', str(tmp_path), '--fact-store',
+                   '--no-charts', '--no-cube', '--no-aggregates')
+
+    conn = sqlite3.connect(tmp_path / 'datawarehouse_genai.db')
+    try:
+        pd.read_sql_query(EXPORT_QUERY, conn).to_csv(tmp_path / 'export_sql.csv', index=False, encoding='utf-8')
+    finally:
+        conn.close()
+    assert len(pd.read_csv(tmp_path / 'donnees_powerbi_genai.csv')) == 2 * len(pd.read_csv(cleaned))
+    assert md5(tmp_path / 'donnees_powerbi_genai.csv') == md5(tmp_path / 'export_sql.csv')
+
+
+def test_malformed_row_rejected(runs, tmp_path):
+    """Une valeur numérique invalide rejette sa ligne sans interrompre le chargement"""
+    cleaned = pd.read_csv(os.path.join(runs.cleaning_dir('petit'), 'donnees_genai_nettoyees.csv'))
+    cleaned['Training Hours Provided'] = cleaned['Training Hours Provided'].astype(object)
+    cleaned.loc[1234, 'Training Hours Provided'] = 'n/a'
+
+    exports = {}
+    for mode in ETL_MODES:
+        workdir = tmp_path / mode
+        workdir.mkdir()
+        cleaned.to_csv(workdir / 'donnees_genai_nettoyees.csv', index=False)
+        run_script('02_ETL_DataWarehouse_GenAI.py', str(workdir), '--mode', mode, '--chunksize', '1000',
+                   '--no-charts', '--no-cube', '--no-aggregates')
+
+        conn = sqlite3.connect(workdir / 'datawarehouse_genai.db')
+        try:
+            facts = conn.execute("SELECT COUNT(*) FROM FAIT_ADOPTION").fetchone()[0]
+            companies = conn.execute("SELECT COUNT(*) FROM DIM_COMPANY").fetchone()[0]
+            logged = conn.execute("SELECT SUM(Source_End - Source_Start), SUM(Rows_Loaded), "
+                                  "SUM(Rows_Rejected) FROM ETL_BATCH_LOG").fetchone()
+        finally:
+            conn.close()
+        assert facts == len(cleaned) - 1
+        assert companies == facts
+        assert logged == (len(cleaned), len(cleaned) - 1, 1)
+        exports[mode] = md5(workdir / 'donnees_powerbi_genai.csv')
+
+    assert exports['pipeline'] == exports['shards'] == exports['sequentiel']
+
+
+def test_load_stopped_before_first_batch(tmp_path):
+    """Un chargement arrêté avant son premier lot ne reste pas interrompu"""
+    source = tmp_path / 'donnees_genai_nettoyees.csv'
+    source.write_text('Company Name\nA\n', encoding='utf-8')
+    conn = sqlite3.connect(':memory:')
+    create_schema(conn.cursor())
+
+    stopped = LoadCheckpoint.open(conn, str(source), 'sequentiel')
+    for resume in (False, True):
+        checkpoint = LoadCheckpoint.open(conn, str(source), 'sequentiel', resume=resume)
+        assert checkpoint.load_id != stopped.load_id
+        assert LoadCheckpoint.interrupted(conn) == [(checkpoint.load_id, source.name, 0, 0)]
+        stopped = checkpoint
+    checkpoint.finish(conn)
+    assert LoadCheckpoint.interrupted(conn) == []
+
+
+def reseeded_registry():
+    """Référentiel de même version dont la Région du premier pays a changé"""
+    registry = KeyRegistry.load()
+    tables = {table: [dict(row) for row in rows] for table, rows in registry.tables.items()}
+    tables['DIM_GEOGRAPHY'][1]['Region'] = 'Région test'
+    return KeyRegistry(registry.version, tables)
+
+
+def test_aggregates_stale_after_reseed(runs, tmp_path):
+    """Un agrégat matérialisé n'est plus servi après une réalimentation du référentiel"""
+    db_path = tmp_path / 'datawarehouse_genai.db'
+    shutil.copy(os.path.join(runs.warehouse_dir('petit', 'sequentiel'), 'datawarehouse_genai.db'), db_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        layer = SemanticLayer(conn)
+        measures = {'Nombre': ('COUNT', '*')}
+        assert 'AGG_KPI' in layer.sql(measures, ['Region'])[0]
+
+        seed_dimensions(conn, reseeded_registry(), force=True)
+        assert 'AGG_KPI' not in layer.sql(measures, ['Region'])[0]
+        expected = layer.query(measures, ['Region'])
+        assert 'Région test' in set(expected['Region'])
+
+        layer.refresh()
+        assert 'AGG_KPI' in layer.sql(measures, ['Region'])[0]
+        pd.testing.assert_frame_equal(layer.query(measures, ['Region']), expected)
+    finally:
+        conn.close()
+
+
+def test_kpi_timeseries_after_reseed(runs, tmp_path):
+    """Série annuelle recalculée après une réalimentation du référentiel, sans fait nouveau"""
+    db_path = tmp_path / 'datawarehouse_genai.db'
+    shutil.copy(os.path.join(runs.warehouse_dir('petit', 'sequentiel'), 'datawarehouse_genai.db'), db_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        assert refresh_kpi_timeseries(conn) == (None, 0)
+        seed_dimensions(conn, reseeded_registry(), force=True)
+        _, lines = refresh_kpi_timeseries(conn)
+        assert lines > 0
+        series = pd.read_sql_query(f"SELECT * FROM {KPI_TABLE} ORDER BY 1, 2, 3, 4, 5", conn)
+        assert 'Région test' in set(series['Region'])
+
+        refresh_kpi_timeseries(conn, full=True)
+        pd.testing.assert_frame_equal(
+            pd.read_sql_query(f"SELECT * FROM {KPI_TABLE} ORDER BY 1, 2, 3, 4, 5", conn), series)
+    finally:
+        conn.close()